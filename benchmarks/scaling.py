@@ -0,0 +1,93 @@
+"""
+Thread scaling benchmark for the pairwise distance computation.
+
+Each thread count is run in a fresh interpreter with ``OMP_NUM_THREADS`` set, so the OpenMP runtime picks it up on
+start-up. The sequences are random CDR3-like strings of variable length, which is the case where an even split of the
+upper triangle over rows is the most unbalanced.
+
+Examples
+--------
+$ python benchmarks/scaling.py --metric CdrDist --n-sequences 5000 --threads 1 2 4 8 16 32 64
+
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import textwrap
+from typing import List
+
+SNIPPET = textwrap.dedent(
+    """
+    import time
+
+    import numpy as np
+
+    import setriq
+
+    rng = np.random.default_rng({seed})
+    alphabet = np.array(list("ACDEFGHIKLMNPQRSTVWY"))
+    sequences = [
+        "".join(rng.choice(alphabet, size=size))
+        for size in rng.integers({min_length}, {max_length} + 1, size={n_sequences})
+    ]
+    metric = setriq.{metric}()
+
+    timings = []
+    for _ in range({repeats}):
+        start = time.perf_counter()
+        metric(sequences)
+        timings.append(time.perf_counter() - start)
+    print(min(timings))
+    """
+)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--metric", default="CdrDist")
+    parser.add_argument("--n-sequences", type=int, default=2_000)
+    parser.add_argument("--min-length", type=int, default=8)
+    parser.add_argument("--max-length", type=int, default=25)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[2**k for k in range(7) if 2**k <= (os.cpu_count() or 1)],
+    )
+    return parser.parse_args()
+
+
+def time_run(args: argparse.Namespace, n_threads: int) -> float:
+    code = SNIPPET.format(**vars(args))
+    env = {**os.environ, "OMP_NUM_THREADS": str(n_threads)}
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, capture_output=True, check=True
+    )
+    return float(result.stdout.decode().strip())
+
+
+def main():
+    args = parse_args()
+    n_pairs = args.n_sequences * (args.n_sequences - 1) // 2
+
+    print(f"{args.metric}: {args.n_sequences} sequences, {n_pairs} pairs")
+    print(f"{'threads':>8} {'time [s]':>10} {'speedup':>8} {'efficiency':>10}")
+
+    baseline: List[float] = []
+    for n_threads in args.threads:
+        elapsed = time_run(args, n_threads)
+        if not baseline:
+            baseline.append(elapsed * n_threads)
+
+        speedup = baseline[0] / elapsed
+        print(
+            f"{n_threads:>8} {elapsed:>10.3f} {speedup:>8.2f} {speedup / n_threads:>10.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
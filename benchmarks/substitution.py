@@ -0,0 +1,64 @@
+"""
+Substitution matrix benchmark for the alignment-based metrics.
+
+``CdrDist`` and ``TcrDistComponent`` look up a substitution score for every residue pair they compare, so the cost of
+the lookup dominates their inner loops. This script times both metrics on random CDR3-like sequences with a single
+thread, such that the throughput (pairs per second) of the kernels can be compared across builds.
+
+Examples
+--------
+$ python benchmarks/substitution.py --n-sequences 1000 --length 15
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import setriq
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--n-sequences", type=int, default=1_000)
+    parser.add_argument("--length", type=int, default=15)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    alphabet = np.array(list("ACDEFGHIKLMNPQRSTVWY"))
+    sequences = [
+        "".join(rng.choice(alphabet, size=args.length)) for _ in range(args.n_sequences)
+    ]
+    n_pairs = args.n_sequences * (args.n_sequences - 1) // 2
+    out = np.empty(n_pairs)
+
+    metrics = {
+        "CdrDist": setriq.CdrDist(n_jobs=args.n_jobs, deduplicate=False),
+        "TcrDistComponent": setriq.modules.distances.TcrDistComponent(
+            setriq.BLOSUM62, gap_penalty=4.0, n_jobs=args.n_jobs, deduplicate=False
+        ),
+    }
+
+    print(f"{args.n_sequences} sequences of length {args.length}, {n_pairs} pairs")
+    print(f"{'metric':>18} {'time [s]':>10} {'pairs / s':>12}")
+    for name, metric in metrics.items():
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            metric(sequences, out=out)
+            timings.append(time.perf_counter() - start)
+
+        elapsed = min(timings)
+        print(f"{name:>18} {elapsed:>10.3f} {n_pairs / elapsed:>12.3e}")
+
+
+if __name__ == "__main__":
+    main()
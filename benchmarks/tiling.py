@@ -0,0 +1,66 @@
+"""
+Tile size benchmark for the pairwise distance computation.
+
+The distance matrix is traversed in tiles, whose sequences are kept in cache while the tile is computed. This script
+times a metric for a range of tile sizes on random CDR3-like sequences. Cheap metrics (e.g. ``Hamming``) on large
+inputs are the most sensitive to the memory traffic the tiling avoids.
+
+Examples
+--------
+$ python benchmarks/tiling.py --metric Hamming --n-sequences 20000 --tile-sizes 16 32 64 128 256 512 1024
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+import setriq
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--metric", default="Hamming")
+    parser.add_argument("--n-sequences", type=int, default=10_000)
+    parser.add_argument("--min-length", type=int, default=15)
+    parser.add_argument("--max-length", type=int, default=15)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--tile-sizes", type=int, nargs="+", default=[16, 32, 64, 128, 256, 512, 1024]
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    alphabet = np.array(list("ACDEFGHIKLMNPQRSTVWY"))
+    sequences = [
+        "".join(rng.choice(alphabet, size=size))
+        for size in rng.integers(
+            args.min_length, args.max_length + 1, size=args.n_sequences
+        )
+    ]
+    n_pairs = args.n_sequences * (args.n_sequences - 1) // 2
+    out = np.empty(n_pairs)
+
+    print(f"{args.metric}: {args.n_sequences} sequences, {n_pairs} pairs")
+    print(f"{'tile size':>10} {'time [s]':>10} {'pairs / s':>12}")
+    for tile_size in args.tile_sizes:
+        metric = getattr(setriq, args.metric)(tile_size=tile_size)
+
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            metric(sequences, out=out)
+            timings.append(time.perf_counter() - start)
+
+        elapsed = min(timings)
+        print(f"{tile_size:>10} {elapsed:>10.3f} {n_pairs / elapsed:>12.3e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,9 @@
 #ifndef METRICS_SMITHWATERMAN_H
 #define METRICS_SMITHWATERMAN_H
 
+#include <cstdint>
+#include <vector>
+
 #include "SubstitutionMatrix.h"
 #include "utils/type_defs.h"
 
@@ -14,16 +17,25 @@ private:
     double gap_opening_penalty_;
     double gap_extension_penalty_;
 
+    // the integer scores of the inter-sequence alignments, which are only computed if all the substitution scores and
+    // gap penalties are (small) integers
+    std::vector<std::int16_t> integer_table_;
+    std::int16_t integer_gap_opening_penalty_;
+    std::int16_t integer_gap_extension_penalty_;
+    double max_substitution_score_;
+    bool integral_;
+
+    void build_integer_scores_();
+
     // scoring matrix creation
-    double calculate_gap_penalty_(const double_matrix_t& scoring_matrix,
-                                  const size_t& max_gap_length,
-                                  const size_t& idx,
-                                  const size_t& axis) const;
     double fill_scoring_matrix_(const std::string&a, const std::string&b) const;
     double compute_best_alignment_score_(const std::string&a, const std::string&b) const;
 
 public:
-    SmithWaterman() : substitution_matrix_{}, gap_opening_penalty_{}, gap_extension_penalty_{} {};
+    // the number of alignments `forward_lanes` computes at once, i.e. 8 int16 lanes fill a 128-bit vector register
+    static constexpr size_t lanes = 8;
+
+    SmithWaterman() : SmithWaterman(SubstitutionMatrix {}, 0., 0.) {};
     SmithWaterman(SubstitutionMatrix, const double&, const double&);
 
     double forward(const std::string&, const std::string&) const;
@@ -33,6 +45,9 @@ public:
         return out;
     };
 
+    // one sequence against (up to) `lanes` sequences at once
+    bool forward_lanes(const std::string& a, const std::string* b, const size_t& count, double* scores) const;
+
     // special case: identity score
     double identity_score(const std::string&) const;
 };
@@ -5,20 +5,32 @@
 #ifndef METRICS_SUBSTITUTIONMATRIX_H
 #define METRICS_SUBSTITUTIONMATRIX_H
 
+#include <array>
+#include <cstdint>
 #include <string>
 
 #include "utils/type_defs.h"
 
 class SubstitutionMatrix {
 private:
-    double_matrix_t scoring_matrix_;
-    token_index_map_t token_map_;
+    // the scores are held in a flat (size_ x size_) table, whose rows and columns are looked up by the byte value of a
+    // residue. The last row and column hold NaN for residues which are not in the index.
+    double_vector_t table_;
+    std::array<std::uint16_t, 256> codes_;
+    size_t size_;
 
 public:
-    SubstitutionMatrix() : scoring_matrix_{}, token_map_{} {};
+    SubstitutionMatrix();
     SubstitutionMatrix(const double_matrix_t&, const token_index_map_t&);
 
-    double forward (const char&, const char&) const;
+    // the number of rows (and columns) of the table, the last of which is the row of unknown residues
+    size_t size() const { return this->size_; };
+    const double_vector_t& table() const { return this->table_; };
+
+    size_t code(const char& token) const { return this->codes_[(unsigned char) token]; };
+    const double* row(const char& token) const { return &this->table_[this->code(token) * this->size_]; };
+
+    double forward(const char& from, const char& to) const { return this->row(from)[this->code(to)]; };
     double operator () (const char& a, const char& b) const { return this->forward(a, b); };
 };
 
@@ -5,6 +5,12 @@
 #ifndef METRICS_CDRDIST_H
 #define METRICS_CDRDIST_H
 
+#include <algorithm>
+#include <array>
+#include <functional>
+#include <string>
+#include <vector>
+
 #include "alignment/SmithWaterman.h"
 
 namespace metric {
@@ -13,13 +19,49 @@ namespace metric {
     private:
         SmithWaterman algorithm_;
 
+        // the identity scores of the sets of sequences the metric is applied to, looked up by the address of a sequence
+        struct IdentityScores {
+            const std::string* begin;
+            const std::string* end;
+            double_vector_t scores;
+        };
+        std::vector<IdentityScores> identity_scores_;
+
     public:
-        CdrDist() : algorithm_{} {};
+        CdrDist() : algorithm_{}, identity_scores_{} {};
         explicit CdrDist(const double_matrix_t&, const token_index_map_t&, const double&, const double&);
 
         double forward(const std::string &, const std::string &) const;
+        void forward_lanes(const std::string &, const std::string *, const size_t &, double *) const;
+
+        void cache_identity_scores(const string_vector_t &);
+        double identity_score(const std::string &sequence) const {
+            // the score of a sequence of a cached set is looked up, any other sequence's is computed
+            const std::less<const std::string*> less {};
+            for (const auto& cache : this->identity_scores_) {
+                if (!less(&sequence, cache.begin) && less(&sequence, cache.end))
+                    return cache.scores[&sequence - cache.begin];
+            }
+            return this->algorithm_.identity_score(sequence);
+        };
     };
 
+    template<typename F>
+    void forward_row(const CdrDist& metric,
+                     const std::string& a,
+                     const string_vector_t& sequences,
+                     const size_t& begin,
+                     const size_t& end,
+                     F&& f) {
+        // `a` is aligned against the sequences of the row `SmithWaterman::lanes` at a time
+        std::array<double, SmithWaterman::lanes> distances {};
+        for (size_t j = begin; j < end; j += SmithWaterman::lanes) {
+            const size_t count = std::min(SmithWaterman::lanes, end - j);
+            metric.forward_lanes(a, &sequences[j], count, distances.data());
+            for (size_t l = 0; l < count; l++) f(j + l, distances[l]);
+        }
+    }
+
 }
 
 #endif //METRICS_CDRDIST_H
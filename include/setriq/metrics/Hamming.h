@@ -5,6 +5,10 @@
 #ifndef SETRIQ_HAMMING_H
 #define SETRIQ_HAMMING_H
 
+#include <algorithm>
+#include <string>
+
+#include "utils/Mismatches.h"
 #include "utils/type_defs.h"
 
 namespace metric {
@@ -15,7 +19,18 @@ namespace metric {
     public:
         explicit Hamming(const double &mismatch_score) : mismatch_score_{mismatch_score} {};
 
-        double forward(const std::string &a, const std::string &b) const;
+        double forward(const std::string &a, const std::string &b) const {
+            /*!
+             * Compute the Hamming distance between two input strings. The residues are compared eight at a time, as
+             * the bytes of 64-bit words, and the mismatches are counted before they are scored. It is defined here,
+             * such that it is inlined into the loops of the distance computations.
+             *
+             * @param a: an input string to be compared
+             * @param b: an input string to be compared
+             */
+            const size_t n = std::min(a.size(), b.size());
+            return (double) mismatches::count(a.data(), b.data(), n) * this->mismatch_score_;
+        };
     };
 }
 
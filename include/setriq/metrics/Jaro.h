@@ -6,10 +6,23 @@
 #define SETRIQ_JARO_H
 
 #include <array>
+#include <string>
+
+#include "utils/PatternMasks.h"
 #include "utils/type_defs.h"
 
 typedef std::array<double, 3> jaro_weighting_t;
 
+struct JaroMatches {
+    /**
+     * The outcome of the matching step of the Jaro distance: the number of matching characters, the number of matched
+     * characters which are out of order (twice the number of transpositions) and the length of the common prefix.
+     */
+    size_t matches = 0;
+    size_t unordered = 0;
+    size_t prefix = 0;
+};
+
 namespace metric {
     class Jaro {
     private:
@@ -21,7 +34,24 @@ namespace metric {
         explicit Jaro(jaro_weighting_t weights) : weights_(weights) {};
 
         double forward(const std::string &a, const std::string &b) const;
+        double forward(const PatternMasks &a, const std::string &b) const;
+
+        JaroMatches match(const PatternMasks &a, const std::string &b, const size_t &max_prefix = 0) const;
+        double distance(const std::string &a, const std::string &b, const JaroMatches &matches) const;
     };
+
+    template<typename F>
+    void forward_row(const Jaro& metric,
+                     const std::string& a,
+                     const string_vector_t& sequences,
+                     const size_t& begin,
+                     const size_t& end,
+                     F&& f) {
+        // the pattern masks of `a` are computed once for the row
+        thread_local PatternMasks masks {};
+        masks.assign(a.data(), a.size());
+        for (size_t j = begin; j < end; j++) f(j, metric.forward(masks, sequences[j]));
+    }
 }
 
 #endif //SETRIQ_JARO_H
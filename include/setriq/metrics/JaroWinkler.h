@@ -21,7 +21,21 @@ namespace metric {
         explicit JaroWinkler(const double &p, const size_t &max_l, Jaro jaro) : p_{p}, max_l_{max_l}, jaro_{jaro} {};
 
         double forward(const std::string &a, const std::string &b) const;
+        double forward(const PatternMasks &a, const std::string &b) const;
     };
+
+    template<typename F>
+    void forward_row(const JaroWinkler& metric,
+                     const std::string& a,
+                     const string_vector_t& sequences,
+                     const size_t& begin,
+                     const size_t& end,
+                     F&& f) {
+        // the pattern masks of `a` are computed once for the row
+        thread_local PatternMasks masks {};
+        masks.assign(a.data(), a.size());
+        for (size_t j = begin; j < end; j++) f(j, metric.forward(masks, sequences[j]));
+    }
 }
 
 #endif //SETRIQ_JAROWINKLER_H
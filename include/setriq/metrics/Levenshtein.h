@@ -5,19 +5,53 @@
 #ifndef SETRIQ_LEVENSHTEIN_H
 #define SETRIQ_LEVENSHTEIN_H
 
+#include <limits>
 #include <string>
 
+#include "utils/PatternMasks.h"
+#include "utils/type_defs.h"
+
 namespace metric {
     class Levenshtein {
         double extra_cost_ = 0;
+        double max_distance_ = std::numeric_limits<double>::infinity();
+
+        // distances above `max_distance` are not computed exactly, and reported as `max_distance + 1`
+        double bound_(const double& distance) const {
+            return distance > this->max_distance_ ? this->max_distance_ + 1 : distance;
+        };
+        size_t limit_(const size_t& longest) const {
+            return this->max_distance_ < (double) longest ? (size_t) this->max_distance_ : longest;
+        };
 
     public:
-        Levenshtein() : extra_cost_{} {};
-        explicit Levenshtein(double x_cost) : extra_cost_ {x_cost} {};
+        Levenshtein() : extra_cost_{}, max_distance_{std::numeric_limits<double>::infinity()} {};
+        explicit Levenshtein(double x_cost, double max_distance = std::numeric_limits<double>::infinity())
+            : extra_cost_ {x_cost}, max_distance_ {max_distance} {};
 
         double forward(const std::string &, const std::string &) const;
+        double forward(const PatternMasks &, const std::string &) const;
 
+        // unit costs allow the bit-parallel algorithm of Myers, whose pattern masks are computed once per row
+        bool bit_parallel() const { return this->extra_cost_ == 0; };
     };
+
+    template<typename F>
+    void forward_row(const Levenshtein& metric,
+                     const std::string& a,
+                     const string_vector_t& sequences,
+                     const size_t& begin,
+                     const size_t& end,
+                     F&& f) {
+        if (!metric.bit_parallel()) {
+            for (size_t j = begin; j < end; j++) f(j, metric.forward(a, sequences[j]));
+            return;
+        }
+
+        thread_local PatternMasks masks {};
+        masks.assign(a.data(), a.size());
+        for (size_t j = begin; j < end; j++) f(j, metric.forward(masks, sequences[j]));
+    }
 }
 
 #endif //SETRIQ_LEVENSHTEIN_H
@@ -5,6 +5,9 @@
 #ifndef SETRIQ_LONGESTCOMMONSUBSTRING_H
 #define SETRIQ_LONGESTCOMMONSUBSTRING_H
 
+#include <string>
+
+#include "utils/PatternMasks.h"
 #include "utils/type_defs.h"
 
 namespace metric {
@@ -12,8 +15,22 @@ namespace metric {
     public:
         LongestCommonSubstring() = default;
 
-        double forward(const std::string&, const std::string&);
+        double forward(const std::string&, const std::string&) const;
+        double forward(const PatternMasks&, const std::string&) const;
     };
+
+    template<typename F>
+    void forward_row(const LongestCommonSubstring& metric,
+                     const std::string& a,
+                     const string_vector_t& sequences,
+                     const size_t& begin,
+                     const size_t& end,
+                     F&& f) {
+        // the pattern masks of `a` are computed once for the row
+        thread_local PatternMasks masks {};
+        masks.assign(a.data(), a.size());
+        for (size_t j = begin; j < end; j++) f(j, metric.forward(masks, sequences[j]));
+    }
 }
 
 #endif //SETRIQ_LONGESTCOMMONSUBSTRING_H
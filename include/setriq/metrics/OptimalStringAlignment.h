@@ -5,14 +5,24 @@
 #ifndef SETRIQ_OPTIMALSTRINGALIGNMENT_H
 #define SETRIQ_OPTIMALSTRINGALIGNMENT_H
 
+#include <limits>
+
 #include "utils/type_defs.h"
 
 namespace metric {
     class OptimalStringAlignment {
+        double max_distance_ = std::numeric_limits<double>::infinity();
+
+        // distances above `max_distance` are not computed exactly, and reported as `max_distance + 1`
+        double bound_(const double& distance) const {
+            return distance > this->max_distance_ ? this->max_distance_ + 1 : distance;
+        };
+
     public:
         OptimalStringAlignment() = default;
+        explicit OptimalStringAlignment(double max_distance) : max_distance_ {max_distance} {};
 
-        double forward(const std::string&, const std::string&);
+        double forward(const std::string&, const std::string&) const;
     };
 }
 
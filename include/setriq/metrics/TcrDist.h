@@ -5,6 +5,8 @@
 #ifndef METRICS_TCRDIST_H
 #define METRICS_TCRDIST_H
 
+#include <cstdint>
+#include <functional>
 #include <string>
 #include <vector>
 
@@ -13,19 +15,69 @@
 namespace metric {
     class TcrDist {
     private:
-        SubstitutionMatrix substitution_matrix_;
-        double gap_penalty_;
-        char gap_symbol_;
+        // the distance contributed by a pair of mismatching residues, i.e. min(4, 4 - score) for substitutions and the
+        // gap penalty for residues facing a gap
+        SubstitutionMatrix costs_;
         double distance_weight_;
 
     public:
-        TcrDist() : substitution_matrix_{}, gap_penalty_{}, gap_symbol_{}, distance_weight_{} {};
+        TcrDist() : costs_{}, distance_weight_{} {};
         TcrDist(const double_matrix_t &scoring_matrix,
                 const token_index_map_t &index,
                 double gap_penalty,
                 char gap_symbol,
                 double weight);
 
+        double forward(const char *, const char *, const size_t &) const;
+        double forward(const std::string &, const std::string &) const;
+    };
+
+    class TcrDistSum {
+        /**
+         * The sum of several TcrDist components, computed in a single pass. The components of a record are concatenated
+         * into one string, i.e. component c of a record is the substring [offsets[c], offsets[c + 1]).
+         */
+    private:
+        std::vector<TcrDist> components_;
+        std::vector<size_t> offsets_;
+
+        // a component with few distinct sequences (e.g. the germline CDRs, which are given by the V gene) is tabulated:
+        // the distances between its distinct sequences are computed once, and looked up by the codes of the sequences
+        struct Table {
+            size_t size;
+            double_vector_t distances;
+        };
+        std::vector<Table> tables_;
+
+        // the codes of the components of the sets of records the metric is applied to, looked up by the address of a
+        // record. The code of component c of record i is codes[i * n_components + c]
+        struct Codes {
+            const std::string* begin;
+            const std::string* end;
+            std::vector<std::uint16_t> codes;
+        };
+        std::vector<Codes> codes_;
+
+        const std::uint16_t* codes(const std::string& record) const {
+            const std::less<const std::string*> less {};
+            for (const auto& cache : this->codes_) {
+                if (!less(&record, cache.begin) && less(&record, cache.end))
+                    return &cache.codes[(&record - cache.begin) * this->components_.size()];
+            }
+            return nullptr;
+        };
+
+    public:
+        // the largest number of distinct sequences of a tabulated component
+        static constexpr size_t max_table_size = 512;
+
+        TcrDistSum() : components_{}, offsets_{0}, tables_{}, codes_{} {};
+        TcrDistSum(std::vector<TcrDist> components, const std::vector<size_t> &lengths);
+
+        size_t size() const { return this->offsets_.back(); };
+        const std::vector<size_t>& offsets() const { return this->offsets_; };
+
+        void tabulate(const std::vector<const string_vector_t*> &, const size_t &);
         double forward(const std::string &, const std::string &) const;
     };
 }
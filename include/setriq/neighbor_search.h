@@ -0,0 +1,220 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#ifndef SETRIQ_NEIGHBOR_SEARCH_H
+#define SETRIQ_NEIGHBOR_SEARCH_H
+
+#include <algorithm>
+#include <tuple>
+#include <vector>
+
+#include "pairwise_distance_computation.h"
+#include "utils/BlockPartition.h"
+#include "utils/NearestNeighbors.h"
+#include "utils/type_defs.h"
+
+struct Neighbor {
+    size_t i;
+    size_t j;
+    double distance;
+};
+
+typedef std::vector<Neighbor> neighbor_vector_t;
+
+struct NeighborList {
+    index_vector_t rows;
+    index_vector_t columns;
+    double_vector_t distances;
+};
+
+inline NeighborList merge_neighbors(std::vector<neighbor_vector_t>& buffers) {
+    /**
+     * Merge the per-thread neighbor buffers into a single list of (row, column, distance) arrays, ordered by row and
+     * column. The order is therefore independent of how the pairs were scheduled across threads.
+     */
+    size_t size = 0;
+    for (const auto& buffer : buffers) size += buffer.size();
+
+    neighbor_vector_t neighbors;
+    neighbors.reserve(size);
+    for (auto& buffer : buffers) {
+        neighbors.insert(neighbors.end(), buffer.begin(), buffer.end());
+        neighbor_vector_t ().swap(buffer);
+    }
+    std::sort(neighbors.begin(), neighbors.end(), [](const Neighbor& a, const Neighbor& b) {
+        return std::tie(a.i, a.j) < std::tie(b.i, b.j);
+    });
+
+    NeighborList out;
+    out.rows.reserve(size);
+    out.columns.reserve(size);
+    out.distances.reserve(size);
+    for (const auto& neighbor : neighbors) {
+        out.rows.push_back((index_t) neighbor.i);
+        out.columns.push_back((index_t) neighbor.j);
+        out.distances.push_back(neighbor.distance);
+    }
+    return out;
+}
+
+template<typename T>
+NeighborList radius_pairs_computation(T metric,
+                                      const string_vector_t& input_strings,
+                                      const double& radius,
+                                      const size_t& tile_size = default_tile_size,
+                                      const int& num_threads = 0) {
+    /**
+     * Find all pairs (i, j), i < j, of a set of sequences within a distance of `radius`. Only those pairs are kept,
+     * i.e. the memory scales with the number of neighbors rather than the number of pairs. Each thread collects its
+     * pairs in a buffer of its own.
+     *
+     * @return the rows, columns and distances of the pairs within `radius`
+     */
+    const auto threads = resolve_num_threads(num_threads);
+    auto&& buffers = std::vector<neighbor_vector_t> (threads);
+
+    auto visit = [&](const size_t& i, const size_t& j_begin, const size_t& j_end) {
+        auto& buffer = buffers[thread_index()];
+        forward_row(metric, input_strings[i], input_strings, j_begin, j_end, [&](const size_t& j, const double& distance) {
+            if (distance <= radius) buffer.push_back({i, j, distance});
+        });
+    };
+    if (input_strings.size() > 1) traverse_pairwise(input_strings, tile_size, threads, visit);
+    return merge_neighbors(buffers);
+}
+
+template<typename T>
+NeighborList radius_cross_computation(T metric,
+                                      const string_vector_t& queries,
+                                      const string_vector_t& references,
+                                      const double& radius,
+                                      const size_t& tile_size = default_tile_size,
+                                      const int& num_threads = 0) {
+    // the cross counterpart of `radius_pairs_computation`, i.e. rows index the queries and columns the references
+    const auto threads = resolve_num_threads(num_threads);
+    auto&& buffers = std::vector<neighbor_vector_t> (threads);
+
+    auto visit = [&](const size_t& i, const size_t& j_begin, const size_t& j_end) {
+        auto& buffer = buffers[thread_index()];
+        forward_row(metric, queries[i], references, j_begin, j_end, [&](const size_t& j, const double& distance) {
+            if (distance <= radius) buffer.push_back({i, j, distance});
+        });
+    };
+    traverse_cross(queries, references, tile_size, threads, visit);
+    return merge_neighbors(buffers);
+}
+
+// ----- k nearest neighbors ---------------------------------------------------------------------------------------- //
+inline void round_robin_pair(const size_t& round, const size_t& pair, const size_t& n_players,
+                             size_t& block_a, size_t& block_b) {
+    // the circle method of a round-robin tournament: every round pairs each of `n_players` (even) blocks with a
+    // different one, such that the pairs of a round are disjoint and every pair of blocks meets in exactly one round
+    const auto& m = n_players - 1;
+    const auto& a = pair ? (round + pair) % m : m;
+    const auto& b = pair ? (round + m - pair) % m : round;
+
+    block_a = std::min(a, b);
+    block_b = std::max(a, b);
+}
+
+template<typename T>
+void kneighbors_pairwise_computation(T metric,
+                                     const string_vector_t& input_strings,
+                                     const size_t& k,
+                                     index_t* indices,
+                                     double* distances,
+                                     const size_t& tile_size = default_tile_size,
+                                     const int& num_threads = 0) {
+    /**
+     * Find the `k` nearest neighbors of each of a set of sequences among the others. Each pair is computed once and
+     * offered to the bounded heaps of both of its sequences, so the memory is O(n * k). The tiles (pairs of blocks) are
+     * scheduled in rounds of disjoint pairs of blocks, i.e. no two threads ever touch the heaps of the same sequence.
+     *
+     * @param indices: the (n x k) row-major output array of neighbor indices
+     * @param distances: the (n x k) row-major output array of neighbor distances
+     */
+    const auto& n = input_strings.size();
+    const auto threads = resolve_num_threads(num_threads);
+    auto&& neighbors = NearestNeighbors (n, k);
+
+    // at least a few tiles per thread and round, to balance the load within each round
+    const auto&& blocks = BlockPartition (input_strings, tile_size ? tile_size : default_tile_size, 8 * threads);
+    const auto& n_blocks = blocks.size();
+    if (n_blocks == 0) return;
+
+    const auto& n_players = n_blocks + n_blocks % 2;  // an odd number of blocks gets a dummy block, i.e. a bye
+    const auto& n_rounds = n_players - 1;
+
+    auto offer = [&](const size_t& i, const size_t& j_begin, const size_t& j_end) {
+        forward_row(metric, input_strings[i], input_strings, j_begin, j_end, [&](const size_t& j, const double& distance) {
+            neighbors.offer(i, {distance, (index_t) j});
+            neighbors.offer(j, {distance, (index_t) i});
+        });
+    };
+
+#pragma omp parallel num_threads(threads) default(none) shared(n_blocks, n_players, n_rounds, blocks, offer)
+    {
+        // the diagonal tiles
+#pragma omp for schedule(dynamic, 1)
+        for (size_t block = 0; block < n_blocks; block++) {
+            for (size_t i = blocks.begin(block); i < blocks.end(block); i++) offer(i, i + 1, blocks.end(block));
+        }
+
+        // the off-diagonal tiles, with a barrier between rounds. The block with the smaller indices always comes first,
+        // such that each pair is computed in the same order as in the distance matrix
+        for (size_t round = 0; round < n_rounds; round++) {
+#pragma omp for schedule(dynamic, 1)
+            for (size_t pair = 0; pair < n_players / 2; pair++) {
+                size_t block_a, block_b;
+                round_robin_pair(round, pair, n_players, block_a, block_b);
+                if (block_b == n_blocks) continue;
+
+                for (size_t i = blocks.begin(block_a); i < blocks.end(block_a); i++)
+                    offer(i, blocks.begin(block_b), blocks.end(block_b));
+            }
+        }
+    }
+    neighbors.write(indices, distances);
+}
+
+template<typename T>
+void kneighbors_cross_computation(T metric,
+                                  const string_vector_t& queries,
+                                  const string_vector_t& references,
+                                  const size_t& k,
+                                  index_t* indices,
+                                  double* distances,
+                                  const size_t& tile_size = default_tile_size,
+                                  const int& num_threads = 0) {
+    /**
+     * Find the `k` nearest references of each query. A block of queries is owned by a single thread, which sweeps it
+     * against the references block by block, so the heaps of the queries are never shared between threads.
+     *
+     * @param indices: the (n_queries x k) row-major output array of reference indices
+     * @param distances: the (n_queries x k) row-major output array of reference distances
+     */
+    const auto threads = resolve_num_threads(num_threads);
+    const auto& block_size = tile_size ? tile_size : default_tile_size;
+    auto&& neighbors = NearestNeighbors (queries.size(), k);
+
+    const auto&& query_blocks = BlockPartition (queries, block_size, threads * tiles_per_thread);
+    const auto&& reference_blocks = BlockPartition (references, block_size, 1);
+    const auto& n_query_blocks = query_blocks.size();
+    const auto& n_reference_blocks = reference_blocks.size();
+
+#pragma omp parallel for num_threads(threads) schedule(dynamic, 1) default(none) shared(n_query_blocks, n_reference_blocks, query_blocks, reference_blocks, queries, references, metric, neighbors)
+    for (size_t block_row = 0; block_row < n_query_blocks; block_row++) {
+        for (size_t block_column = 0; block_column < n_reference_blocks; block_column++) {
+            for (size_t i = query_blocks.begin(block_row); i < query_blocks.end(block_row); i++) {
+                forward_row(metric, queries[i], references, reference_blocks.begin(block_column),
+                            reference_blocks.end(block_column), [&](const size_t& j, const double& distance) {
+                    neighbors.offer(i, {distance, (index_t) j});
+                });
+            }
+        }
+    }
+    neighbors.write(indices, distances);
+}
+
+#endif //SETRIQ_NEIGHBOR_SEARCH_H
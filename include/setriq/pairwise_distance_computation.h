@@ -5,24 +5,417 @@
 #ifndef SETRIQ_PAIRWISE_DISTANCE_COMPUTATION_H
 #define SETRIQ_PAIRWISE_DISTANCE_COMPUTATION_H
 
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <string>
+#include <type_traits>
+
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+
+#include "utils/BlockPartition.h"
 #include "utils/type_defs.h"
 
+// the average number of sequences along each side of a tile. The strings of a tile (and their residues) stay resident
+// in L1/L2 while all of the tile's pairs are computed
+constexpr size_t default_tile_size = 128;
+
+// the minimum number of tiles per thread, so that the dynamic schedule can balance out differences in tile cost
+constexpr size_t tiles_per_thread = 16;
+
+inline size_t max_threads() {
+#ifdef _OPENMP
+    return (size_t) omp_get_max_threads();
+#else
+    return 1;
+#endif
+}
+
+inline size_t thread_index() {
+#ifdef _OPENMP
+    return (size_t) omp_get_thread_num();
+#else
+    return 0;
+#endif
+}
+
+inline size_t resolve_num_threads(const int& num_threads) {
+    /**
+     * Resolve the number of threads requested for a computation. Zero defers to the OpenMP runtime, i.e. to
+     * `OMP_NUM_THREADS` or any limit set through `omp_set_num_threads` (e.g. by threadpoolctl). Negative values count
+     * back from that default, as in joblib: -1 uses all threads, -2 all but one, etc.
+     *
+     * @param num_threads: the requested number of threads
+     * @return the number of threads to run the computation with
+     */
+#ifdef _OPENMP
+    // nested within an outer parallel region, the computation runs serially instead of oversubscribing the machine
+    if (omp_in_parallel()) return 1;
+#endif
+    const auto default_threads = (int) max_threads();
+
+    if (num_threads > 0) return (size_t) num_threads;
+    if (num_threads == 0) return (size_t) default_threads;
+    return (size_t) std::max(default_threads + 1 + num_threads, 1);
+}
+
+template<typename O>
+inline typename std::enable_if<std::is_floating_point<O>::value, bool>::type
+store_distance(O& out, const double& distance) {
+    out = (O) distance;
+    return true;
+}
+
+template<typename O>
+inline typename std::enable_if<std::is_integral<O>::value, bool>::type
+store_distance(O& out, const double& distance) {
+    /**
+     * Store a distance in an (unsigned) integer output. Distances which are not integers in the range of the output
+     * type are clipped and reported, such that they are never silently truncated.
+     *
+     * @param out: the output element
+     * @param distance: the computed distance
+     * @return whether the distance was stored exactly
+     */
+    constexpr auto max_value = (double) std::numeric_limits<O>::max();
+    constexpr auto min_value = (double) std::numeric_limits<O>::min();
+
+    const auto rounded = std::nearbyint(distance);
+    out = (O) std::min(std::max(rounded, min_value), max_value);
+    return rounded == distance && min_value <= distance && distance <= max_value;
+}
+
+inline size_t condensed_offset(const size_t& row, const size_t& n) {
+    // the flat index of the pair (row, row + 1) in the condensed distance vector of `n` sequences
+    return row * (2 * n - row - 1) / 2;
+}
+
+inline size_t tiles_before(const size_t& block_row, const size_t& n_blocks) {
+    // the number of tiles in the (block) rows above `block_row` of the upper triangle, including the diagonal
+    return block_row * n_blocks - block_row * (block_row - 1) / 2;
+}
+
+inline void triangular_tile(const size_t& tile, const size_t& n_blocks, size_t& block_row, size_t& block_column) {
+    /**
+     * Map a tile index onto its (block_row, block_column) position in the upper triangle of blocks, where tiles are
+     * numbered row-major and the diagonal is included.
+     */
+    const auto& b = 2. * (double) n_blocks + 1.;
+    auto&& row = (size_t) std::floor((b - std::sqrt(std::max(b * b - 8. * (double) tile, 0.))) / 2.);
+
+    // correct for floating point error
+    while (row > 0 && tiles_before(row, n_blocks) > tile) row--;
+    while (row + 1 < n_blocks && tiles_before(row + 1, n_blocks) <= tile) row++;
+
+    block_row = row;
+    block_column = row + (tile - tiles_before(row, n_blocks));
+}
+
+template<typename T, typename F>
+void forward_row(const T& metric,
+                 const std::string& a,
+                 const string_vector_t& sequences,
+                 const size_t& begin,
+                 const size_t& end,
+                 F&& f) {
+    /**
+     * Compute the distances of `a` to the sequences [begin, end) and hand each of them to `f(j, distance)`. The
+     * traversals visit the pairs row by row, such that metrics which compute several distances at once (e.g. in the
+     * lanes of a vector register) can overload it in their own namespace.
+     */
+    for (size_t j = begin; j < end; j++) f(j, metric.forward(a, sequences[j]));
+}
+
+// ----- traversals ------------------------------------------------------------------------------------------------- //
+// the traversals below hand the pairs of a computation to a visitor, row by row and tile by tile. The visitor is called
+// as `visit(i, j_begin, j_end)` for the pairs (i, j_begin), ..., (i, j_end - 1), concurrently from all threads
+template<typename F>
+void traverse_pairwise(const string_vector_t& input_strings,
+                       const size_t& tile_size,
+                       const size_t& threads,
+                       F& visit) {
+    // the upper triangle is traversed in tiles of (i, j) blocks rather than row by row, so that the strings of a tile
+    // stay cache-resident. Blocks hold equal numbers of residues, which makes the tiles (roughly) equal in cost, and the
+    // tiles are handed out dynamically
+    const auto& min_blocks = (size_t) std::ceil(std::sqrt(2. * (double) (threads * tiles_per_thread)));
+    const auto&& blocks = BlockPartition (input_strings, tile_size ? tile_size : default_tile_size, min_blocks);
+    const auto& n_blocks = blocks.size();
+    const auto& n_tiles = n_blocks * (n_blocks + 1) / 2;
+
+#pragma omp parallel for num_threads(threads) schedule(dynamic, 1) default(none) shared(n_blocks, n_tiles, blocks, visit)
+    for (size_t tile = 0; tile < n_tiles; tile++) {
+        size_t block_row, block_column;
+        triangular_tile(tile, n_blocks, block_row, block_column);
+
+        const auto& column_end = blocks.end(block_column);
+        for (size_t i = blocks.begin(block_row); i < blocks.end(block_row); i++) {
+            const size_t column_begin = std::max(blocks.begin(block_column), i + 1);
+            if (column_begin < column_end) visit(i, column_begin, column_end);
+        }
+    }
+}
+
+template<typename F>
+void traverse_pairwise_rows(const string_vector_t& input_strings,
+                            const size_t& row_begin,
+                            const size_t& row_end,
+                            const size_t& tile_size,
+                            const size_t& threads,
+                            F& visit) {
+    // the rows [row_begin, row_end) of the upper triangle. The rows and the columns they are compared against
+    // ([row_begin + 1, n)) are partitioned separately, as in the cross traversal. Only the tiles reaching past the
+    // diagonal hold any pairs, i.e. row block `r` starts at column block `first_column[r]`
+    const auto& n = input_strings.size();
+    if (row_end <= row_begin || row_begin + 1 >= n) return;
+
+    const auto& min_tiles = threads * tiles_per_thread;
+    const auto& block_size = tile_size ? tile_size : default_tile_size;
+
+    const auto&& row_blocks = BlockPartition (input_strings, row_begin, row_end, block_size, 1);
+    const auto& n_row_blocks = row_blocks.size();
+
+    const auto&& column_blocks = BlockPartition (input_strings, row_begin + 1, n, block_size,
+                                                 (min_tiles + n_row_blocks - 1) / n_row_blocks);
+    const auto& n_column_blocks = column_blocks.size();
+
+    auto&& first_column = uint_vector_t (n_row_blocks, 0);
+    auto&& tiles_before_row = uint_vector_t (n_row_blocks + 1, 0);
+    size_t column = 0;
+    for (size_t r = 0; r < n_row_blocks; r++) {
+        while (column < n_column_blocks && column_blocks.end(column) <= row_blocks.begin(r) + 1) column++;
+        first_column[r] = column;
+        tiles_before_row[r + 1] = tiles_before_row[r] + n_column_blocks - column;
+    }
+    const auto& n_tiles = tiles_before_row[n_row_blocks];
+
+#pragma omp parallel for num_threads(threads) schedule(dynamic, 1) default(none) shared(n_tiles, row_blocks, column_blocks, first_column, tiles_before_row, visit)
+    for (size_t tile = 0; tile < n_tiles; tile++) {
+        const auto& block_row = (size_t) std::distance(
+                tiles_before_row.begin(),
+                std::upper_bound(tiles_before_row.begin(), tiles_before_row.end(), tile)) - 1;
+        const auto& block_column = first_column[block_row] + (tile - tiles_before_row[block_row]);
+
+        const auto& column_end = column_blocks.end(block_column);
+        for (size_t i = row_blocks.begin(block_row); i < row_blocks.end(block_row); i++) {
+            const size_t column_begin = std::max(column_blocks.begin(block_column), i + 1);
+            if (column_begin < column_end) visit(i, column_begin, column_end);
+        }
+    }
+}
+
+template<typename F>
+void traverse_cross(const string_vector_t& queries,
+                    const string_vector_t& references,
+                    const size_t& tile_size,
+                    const size_t& threads,
+                    F& visit) {
+    // all (query, reference) pairs, traversed in tiles like the pairwise case. The references are split into enough
+    // blocks that a handful of queries against a large reference set still keeps all threads busy
+    if (queries.empty() || references.empty()) return;
+
+    const auto& min_tiles = threads * tiles_per_thread;
+    const auto& block_size = tile_size ? tile_size : default_tile_size;
+
+    const auto&& query_blocks = BlockPartition (queries, block_size, 1);
+    const auto& n_query_blocks = query_blocks.size();
+
+    const auto&& reference_blocks = BlockPartition (references, block_size,
+                                                    (min_tiles + n_query_blocks - 1) / n_query_blocks);
+    const auto& n_reference_blocks = reference_blocks.size();
+    const auto& n_tiles = n_query_blocks * n_reference_blocks;
+
+#pragma omp parallel for num_threads(threads) schedule(dynamic, 1) default(none) shared(n_tiles, n_reference_blocks, query_blocks, reference_blocks, visit)
+    for (size_t tile = 0; tile < n_tiles; tile++) {
+        const auto& block_row = tile / n_reference_blocks;
+        const auto& block_column = tile % n_reference_blocks;
+
+        for (size_t i = query_blocks.begin(block_row); i < query_blocks.end(block_row); i++) {
+            visit(i, reference_blocks.begin(block_column), reference_blocks.end(block_column));
+        }
+    }
+}
+
+// ----- distance matrices ------------------------------------------------------------------------------------------ //
+template<typename T, typename O>
+bool pairwise_distance_computation(T metric,
+                                   const string_vector_t& input_strings,
+                                   O* distance_matrix,
+                                   const size_t& tile_size = default_tile_size,
+                                   const int& num_threads = 0) {
+    /**
+     * Compute the condensed distance vector (the flat upper triangle of the distance matrix) of a set of sequences. The
+     * output can be of any arithmetic type `O`; distances which cannot be represented exactly by an integer type are
+     * clipped.
+     *
+     * @return whether all distances were stored exactly
+     */
+    const auto& n = input_strings.size();
+
+    // catch case where fewer than two strings were provided
+    if (n < 2) return true;
+
+    bool exact = true;
+    auto visit = [&](const size_t& i, const size_t& j_begin, const size_t& j_end) {
+        // flat index of the pair (i, 0), modulo 2^64, such that (i, j) is at `offset + j`
+        const auto& offset = condensed_offset(i, n) - i - 1;
+        forward_row(metric, input_strings[i], input_strings, j_begin, j_end, [&](const size_t& j, const double& distance) {
+            if (!store_distance(distance_matrix[offset + j], distance)) {
+#pragma omp atomic write
+                exact = false;
+            }
+        });
+    };
+    traverse_pairwise(input_strings, tile_size, resolve_num_threads(num_threads), visit);
+    return exact;
+}
+
 template<typename T>
-double_vector_t pairwise_distance_computation(T metric, const string_vector_t& input_strings) {
+double_vector_t pairwise_distance_computation(T metric,
+                                              const string_vector_t& input_strings,
+                                              const size_t& tile_size = default_tile_size,
+                                              const int& num_threads = 0) {
     const auto& n = input_strings.size();
     auto&& distance_matrix = double_vector_t (n * (n - 1) / 2);
 
-    // catch case where no strings were provided
-    if (n == 0) return distance_matrix;
+    pairwise_distance_computation(metric, input_strings, distance_matrix.data(), tile_size, num_threads);
+    return distance_matrix;
+}
+
+template<typename T, typename O>
+bool pairwise_rows_computation(T metric,
+                               const string_vector_t& input_strings,
+                               const size_t& row_begin,
+                               const size_t& row_end,
+                               O* distance_matrix,
+                               const size_t& tile_size = default_tile_size,
+                               const int& num_threads = 0) {
+    /**
+     * Compute the segment of the condensed distance vector which holds the rows [row_begin, row_end) of the upper
+     * triangle, i.e. the distances of every pair (i, j) with row_begin <= i < row_end and i < j. The segment starts at
+     * `condensed_offset(row_begin, n)` of the full vector and is written to the start of `distance_matrix`.
+     */
+    const auto& n = input_strings.size();
+    if (row_end <= row_begin || row_begin + 1 >= n) return true;
 
-#pragma omp parallel for default(none) shared(n, metric, input_strings, distance_matrix)
-    for (size_t i = 0; i < (n - 1); i++) {
-        for (size_t j = (i + 1); j < n; j++) {
-            const auto& idx = (n * (n - 1)) / 2 - (n - i) * ((n - i) - 1) / 2 + j - i - 1;
-            distance_matrix[idx] = metric.forward(input_strings[i], input_strings[j]);
+    const auto& base = condensed_offset(row_begin, n);
+
+    bool exact = true;
+    auto visit = [&](const size_t& i, const size_t& j_begin, const size_t& j_end) {
+        const auto& offset = condensed_offset(i, n) - base - i - 1;
+        forward_row(metric, input_strings[i], input_strings, j_begin, j_end, [&](const size_t& j, const double& distance) {
+            if (!store_distance(distance_matrix[offset + j], distance)) {
+#pragma omp atomic write
+                exact = false;
+            }
+        });
+    };
+    traverse_pairwise_rows(input_strings, row_begin, row_end, tile_size, resolve_num_threads(num_threads), visit);
+    return exact;
+}
+
+template<typename T, typename O>
+bool cross_distance_computation(T metric,
+                                const string_vector_t& queries,
+                                const string_vector_t& references,
+                                O* distance_matrix,
+                                const size_t& tile_size = default_tile_size,
+                                const int& num_threads = 0) {
+    // the result is a row-major (n x m) matrix, i.e. row `i` holds the distances of query `i` to all references
+    const auto& m = references.size();
+
+    bool exact = true;
+    auto visit = [&](const size_t& i, const size_t& j_begin, const size_t& j_end) {
+        const auto& offset = i * m;
+        forward_row(metric, queries[i], references, j_begin, j_end, [&](const size_t& j, const double& distance) {
+            if (!store_distance(distance_matrix[offset + j], distance)) {
+#pragma omp atomic write
+                exact = false;
+            }
+        });
+    };
+    traverse_cross(queries, references, tile_size, resolve_num_threads(num_threads), visit);
+    return exact;
+}
+
+template<typename T>
+double_vector_t cross_distance_computation(T metric,
+                                           const string_vector_t& queries,
+                                           const string_vector_t& references,
+                                           const size_t& tile_size = default_tile_size,
+                                           const int& num_threads = 0) {
+    auto&& distance_matrix = double_vector_t (queries.size() * references.size());
+
+    cross_distance_computation(metric, queries, references, distance_matrix.data(), tile_size, num_threads);
+    return distance_matrix;
+}
+
+// ----- duplicates ------------------------------------------------------------------------------------------------- //
+template<typename T, typename O>
+bool diagonal_computation(T metric,
+                          const string_vector_t& input_strings,
+                          O* distances,
+                          const int& num_threads = 0) {
+    /**
+     * Compute the distance of every sequence to itself, i.e. the diagonal of the distance matrix, for metrics under
+     * which it is not necessarily 0.
+     *
+     * @return whether all distances were stored exactly
+     */
+    const auto& n = input_strings.size();
+    const auto threads = resolve_num_threads(num_threads);
+
+    bool exact = true;
+#pragma omp parallel for num_threads(threads) schedule(dynamic, 64) default(none) shared(metric, input_strings, n, distances, exact)
+    for (size_t i = 0; i < n; i++) {
+        if (!store_distance(distances[i], metric.forward(input_strings[i], input_strings[i]))) {
+#pragma omp atomic write
+            exact = false;
+        }
+    }
+    return exact;
+}
+
+template<typename O>
+void expand_condensed_computation(const O* unique_distances,
+                                  const index_t* inverse,
+                                  const size_t& n,
+                                  const size_t& n_unique,
+                                  O* distances,
+                                  const int& num_threads = 0,
+                                  const O* diagonal = nullptr) {
+    /**
+     * Expand the condensed distance vector of a set of unique sequences to the condensed distance vector of the `n`
+     * sequences they were drawn from, i.e. copy the distance of each pair of unique sequences to all pairs of their
+     * duplicates. Duplicates of the same sequence are at the distance of the sequence to itself, which is 0 unless a
+     * `diagonal` is given. The distances must be symmetric, as the pair of unique sequences of a pair of duplicates is
+     * not necessarily in the same order.
+     *
+     * @param unique_distances: the condensed distance vector of the unique sequences
+     * @param inverse: the index of the unique sequence of each of the `n` sequences
+     * @param distances: the condensed output vector of the `n` sequences
+     * @param diagonal: optionally, the distance of each unique sequence to itself
+     */
+    const auto threads = resolve_num_threads(num_threads);
+
+#pragma omp parallel for num_threads(threads) schedule(dynamic, 64) default(none) shared(unique_distances, inverse, n, n_unique, distances, diagonal)
+    for (size_t i = 0; i < n; i++) {
+        const auto& a = (size_t) inverse[i];
+        // (modular) offsets, such that `offset + column` indexes the pair (row, column) of the condensed vector
+        const auto& offset = condensed_offset(i, n) - i - 1;
+        const auto& unique_offset = condensed_offset(a, n_unique) - a - 1;
+
+        for (size_t j = i + 1; j < n; j++) {
+            const auto& b = (size_t) inverse[j];
+            if (a < b)
+                distances[offset + j] = unique_distances[unique_offset + b];
+            else if (b < a)
+                distances[offset + j] = unique_distances[condensed_offset(b, n_unique) - b - 1 + a];
+            else
+                distances[offset + j] = diagonal ? diagonal[a] : 0;
         }
     }
-    return distance_matrix;
 }
 
 #endif //SETRIQ_PAIRWISE_DISTANCE_COMPUTATION_H
@@ -0,0 +1,47 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#ifndef SETRIQ_BITS_H
+#define SETRIQ_BITS_H
+
+#include <cstddef>
+#include <cstdint>
+
+#if defined(_MSC_VER) && !defined(__clang__)
+#include <intrin.h>
+#endif
+
+namespace bits {
+    // the bit operations of the bit-parallel kernels. GCC and Clang (and MSVC on x64) map them onto single
+    // instructions where the target has them, other compilers take the portable fallbacks
+
+    inline size_t popcount64(std::uint64_t x) {
+        // the number of set bits of a word
+#if defined(__GNUC__) || defined(__clang__)
+        return (size_t) __builtin_popcountll(x);
+#elif defined(_MSC_VER) && defined(_M_X64)
+        return (size_t) __popcnt64(x);
+#else
+        x = x - ((x >> 1) & 0x5555555555555555ull);
+        x = (x & 0x3333333333333333ull) + ((x >> 2) & 0x3333333333333333ull);
+        x = (x + (x >> 4)) & 0x0f0f0f0f0f0f0f0full;
+        return (size_t) ((x * 0x0101010101010101ull) >> 56);
+#endif
+    }
+
+    inline size_t ctz64(std::uint64_t x) {
+        // the index of the lowest set bit of a word, which must not be 0
+#if defined(__GNUC__) || defined(__clang__)
+        return (size_t) __builtin_ctzll(x);
+#elif defined(_MSC_VER) && (defined(_M_X64) || defined(_M_ARM64))
+        unsigned long index;
+        _BitScanForward64(&index, x);
+        return (size_t) index;
+#else
+        return popcount64((x & (~x + 1)) - 1);
+#endif
+    }
+}
+
+#endif //SETRIQ_BITS_H
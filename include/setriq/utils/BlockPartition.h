@@ -0,0 +1,24 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#ifndef SETRIQ_BLOCKPARTITION_H
+#define SETRIQ_BLOCKPARTITION_H
+
+#include "utils/type_defs.h"
+
+class BlockPartition {
+private:
+    uint_vector_t boundaries_;
+
+public:
+    BlockPartition() : boundaries_{0} {};
+    BlockPartition(const string_vector_t&, const size_t&, const size_t&);
+    BlockPartition(const string_vector_t&, const size_t&, const size_t&, const size_t&, const size_t&);
+
+    size_t size() const { return this->boundaries_.size() - 1; };
+    size_t begin(const size_t& block) const { return this->boundaries_[block]; };
+    size_t end(const size_t& block) const { return this->boundaries_[block + 1]; };
+};
+
+#endif //SETRIQ_BLOCKPARTITION_H
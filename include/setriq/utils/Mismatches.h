@@ -0,0 +1,41 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#ifndef SETRIQ_MISMATCHES_H
+#define SETRIQ_MISMATCHES_H
+
+#include <cstdint>
+#include <cstring>
+#include <string>
+
+#include "utils/Bits.h"
+
+namespace mismatches {
+    // the residues of two strings are compared eight at a time, as the bytes of 64-bit words
+    constexpr size_t word_size = sizeof(std::uint64_t);
+
+    inline std::uint64_t differing_bytes(const char* a, const char* b) {
+        /**
+         * Compare eight residues of two strings at once. A byte of the returned word has its high bit set if, and only
+         * if, the residues at its position differ, and all other bits are 0.
+         */
+        constexpr std::uint64_t low_bits = 0x7f7f7f7f7f7f7f7full;
+        std::uint64_t word_a, word_b;
+        std::memcpy(&word_a, a, word_size);
+        std::memcpy(&word_b, b, word_size);
+        const std::uint64_t x = word_a ^ word_b;
+        return (((x & low_bits) + low_bits) | x) & ~low_bits;
+    }
+
+    inline size_t count(const char* a, const char* b, const size_t& n) {
+        // the number of positions at which two strings of length `n` differ
+        size_t i = 0;
+        size_t count = 0;
+        for (; i + word_size <= n; i += word_size) count += bits::popcount64(differing_bytes(a + i, b + i));
+        for (; i < n; i++) count += a[i] != b[i];
+        return count;
+    }
+}
+
+#endif //SETRIQ_MISMATCHES_H
@@ -0,0 +1,36 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#ifndef SETRIQ_NEARESTNEIGHBORS_H
+#define SETRIQ_NEARESTNEIGHBORS_H
+
+#include <tuple>
+#include <vector>
+
+#include "utils/type_defs.h"
+
+struct Candidate {
+    double distance;
+    index_t index;
+};
+
+inline bool operator<(const Candidate& a, const Candidate& b) {
+    // ties in distance are broken by index, such that the nearest neighbors do not depend on the order of the offers
+    return std::tie(a.distance, a.index) < std::tie(b.distance, b.index);
+}
+
+class NearestNeighbors {
+private:
+    size_t k_;
+    std::vector<Candidate> heaps_;
+    uint_vector_t sizes_;
+
+public:
+    NearestNeighbors(const size_t&, const size_t&);
+
+    void offer(const size_t&, const Candidate&);
+    void write(index_t*, double*);
+};
+
+#endif //SETRIQ_NEARESTNEIGHBORS_H
@@ -0,0 +1,40 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#ifndef SETRIQ_PATTERNMASKS_H
+#define SETRIQ_PATTERNMASKS_H
+
+#include <cstdint>
+#include <string>
+#include <vector>
+
+#include "utils/type_defs.h"
+
+class PatternMasks {
+    /**
+     * The positions at which every character occurs in a pattern string, as bit masks for bit-parallel string
+     * comparisons. Position i of the pattern is bit (i % 64) of word (i / 64) of the mask of its character.
+     */
+private:
+    std::vector<std::uint64_t> masks_;
+    std::string pattern_;
+    size_t words_;
+
+public:
+    static constexpr size_t word_size = 64;
+
+    PatternMasks() : masks_{}, pattern_{}, words_{0} {};
+    explicit PatternMasks(const std::string& pattern) : PatternMasks() { this->assign(pattern.data(), pattern.size()); };
+
+    void assign(const char*, const size_t&);
+
+    const std::string& pattern() const { return this->pattern_; };
+    size_t size() const { return this->pattern_.size(); };
+    size_t words() const { return this->words_; };
+    const std::uint64_t* operator [] (const char& token) const {
+        return &this->masks_[(unsigned char) token * this->words_];
+    };
+};
+
+#endif //SETRIQ_PATTERNMASKS_H
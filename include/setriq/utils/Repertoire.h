@@ -0,0 +1,35 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#ifndef SETRIQ_REPERTOIRE_H
+#define SETRIQ_REPERTOIRE_H
+
+#include <bitset>
+#include <string>
+#include <vector>
+
+#include "utils/type_defs.h"
+
+// a set of residues (bytes), e.g. an alphabet
+typedef std::bitset<256> residue_set_t;
+
+class Repertoire {
+private:
+    string_vector_t sequences_;
+    residue_set_t residues_;
+
+public:
+    Repertoire() : sequences_{}, residues_{} {};
+    explicit Repertoire(string_vector_t);
+
+    size_t size() const { return this->sequences_.size(); };
+    const string_vector_t& sequences() const { return this->sequences_; };
+    const residue_set_t& residues() const { return this->residues_; };
+    bool holds_only(const residue_set_t& alphabet) const { return (this->residues_ & ~alphabet).none(); };
+
+    index_vector_t lengths() const;
+    index_vector_t find_invalid(const std::string &) const;
+};
+
+#endif //SETRIQ_REPERTOIRE_H
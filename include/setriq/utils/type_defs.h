@@ -5,6 +5,8 @@
 #ifndef METRICS_TYPEDEFS_H
 #define METRICS_TYPEDEFS_H
 
+#include <cstddef>
+#include <cstdint>
 #include <string>
 #include <unordered_map>
 #include <vector>
@@ -16,4 +18,8 @@ typedef std::vector<size_t> uint_vector_t;
 typedef std::vector<uint_vector_t> uint_matrix_t;
 typedef std::unordered_map<char, size_t> token_index_map_t;
 
+// signed indices, e.g. to hand over to NumPy/SciPy as index arrays
+typedef std::int64_t index_t;
+typedef std::vector<index_t> index_vector_t;
+
 #endif //METRICS_TYPEDEFS_H
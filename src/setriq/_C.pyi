@@ -1,28 +1,384 @@
-from typing import Dict, List, Sequence
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
+import numpy.typing as npt
+
+# float64 (default), float32, uint16 or uint8
+DistanceArray = npt.NDArray[Any]
+FloatArray = npt.NDArray[np.float64]
+IndexArray = npt.NDArray[np.int64]
+
+class Repertoire:
+    def __init__(self, sequences: Sequence[str]) -> None: ...
+    def __len__(self) -> int: ...
+    def __getitem__(self, i: int) -> str: ...
+    def __iter__(self) -> Iterator[str]: ...
+    @property
+    def lengths(self) -> IndexArray: ...
+    def find_invalid(self, alphabet: str) -> IndexArray: ...
+    def holds_only(self, alphabet: str) -> bool: ...
+
+# a Repertoire is passed to the engine without being converted
+class CdrDistSd:
+    def __init__(
+        self,
+        substitution_matrix: List[List[float]],
+        index: Dict[str, int],
+        gap_opening_penalty: float,
+        gap_extension_penalty: float,
+    ) -> None: ...
+    def __call__(self, a: str, b: str) -> float: ...
+
+Sequences = Union[Sequence[str], Repertoire]
+# a TcrDist component: substitution matrix, index, gap penalty, gap symbol, weight and sequence length
+TcrDistComponent = Tuple[List[List[float]], Dict[str, int], float, str, float, int]
+
+class TcrDistRecords:
+    def __init__(
+        self, records: Sequence[str], components: List[TcrDistComponent]
+    ) -> None: ...
+    def __len__(self) -> int: ...
+
+def effective_num_threads(num_threads: int = ...) -> int: ...
+def expand_condensed(
+    distances: DistanceArray,
+    inverse: IndexArray,
+    out: DistanceArray,
+    num_threads: int = ...,
+    diagonal: Optional[DistanceArray] = ...,
+) -> DistanceArray: ...
+def cdr_dist_diagonal(
+    sequences: Sequences,
+    substitution_matrix: List[List[float]],
+    index: Dict[str, int],
+    gap_opening_penalty: float,
+    gap_extension_penalty: float,
+    out: Optional[DistanceArray] = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
 def cdr_dist(
-    sequences: Sequence[str],
+    sequences: Sequences,
     substitution_matrix: List[List[float]],
     index: Dict[str, int],
     gap_opening_penalty: float,
     gap_extension_penalty: float,
-) -> List[float]: ...
-def levenshtein(sequences: Sequence[str], extra_cost: float) -> List[float]: ...
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
+def levenshtein(
+    sequences: Sequences,
+    extra_cost: float,
+    max_distance: Optional[float] = ...,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
 def tcr_dist_component(
-    sequences: Sequence[str],
+    sequences: Sequences,
     substitution_matrix: List[List[float]],
     index: Dict[str, int],
     gap_penalty: float,
     gap_symbol: str,
     weight: float,
-) -> List[float]: ...
-def hamming(sequences: Sequence[str], mismatch_score: float) -> List[float]: ...
-def jaro(sequences: Sequence[str], jaro_weights: List[float]) -> List[float]: ...
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
+def tcr_dist(
+    records: TcrDistRecords,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
+def hamming(
+    sequences: Sequences,
+    mismatch_score: float,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
+def jaro(
+    sequences: Sequences,
+    jaro_weights: List[float],
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
 def jaro_winkler(
-    sequences: Sequence[str], p: float, max_l: int, jaro_weights: List[float]
-) -> List[float]: ...
-def longest_common_substring(sequences: Sequence[str]) -> List[float]: ...
-def optimal_string_alignment(sequences: Sequence[str]) -> List[float]: ...
+    sequences: Sequences,
+    p: float,
+    max_l: int,
+    jaro_weights: List[float],
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
+def longest_common_substring(
+    sequences: Sequences,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
+def optimal_string_alignment(
+    sequences: Sequences,
+    max_distance: Optional[float] = ...,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+    rows: Optional[Tuple[int, int]] = ...,
+) -> DistanceArray: ...
+def cdr_dist_cross(
+    queries: Sequences,
+    references: Sequences,
+    substitution_matrix: List[List[float]],
+    index: Dict[str, int],
+    gap_opening_penalty: float,
+    gap_extension_penalty: float,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def levenshtein_cross(
+    queries: Sequences,
+    references: Sequences,
+    extra_cost: float,
+    max_distance: Optional[float] = ...,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def tcr_dist_component_cross(
+    queries: Sequences,
+    references: Sequences,
+    substitution_matrix: List[List[float]],
+    index: Dict[str, int],
+    gap_penalty: float,
+    gap_symbol: str,
+    weight: float,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def tcr_dist_cross(
+    queries: Sequences,
+    references: Sequences,
+    components: List[TcrDistComponent],
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def hamming_cross(
+    queries: Sequences,
+    references: Sequences,
+    mismatch_score: float,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def jaro_cross(
+    queries: Sequences,
+    references: Sequences,
+    jaro_weights: List[float],
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def jaro_winkler_cross(
+    queries: Sequences,
+    references: Sequences,
+    p: float,
+    max_l: int,
+    jaro_weights: List[float],
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def longest_common_substring_cross(
+    queries: Sequences,
+    references: Sequences,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def optimal_string_alignment_cross(
+    queries: Sequences,
+    references: Sequences,
+    max_distance: Optional[float] = ...,
+    out: Optional[DistanceArray] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> DistanceArray: ...
+def cdr_dist_radius(
+    sequences: Sequences,
+    substitution_matrix: List[List[float]],
+    index: Dict[str, int],
+    gap_opening_penalty: float,
+    gap_extension_penalty: float,
+    radius: float,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def levenshtein_radius(
+    sequences: Sequences,
+    extra_cost: float,
+    radius: float,
+    max_distance: Optional[float] = ...,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def tcr_dist_component_radius(
+    sequences: Sequences,
+    substitution_matrix: List[List[float]],
+    index: Dict[str, int],
+    gap_penalty: float,
+    gap_symbol: str,
+    weight: float,
+    radius: float,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def tcr_dist_radius(
+    records: Sequences,
+    components: List[TcrDistComponent],
+    radius: float,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def hamming_radius(
+    sequences: Sequences,
+    mismatch_score: float,
+    radius: float,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def jaro_radius(
+    sequences: Sequences,
+    jaro_weights: List[float],
+    radius: float,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def jaro_winkler_radius(
+    sequences: Sequences,
+    p: float,
+    max_l: int,
+    jaro_weights: List[float],
+    radius: float,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def longest_common_substring_radius(
+    sequences: Sequences,
+    radius: float,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def optimal_string_alignment_radius(
+    sequences: Sequences,
+    radius: float,
+    max_distance: Optional[float] = ...,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, IndexArray, FloatArray]: ...
+def cdr_dist_kneighbors(
+    sequences: Sequences,
+    substitution_matrix: List[List[float]],
+    index: Dict[str, int],
+    gap_opening_penalty: float,
+    gap_extension_penalty: float,
+    k: int,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
+def levenshtein_kneighbors(
+    sequences: Sequences,
+    extra_cost: float,
+    k: int,
+    max_distance: Optional[float] = ...,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
+def tcr_dist_component_kneighbors(
+    sequences: Sequences,
+    substitution_matrix: List[List[float]],
+    index: Dict[str, int],
+    gap_penalty: float,
+    gap_symbol: str,
+    weight: float,
+    k: int,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
+def tcr_dist_kneighbors(
+    records: Sequences,
+    components: List[TcrDistComponent],
+    k: int,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
+def hamming_kneighbors(
+    sequences: Sequences,
+    mismatch_score: float,
+    k: int,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
+def jaro_kneighbors(
+    sequences: Sequences,
+    jaro_weights: List[float],
+    k: int,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
+def jaro_winkler_kneighbors(
+    sequences: Sequences,
+    p: float,
+    max_l: int,
+    jaro_weights: List[float],
+    k: int,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
+def longest_common_substring_kneighbors(
+    sequences: Sequences,
+    k: int,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
+def optimal_string_alignment_kneighbors(
+    sequences: Sequences,
+    k: int,
+    max_distance: Optional[float] = ...,
+    references: Optional[Sequences] = ...,
+    tile_size: int = ...,
+    num_threads: int = ...,
+) -> Tuple[IndexArray, FloatArray]: ...
 def cdr_dist_sd(
     a: str,
     b: str,
@@ -31,7 +387,9 @@ def cdr_dist_sd(
     gap_opening_penalty: float,
     gap_extension_penalty: float,
 ) -> float: ...
-def levenshtein_sd(a: str, b: str, extra_cost: float) -> float: ...
+def levenshtein_sd(
+    a: str, b: str, extra_cost: float, max_distance: Optional[float] = ...
+) -> float: ...
 def tcr_dist_component_sd(
     a: str,
     b: str,
@@ -47,4 +405,6 @@ def jaro_winkler_sd(
     a: str, b: str, p: float, max_l: int, jaro_weights: List[float]
 ) -> float: ...
 def longest_common_substring_sd(a: str, b: str) -> float: ...
-def optimal_string_alignment_sd(a: str, b: str) -> float: ...
+def optimal_string_alignment_sd(
+    a: str, b: str, max_distance: Optional[float] = ...
+) -> float: ...
@@ -3,6 +3,10 @@
 //
 
 
+#include <algorithm>
+#include <cmath>
+#include <cstring>
+#include <limits>
 #include <utility>
 
 #include "alignment/SmithWaterman.h"
@@ -16,12 +20,98 @@ SmithWaterman::SmithWaterman(SubstitutionMatrix matrix, const double& gap_openin
      * @param gap_penalty: the penalty for a gap in the alignment
      */
     this->substitution_matrix_ = std::move(matrix);
+    this->build_integer_scores_();
+}
+
+constexpr size_t SmithWaterman::lanes;
+
+// the substitution score of the padding past the end of the shorter sequences of `forward_lanes`, and the bound on the
+// magnitude of the integer scores, such that no sum or difference of two scores overflows an int16
+constexpr std::int16_t padding_score = -(1 << 14);
+
+// the scores of the `lanes` alignments of `forward_lanes`, one int16 per lane. The vector extension of GCC and Clang maps
+// the arithmetic onto the vector instructions of the target, e.g. SSE2 or NEON. Other compilers (e.g. MSVC) take the same
+// steps one lane at a time, which they may still vectorize
+#if defined(__GNUC__) || defined(__clang__)
+typedef std::int16_t score_vector_t __attribute__((vector_size(SmithWaterman::lanes * sizeof(std::int16_t))));
+
+inline score_vector_t max_scores(const score_vector_t& a, const score_vector_t& b) {
+    const score_vector_t mask = a > b;
+    return (a & mask) | (b & ~mask);
+}
+#else
+struct score_vector_t {
+    std::int16_t lane[SmithWaterman::lanes];
+};
+
+inline score_vector_t operator + (const score_vector_t& a, const score_vector_t& b) {
+    score_vector_t out;
+    for (size_t l = 0; l < SmithWaterman::lanes; l++) out.lane[l] = (std::int16_t) (a.lane[l] + b.lane[l]);
+    return out;
+}
+
+inline score_vector_t operator - (const score_vector_t& a, const std::int16_t& b) {
+    score_vector_t out;
+    for (size_t l = 0; l < SmithWaterman::lanes; l++) out.lane[l] = (std::int16_t) (a.lane[l] - b);
+    return out;
+}
+
+inline score_vector_t max_scores(const score_vector_t& a, const score_vector_t& b) {
+    score_vector_t out;
+    for (size_t l = 0; l < SmithWaterman::lanes; l++) out.lane[l] = std::max(a.lane[l], b.lane[l]);
+    return out;
+}
+#endif
+
+inline score_vector_t load_scores(const std::int16_t* scores) {
+    score_vector_t out;
+    std::memcpy(&out, scores, sizeof(out));
+    return out;
+}
+
+inline void store_scores(std::int16_t* scores, const score_vector_t& values) {
+    std::memcpy(scores, &values, sizeof(values));
+}
+
+void SmithWaterman::build_integer_scores_() {
+    /**
+     * Convert the substitution scores and gap penalties to int16, if they are all integers of magnitude at most 2^14.
+     * The row and column of unknown residues are used for padding and get a score which is lower than any alignment
+     * could make up for.
+     */
+    const auto is_small_integer = [](const double& value) {
+        return std::abs(value) <= -(double) padding_score && std::trunc(value) == value;
+    };
+
+    const auto& size = this->substitution_matrix_.size();
+    const auto& table = this->substitution_matrix_.table();
+
+    this->integral_ = size > 1
+        && is_small_integer(this->gap_opening_penalty_) && this->gap_opening_penalty_ >= 0
+        && is_small_integer(this->gap_extension_penalty_) && this->gap_extension_penalty_ >= 0;
+    this->max_substitution_score_ = 0.;
+    this->integer_table_.assign(size * size, padding_score);
+    for (size_t i = 0; this->integral_ && i < size - 1; i++) {
+        for (size_t j = 0; j < size - 1; j++) {
+            const auto& score = table[i * size + j];
+            if (!is_small_integer(score)) {
+                this->integral_ = false;
+                break;
+            }
+            this->integer_table_[i * size + j] = (std::int16_t) score;
+            this->max_substitution_score_ = std::max(this->max_substitution_score_, score);
+        }
+    }
+    this->integer_gap_opening_penalty_ = this->integral_ ? (std::int16_t) this->gap_opening_penalty_ : 0;
+    this->integer_gap_extension_penalty_ = this->integral_ ? (std::int16_t) this->gap_extension_penalty_ : 0;
 }
 
 double SmithWaterman::fill_scoring_matrix_(const std::string &a,
                                            const std::string &b) const {
     /**
-     * Fill the alignment scoring matrix and return the maximal alignment score between two input strings.
+     * Fill the alignment scoring matrix and return the maximal alignment score between two input strings. The affine
+     * gap scores are computed with Gotoh's recurrences, i.e. the best gap ending in a cell extends the best gap ending
+     * in its neighbour or opens a new one, such that each cell takes constant time. Only the previous row is kept.
      *
      * @param a: an input string to be aligned
      * @param b: an input string to be aligned
@@ -29,57 +119,130 @@ double SmithWaterman::fill_scoring_matrix_(const std::string &a,
      */
     const auto& n = a.size();
     const auto& m = b.size();
+    if (n == 0 || m == 0) return 0.;
+
+    constexpr auto minus_infinity = -std::numeric_limits<double>::infinity();
 
-    constexpr auto k_axis = 0ul;
-    constexpr auto l_axis = 1ul;
+    // the rows are reused by all the alignments a thread computes. `scores` holds the scores of the previous row (and
+    // of the current row up to column j), `gap_scores` the scores of the alignments ending in a gap in `b`
+    static thread_local double_vector_t scores;
+    static thread_local double_vector_t gap_scores;
+    scores.assign(m + 1, 0.);
+    gap_scores.assign(m + 1, minus_infinity);
 
     auto* ptr_a = &a.front();
     auto* ptr_b = &b.front();
 
     auto&& max_score = 0.;
-    auto&& scoring_matrix = double_matrix_t (n + 1, double_vector_t (m + 1, 0));
     for (size_t i = 1; i < (n + 1); i++) {
+        // the scores of the residue of `a` are the same along the row
+        const auto* substitution_scores = this->substitution_matrix_.row(*(ptr_a + i - 1));
+
+        // the score of the cell (i - 1, j - 1) and of the best alignment ending in a gap in `a`
+        double diagonal_score = 0.;
+        double row_gap_score = minus_infinity;
         for (size_t j = 1; j < (m + 1); j++) {
-            const auto& _i = i - 1;
-            const auto& _j = j - 1;
+            const auto& substitution_score = substitution_scores[this->substitution_matrix_.code(*(ptr_b + j - 1))];
+            const auto& alignment_score = diagonal_score + substitution_score;
 
-            const auto& alignment_score = scoring_matrix[_i][_j] + this->substitution_matrix_(*(ptr_a + _i), *(ptr_b + _j));
-            const auto& k_gap_score = this->calculate_gap_penalty_(scoring_matrix, i, j, k_axis);
-            const auto& l_gap_score = this->calculate_gap_penalty_(scoring_matrix, j, i, l_axis);
+            gap_scores[j] = std::max(scores[j] - this->gap_opening_penalty_,
+                                     gap_scores[j] - this->gap_extension_penalty_);
+            row_gap_score = std::max(scores[j - 1] - this->gap_opening_penalty_,
+                                     row_gap_score - this->gap_extension_penalty_);
 
-            const auto& current_score = std::max(alignment_score, std::max(k_gap_score, l_gap_score));
+            const double current_score = std::max(std::max(alignment_score, 0.),
+                                                  std::max(gap_scores[j], row_gap_score));
             if (current_score > max_score)
                 max_score = current_score;
 
-            scoring_matrix[i][j] = current_score;
+            diagonal_score = scores[j];
+            scores[j] = current_score;
         }
     }
     return max_score;
 }
 
-double SmithWaterman::calculate_gap_penalty_(const double_matrix_t &scoring_matrix,
-                                             const size_t &max_gap_length,
-                                             const size_t &idx,
-                                             const size_t &axis) const {
+bool SmithWaterman::forward_lanes(const std::string &a,
+                                  const std::string *b,
+                                  const size_t &count,
+                                  double *scores) const {
     /**
-     * Calculate the gap score along a give axis. It has a lower bound of 0 and is linear (non-affine).
+     * Compute the maximal alignment scores of one string against (up to) `lanes` strings at once. Each of the strings
+     * in `b` takes a lane of the int16 score vectors, such that each step of the recurrences of `fill_scoring_matrix_`
+     * is a handful of vector instructions for all of them. The shorter strings are padded to the length of the longest.
+     *
+     * The scores are exact: the alignment is only computed if the substitution scores and gap penalties are integers
+     * and no score can overflow an int16. Otherwise, nothing is computed and the scalar path is to be taken.
      *
-     * @param scoring_matrix: the alignment scoring matrix
-     * @param max_gap_length: the maximum possible gap length
-     * @param idx: the current idx position (row or column)
-     * @param axis: the axis over which to iterate
-     * @return the maximum gap-score
+     * @param a: an input string to be aligned
+     * @param b: the strings to align `a` against
+     * @param count: the number of strings in `b`, at most `lanes`
+     * @param scores: the output, i.e. the maximal alignment score of `a` and each of the strings in `b`
+     * @return whether the scores were computed
      */
-    auto&& max_score = 0.;
-    for (size_t i = 1; i < (max_gap_length + 1); i++) {
-        const auto& k = max_gap_length - i;
-        const auto& elem = axis ? scoring_matrix[idx][k] : scoring_matrix[k][idx];
-        const auto& score = elem - this->gap_opening_penalty_ - ((double)(i - 1) * this->gap_extension_penalty_);
+    if (!this->integral_ || count > lanes) return false;
+
+    const auto& n = a.size();
+    size_t m = 0;
+    for (size_t l = 0; l < count; l++) m = std::max(m, b[l].size());
+
+    // the alignment score is at most the best substitution score for each residue of the shorter string
+    if ((double) std::min(n, m) * this->max_substitution_score_ > (double) std::numeric_limits<std::int16_t>::max())
+        return false;
+
+    const auto& size = this->substitution_matrix_.size();
+    const auto& open = this->integer_gap_opening_penalty_;
+    const auto& extension = this->integer_gap_extension_penalty_;
 
-        if (score > max_score)
-            max_score = score;
+    // the residues of `b` are interleaved, i.e. position j of all the lanes is contiguous. The gap scores start at
+    // -open, which (as all scores are non-negative) is equivalent to -infinity
+    static thread_local std::vector<std::uint16_t> codes;
+    static thread_local std::vector<std::int16_t> row_scores;
+    static thread_local std::vector<std::int16_t> gap_scores;
+    codes.assign(m * lanes, (std::uint16_t) (size - 1));
+    row_scores.assign(m * lanes, 0);
+    gap_scores.assign(m * lanes, (std::int16_t) -open);
+    for (size_t l = 0; l < count; l++) {
+        for (size_t j = 0; j < b[l].size(); j++)
+            codes[j * lanes + l] = (std::uint16_t) this->substitution_matrix_.code(b[l][j]);
     }
-    return max_score;
+
+    const score_vector_t zero {};
+    score_vector_t best = zero;
+    for (size_t i = 0; i < n; i++) {
+        const auto* substitution_scores = &this->integer_table_[this->substitution_matrix_.code(a[i]) * size];
+
+        score_vector_t diagonal_score = zero;
+        score_vector_t left_score = zero;
+        score_vector_t row_gap_score = zero - open;
+        for (size_t j = 0; j < m; j++) {
+            const auto* code = &codes[j * lanes];
+            auto* score = &row_scores[j * lanes];
+            auto* gap_score = &gap_scores[j * lanes];
+
+            std::int16_t substitution_score[lanes];
+            for (size_t l = 0; l < lanes; l++) substitution_score[l] = substitution_scores[code[l]];
+
+            const auto&& up_score = load_scores(score);
+            const auto&& column_gap_score = max_scores(up_score - open, load_scores(gap_score) - extension);
+            row_gap_score = max_scores(left_score - open, row_gap_score - extension);
+
+            const auto&& alignment_score = diagonal_score + load_scores(substitution_score);
+            const auto&& current_score = max_scores(max_scores(alignment_score, zero),
+                                                    max_scores(column_gap_score, row_gap_score));
+            best = max_scores(best, current_score);
+
+            diagonal_score = up_score;
+            left_score = current_score;
+            store_scores(score, current_score);
+            store_scores(gap_score, column_gap_score);
+        }
+    }
+
+    std::int16_t best_scores[lanes];
+    store_scores(best_scores, best);
+    for (size_t l = 0; l < count; l++) scores[l] = (double) best_scores[l];
+    return true;
 }
 
 double SmithWaterman::compute_best_alignment_score_(const std::string &a, const std::string &b) const {
@@ -2,29 +2,37 @@
 // Created by Benjamin Tenmann on 20/11/2021.
 //
 
+#include <algorithm>
+#include <limits>
+#include <stdexcept>
+
 #include "alignment/SubstitutionMatrix.h"
 
+SubstitutionMatrix::SubstitutionMatrix() : SubstitutionMatrix(double_matrix_t {}, token_index_map_t {}) {}
+
 SubstitutionMatrix::SubstitutionMatrix(const double_matrix_t& matrix, const token_index_map_t& index) {
     /**
-     * Initialize a SubstitutionMatrix object.
+     * Initialize a SubstitutionMatrix object. The scores are copied into a dense table, such that a lookup is a single
+     * indexed load rather than two hash map lookups and a nested vector access.
      *
      * @param matrix: the substitution scoring matrix
      * @param index: the token index map
      */
-    this->scoring_matrix_ = matrix;
-    this->token_map_ = index;
-}
+    constexpr auto nan = std::numeric_limits<double>::quiet_NaN();
 
-double SubstitutionMatrix::forward(const char& from, const char& to) const {
-    /**
-     * Retrieve the substitution score for two input characters.
-     *
-     * @param from: the first character in the substitution
-     * @param to: the second character in the substitution
-     * @return the substitution score between two characters
-     */
-    const auto& from_idx = this->token_map_.at(from);
-    const auto& to_idx = this->token_map_.at(to);
+    const auto& n = matrix.size();
+    this->size_ = n + 1;
+    this->codes_.fill((std::uint16_t) n);
+    for (const auto& token : index) {
+        if (token.second >= n)
+            throw std::out_of_range("the index of token '" + std::string(1, token.first) + "' is out of bounds of the "
+                                    "substitution matrix");
+        this->codes_[(unsigned char) token.first] = (std::uint16_t) token.second;
+    }
 
-    return this->scoring_matrix_[from_idx][to_idx];
+    this->table_ = double_vector_t (this->size_ * this->size_, nan);
+    for (size_t i = 0; i < n; i++) {
+        for (size_t j = 0; j < std::min(n, matrix[i].size()); j++)
+            this->table_[i * this->size_ + j] = matrix[i][j];
+    }
 }
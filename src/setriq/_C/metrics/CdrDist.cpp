@@ -37,8 +37,48 @@ double metric::CdrDist::forward(const std::string &a, const std::string &b) cons
 
     // when a == b in SW, the best score collapses down to a simple arithmetic sum over all the amino acid positions
     // this gives a significant speed bump
-    const auto& aa_score = this->algorithm_.identity_score(a);
-    const auto& bb_score = this->algorithm_.identity_score(b);
+    const auto& aa_score = this->identity_score(a);
+    const auto& bb_score = this->identity_score(b);
 
     return 1 - std::sqrt((ab_score * ab_score) / (aa_score * bb_score));
 }
+
+void metric::CdrDist::forward_lanes(const std::string &a,
+                                    const std::string *b,
+                                    const size_t &count,
+                                    double *distances) const {
+    /**
+     * Compute the CdrDist metric between an input string and (up to) `SmithWaterman::lanes` strings at once. The
+     * alignments share the vector registers if the scores are integers, otherwise they are computed one by one.
+     *
+     * @param a: on input string to be compared
+     * @param b: the strings to compare `a` against
+     * @param count: the number of strings in `b`
+     * @param distances: the output, i.e. the CdrDist metric between `a` and each of the strings in `b`
+     */
+    if (!this->algorithm_.forward_lanes(a, b, count, distances)) {
+        for (size_t l = 0; l < count; l++) distances[l] = this->forward(a, b[l]);
+        return;
+    }
+
+    const auto& aa_score = this->identity_score(a);
+    for (size_t l = 0; l < count; l++) {
+        const auto& ab_score = distances[l];
+        const auto& bb_score = this->identity_score(b[l]);
+        distances[l] = 1 - std::sqrt((ab_score * ab_score) / (aa_score * bb_score));
+    }
+}
+
+void metric::CdrDist::cache_identity_scores(const string_vector_t &sequences) {
+    /**
+     * Compute the identity scores of a set of sequences once, rather than for every pair a sequence is part of. The
+     * cache refers to the sequences by their address, i.e. `sequences` must outlive the use of the metric on them.
+     *
+     * @param sequences: the sequences the metric is about to be applied to
+     */
+    if (sequences.empty()) return;
+
+    auto&& scores = double_vector_t (sequences.size());
+    for (size_t i = 0; i < sequences.size(); i++) scores[i] = this->algorithm_.identity_score(sequences[i]);
+    this->identity_scores_.push_back({sequences.data(), sequences.data() + sequences.size(), std::move(scores)});
+}
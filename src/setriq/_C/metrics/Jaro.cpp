@@ -2,80 +2,171 @@
 // Created by Benjamin Tenmann on 05/03/2022.
 //
 
-#include <cmath>
+#include <cstdint>
+#include <vector>
+
 #include "metrics/Jaro.h"
+#include "utils/Bits.h"
+#include "utils/PatternMasks.h"
+
+namespace {
+    constexpr size_t word_size = PatternMasks::word_size;
 
-#define either_zero(x, y) (x == 0) || (y == 0)
-#define max(x, y) x > y ? x : y
-#define min(x, y) x > y ? y : x
+    inline std::uint64_t window(const size_t& left, const size_t& right) {
+        // the mask of bits [left, right) of a word, for left < right <= 64
+        return (~std::uint64_t {0} << left) & (~std::uint64_t {0} >> (word_size - right));
+    }
 
+    size_t count_unordered(const std::string& a, const std::uint64_t* flags_a, const size_t& words_a,
+                           const std::string& b, const std::uint64_t* flags_b) {
+        /**
+         * Count the matched characters which are out of order, by walking the set bits of the match flags of both
+         * strings in step: the k-th matched character of `a` is compared with the k-th matched character of `b`.
+         */
+        size_t count = 0;
+        size_t w_b = 0;
+        std::uint64_t word_b = flags_b[0];
+        for (size_t w_a = 0; w_a < words_a; w_a++) {
+            for (std::uint64_t word_a = flags_a[w_a]; word_a; word_a &= word_a - 1) {
+                while (!word_b) word_b = flags_b[++w_b];
 
-void collapse_into_match_str(const std::string& sequence, const std::vector<size_t>& matches_idx, char* match_str) {
-    auto&& j = 0ul;
-    for (const auto& idx : matches_idx) {
-        if (idx){
-            match_str[j] = sequence[idx - 1];
-            j++;
+                const size_t i = w_a * word_size + bits::ctz64(word_a);
+                const size_t j = w_b * word_size + bits::ctz64(word_b);
+                count += a[i] != b[j];
+                word_b &= word_b - 1;
+            }
         }
+        return count;
     }
 }
 
-double metric::Jaro::forward(const std::string &a, const std::string &b) const {
-    /*!
-     * Compute the Jaro distance between two input strings.
-     * Adapted from https://github.com/markvanderloo/stringdist/blob/master/pkg/src/jaro.c
+JaroMatches metric::Jaro::match(const PatternMasks &a, const std::string &b, const size_t &max_prefix) const {
+    /**
+     * Match the characters of two input strings: every character of `b` is matched to the first unmatched equal
+     * character of `a` within the match window, which yields the same matches as matching the characters of `a` to
+     * those of `b`. The matched positions are kept as bit flags, and the candidates for a character are found with the
+     * bit masks of the positions of the characters of `a`, such that a character is matched in a few word operations
+     * rather than a scan over the window. The common prefix (up to `max_prefix` characters) is measured in the same pass.
+     *
+     * @param a: the pattern masks of an input string to be compared
+     * @param b: an input string to be compared
+     * @param max_prefix: the maximum length of the common prefix to measure
+     * @return the number of matches, the number of unordered matches and the length of the common prefix
+     */
+    JaroMatches result {};
+    const std::string& pattern = a.pattern();
+    const size_t s_i = pattern.size();
+    const size_t s_j = b.size();
+    const size_t max_len = s_i > s_j ? s_i : s_j;
+    if (s_i == 0 || s_j == 0 || max_len < 2)
+        return result;
+
+    const size_t max_match_distance = max_len / 2 - 1;
+    if (max_len <= word_size) {
+        // both strings fit into a single word, so the flags are kept in registers
+        std::uint64_t flags_a = 0;
+        std::uint64_t flags_b = 0;
+        for (size_t j = 0; j < s_j; j++) {
+            const size_t left = j > max_match_distance ? j - max_match_distance : 0;
+            const size_t right = j + max_match_distance + 1 < s_i ? j + max_match_distance + 1 : s_i;
+            if (left >= right)
+                break;
+
+            if (j < max_prefix && result.prefix == j && j < s_i && pattern[j] == b[j])
+                result.prefix++;
+
+            // whether a character is matched is hard to predict, so the flags are updated without branching
+            const std::uint64_t candidates = a[b[j]][0] & ~flags_a & window(left, right);
+            flags_a |= candidates & (~candidates + 1);
+            flags_b |= (std::uint64_t) (candidates != 0) << j;
+        }
+        result.matches = bits::popcount64(flags_b);
+        if (result.matches)
+            result.unordered = count_unordered(b, &flags_b, 1, pattern, &flags_a);
+        return result;
+    }
+
+    const size_t words_b = (s_j + word_size - 1) / word_size;
+    thread_local std::vector<std::uint64_t> flags_a {};
+    thread_local std::vector<std::uint64_t> flags_b {};
+    flags_a.assign(a.words(), 0);
+    flags_b.assign(words_b, 0);
+
+    for (size_t j = 0; j < s_j; j++) {
+        const size_t left = j > max_match_distance ? j - max_match_distance : 0;
+        const size_t right = j + max_match_distance + 1 < s_i ? j + max_match_distance + 1 : s_i;
+        if (left >= right)
+            break;
+
+        if (j < max_prefix && result.prefix == j && j < s_i && pattern[j] == b[j])
+            result.prefix++;
+
+        const std::uint64_t* mask = a[b[j]];
+        for (size_t w = left / word_size; w <= (right - 1) / word_size; w++) {
+            const size_t lo = w == left / word_size ? left % word_size : 0;
+            const size_t hi = w == (right - 1) / word_size ? (right - 1) % word_size + 1 : word_size;
+            const std::uint64_t candidates = mask[w] & ~flags_a[w] & window(lo, hi);
+            if (candidates) {
+                flags_a[w] |= candidates & (~candidates + 1);
+                flags_b[j / word_size] |= std::uint64_t {1} << (j % word_size);
+                result.matches++;
+                break;
+            }
+        }
+    }
+    if (result.matches)
+        result.unordered = count_unordered(b, flags_b.data(), words_b, pattern, flags_a.data());
+    return result;
+}
+
+double metric::Jaro::distance(const std::string &a, const std::string &b, const JaroMatches &matches) const {
+    /**
+     * Compute the Jaro distance between two input strings from the outcome of their matching.
      *
      * @param a: an input string to be compared
      * @param b: an input string to be compared
+     * @param matches: the outcome of `match(a, b)`
      */
     const auto& s_i = a.size();
     const auto& s_j = b.size();
-    if (either_zero(s_i, s_j))
+    if ((s_i == 0) || (s_j == 0))
         // if one of the strings is of length 0 and the other isn't, then the distance is maximal (1)
         // if both are length 0, then the distance is minimal, i.e. 0
         return (double) ((s_i > 0) || (s_j > 0));
 
-    const auto& max_len = s_i > s_j ? s_i : s_j;
-    const auto& max_match_distance = (int) std::floor(max_len / 2) - 1;
-    if (max_match_distance < 0)
-        // catch the case when both strings are of length == 1
+    if ((s_i == 1) && (s_j == 1))
+        // catch the case when both strings are of length == 1, whose match window is empty
         return a[0] == b[0] ? 0.0 : 1.0;
 
-    auto&& matches_s_i = std::vector<size_t>(s_i, 0);
-    auto&& matches_s_j = std::vector<size_t>(s_j, 0);
-
-    auto&& n_matches = 0ul;
-    for (auto i = 0; i < s_i; i++) {
-        const auto& left = max((i - max_match_distance), 0);
-        const auto& right = min((i + max_match_distance) + 1, s_j);
-        // can we collapse this in some way?
-        for (auto j = left; j < right; j++) {
-            if ((a[i] == b[j]) && (matches_s_j[j] == 0)) {
-                n_matches++;
-                matches_s_i[i] = i + 1;
-                matches_s_j[j] = j + 1;
-                break;
-            }
-        }
-    }
-    if (n_matches == 0)
+    if (matches.matches == 0)
         return 1.0;
 
-    char *match_str_i = new char[n_matches];
-    char *match_str_j = new char[n_matches];
-
-    collapse_into_match_str(a, matches_s_i, match_str_i);
-    collapse_into_match_str(b, matches_s_j, match_str_j);
-
-    auto&& t = 0.0;
-    for (auto k = 0ul; k < n_matches; k++) {
-        if (match_str_i[k] != match_str_j[k])
-            t += 0.5;
-    }
-    delete []match_str_i;
-    delete []match_str_j;
-
-    const auto& m = (double) n_matches;
+    const auto m = (double) matches.matches;
+    const auto t = 0.5 * (double) matches.unordered;
     // allow arbitrary weighting
     return 1 - (this->weights_[0] * (m / s_i) + this->weights_[1] * (m / s_j) + this->weights_[2] * ((m - t) / m));
 }
+
+double metric::Jaro::forward(const std::string &a, const std::string &b) const {
+    /*!
+     * Compute the Jaro distance between two input strings.
+     * Adapted from https://github.com/markvanderloo/stringdist/blob/master/pkg/src/jaro.c
+     *
+     * @param a: an input string to be compared
+     * @param b: an input string to be compared
+     */
+    // the masks are reused across calls, such that only the masks of the previous string need clearing
+    thread_local PatternMasks masks {};
+    masks.assign(a.data(), a.size());
+    return this->forward(masks, b);
+}
+
+double metric::Jaro::forward(const PatternMasks &a, const std::string &b) const {
+    /**
+     * Compute the Jaro distance between two input strings, one of which is given by its pattern masks.
+     *
+     * @param a: the pattern masks of an input string to be compared
+     * @param b: an input string to be compared
+     */
+    return this->distance(a.pattern(), b, this->match(a, b));
+}
@@ -4,12 +4,6 @@
 
 #include "metrics/JaroWinkler.h"
 
-size_t min_sequence_len(const std::string& a, const std::string& b) {
-    const auto& length_a = a.size();
-    const auto& length_b = b.size();
-    return length_a < length_b ? length_a : length_b;
-}
-
 double metric::JaroWinkler::forward(const std::string &a, const std::string &b) const {
     /*!
      * Compute the Jaro-Winkler distance between two input strings.
@@ -17,11 +11,20 @@ double metric::JaroWinkler::forward(const std::string &a, const std::string &b)
      * @param a: an input string to be compared
      * @param b: an input string to be compared
      */
-    const auto& jaro_distance = this->jaro_.forward(a, b);
-    const auto& min_length = min_sequence_len(a, b);
+    thread_local PatternMasks masks {};
+    masks.assign(a.data(), a.size());
+    return this->forward(masks, b);
+}
 
-    auto&& l = 0ul;
-    while ((a[l] == b[l]) && (l < min_length) && (l < this->max_l_))
-        l++;
-    return jaro_distance * (1 - l * this->p_);
+double metric::JaroWinkler::forward(const PatternMasks &a, const std::string &b) const {
+    /**
+     * Compute the Jaro-Winkler distance between two input strings, one of which is given by its pattern masks. The
+     * common prefix is measured in the same pass as the matching of the Jaro distance.
+     *
+     * @param a: the pattern masks of an input string to be compared
+     * @param b: an input string to be compared
+     */
+    const auto matches = this->jaro_.match(a, b, this->max_l_);
+    const auto& jaro_distance = this->jaro_.distance(a.pattern(), b, matches);
+    return jaro_distance * (1 - matches.prefix * this->p_);
 }
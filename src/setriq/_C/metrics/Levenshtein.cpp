@@ -2,16 +2,105 @@
 // Created by Benjamin Tenmann on 05/12/2021.
 //
 
-#include <cstring>
+#include <algorithm>
+#include <cstddef>
+#include <cstdint>
+#include <limits>
 #include <numeric>
+#include <utility>
 #include <vector>
 
 #include "metrics/Levenshtein.h"
 
+namespace {
+    size_t myers_distance(const PatternMasks& pattern, const char* text, const size_t& length, const size_t& limit) {
+        /**
+         * The unit-cost Levenshtein distance of a pattern of at most 64 characters to a text, by Myers' bit-parallel
+         * algorithm in the formulation of Hyyrö. The vertical deltas of a column of the dynamic programme are held in
+         * the bits of `vp` (+1) and `vn` (-1), and the distance is tracked in the last row. As every remaining character
+         * of the text lowers it by at most 1, the computation stops with `limit + 1` once it cannot end up within
+         * `limit`.
+         */
+        const std::uint64_t last = std::uint64_t {1} << (pattern.size() - 1);
+        std::uint64_t vp = ~std::uint64_t {0};
+        std::uint64_t vn = 0;
+        size_t distance = pattern.size();
+
+        for (size_t j = 0; j < length; j++) {
+            const std::uint64_t x = pattern[text[j]][0] | vn;
+            const std::uint64_t d0 = (((x & vp) + vp) ^ vp) | x;
+            std::uint64_t hp = vn | ~(d0 | vp);
+            std::uint64_t hn = vp & d0;
+
+            distance += (hp & last) != 0;
+            distance -= (hn & last) != 0;
+            if (distance > limit + (length - j - 1)) return limit + 1;
+
+            hp = (hp << 1) | 1;
+            hn = hn << 1;
+            vp = hn | ~(d0 | hp);
+            vn = hp & d0;
+        }
+
+        return distance;
+    }
+
+    size_t myers_block_distance(const PatternMasks& pattern,
+                                const char* text,
+                                const size_t& length,
+                                const size_t& limit) {
+        /**
+         * The multi-word variant of `myers_distance` for patterns of more than 64 characters. The horizontal deltas at
+         * the boundary of two words are carried from the lower word into the higher one.
+         */
+        const size_t words = pattern.words();
+        const std::uint64_t last = std::uint64_t {1} << ((pattern.size() - 1) % PatternMasks::word_size);
+        std::vector<std::uint64_t> vp (words, ~std::uint64_t {0});
+        std::vector<std::uint64_t> vn (words, 0);
+        size_t distance = pattern.size();
+
+        for (size_t j = 0; j < length; j++) {
+            const std::uint64_t* masks = pattern[text[j]];
+            std::uint64_t hp_carry = 1;
+            std::uint64_t hn_carry = 0;
+
+            for (size_t w = 0; w < words; w++) {
+                const std::uint64_t x = masks[w] | hn_carry;
+                const std::uint64_t d0 = (((x & vp[w]) + vp[w]) ^ vp[w]) | x | vn[w];
+                std::uint64_t hp = vn[w] | ~(d0 | vp[w]);
+                std::uint64_t hn = vp[w] & d0;
+
+                const std::uint64_t hp_carry_in = hp_carry;
+                const std::uint64_t hn_carry_in = hn_carry;
+                if (w + 1 < words) {
+                    hp_carry = hp >> (PatternMasks::word_size - 1);
+                    hn_carry = hn >> (PatternMasks::word_size - 1);
+                } else {
+                    hp_carry = (hp & last) != 0;
+                    hn_carry = (hn & last) != 0;
+                }
+
+                hp = (hp << 1) | hp_carry_in;
+                hn = (hn << 1) | hn_carry_in;
+                vp[w] = hn | ~(d0 | hp);
+                vn[w] = hp & d0;
+            }
+
+            distance += hp_carry;
+            distance -= hn_carry;
+            if (distance > limit + (length - j - 1)) return limit + 1;
+        }
+
+        return distance;
+    }
+}
+
 double metric::Levenshtein::forward(const std::string &a, const std::string &b) const {
     /**
-     * Compute the Levenshtein distance between two input strings. This is a C++ refactor of the `python-Levenshtein`
-     * implementation (https://github.com/ztane/python-Levenshtein).
+     * Compute the Levenshtein distance between two input strings. Insertions and deletions cost 1, substitutions cost
+     * 1 + `extra_cost`. Common prefixes and suffixes are stripped before the (two-row) dynamic programme, as in the
+     * `python-Levenshtein` implementation (https://github.com/ztane/python-Levenshtein). Distances above
+     * `max_distance` are reported as `max_distance + 1`, and the computation stops once it is bound to exceed it.
      *
      * @param a: an input string to be compared
      * @param b: an input string to be compared
@@ -19,14 +108,9 @@ double metric::Levenshtein::forward(const std::string &a, const std::string &b)
      */
     size_t length_of_a {a.size()};
     size_t length_of_b {b.size()};
-    size_t half_of_length_a;
 
-    const char* ptr_to_a = &a.front();
-    const char* ptr_to_b = &b.front();
-
-    // catch the trivial cases
-    if (a.empty()) return length_of_b;
-    if (b.empty()) return length_of_a;
+    const char* ptr_to_a = a.data();
+    const char* ptr_to_b = b.data();
 
     // grind down common prefix
     while (length_of_a > 0 && length_of_b > 0 && (*ptr_to_a) == (*ptr_to_b)) {
@@ -42,133 +126,77 @@ double metric::Levenshtein::forward(const std::string &a, const std::string &b)
         length_of_b--;
     }
 
-    // again, catch trivial cases
-    if (length_of_a == 0) return length_of_b;
-    if (length_of_b == 0) return length_of_a;
-
-    if (length_of_a > length_of_b) {  // enforce that b is the longer string
-        size_t temporary_length_store = length_of_a;
-        const char *temporary_ptr_store = ptr_to_a;
-        length_of_a = length_of_b;
-        length_of_b = temporary_length_store;
-        ptr_to_a = ptr_to_b;
-        ptr_to_b = temporary_ptr_store;
-    }
-
-    if (length_of_a == 1) {
-        if (this->extra_cost_ > 0)
-            return (double) length_of_b + 1 - this->extra_cost_ * (memchr(ptr_to_b, *ptr_to_a, length_of_b) != nullptr);
-        else
-            return (double) length_of_b - (memchr(ptr_to_b, *ptr_to_a, length_of_b) != nullptr);
-    }
-    length_of_a++;
-    length_of_b++;
-    half_of_length_a = length_of_a >> 1;
-
-    // first row initialization
-    std::vector<size_t> row (length_of_b);
-    std::iota(row.begin(), row.end() - (this->extra_cost_ > 0 ? 0 : half_of_length_a), 0);
-
-    size_t row_index;
-    size_t *end = &row.back() - length_of_b - 1;
-
-    if (this->extra_cost_ > 0) {
-        for (row_index = 1; row_index < length_of_a; row_index++) {
-            size_t *ptr_to_row_element = &row[1];
-            const char current_char_from_a = ptr_to_a[row_index - 1];
-            const char *ptr_to_current_char_from_b = ptr_to_b;
-
-            size_t row_index_copy_1 = row_index;
-            size_t row_index_copy_2 = row_index;
-            while (ptr_to_row_element <= end) {
-                if (current_char_from_a == *(ptr_to_current_char_from_b++))
-                    row_index_copy_2 = --row_index_copy_1;
-                else
-                    row_index_copy_2++;
-
-                row_index_copy_1 = *ptr_to_row_element;
-                row_index_copy_1++;
-
-                if (row_index_copy_2 > row_index_copy_1)
-                    row_index_copy_2 = row_index_copy_1;
-
-                *(ptr_to_row_element++) = row_index_copy_2;
-            }
+    // catch the trivial cases
+    if (length_of_a == 0) return this->bound_((double) length_of_b);
+    if (length_of_b == 0) return this->bound_((double) length_of_a);
+
+    // the distance is at least the difference in length, which is how many cells the band spans off the diagonal
+    const size_t difference = length_of_a > length_of_b ? length_of_a - length_of_b : length_of_b - length_of_a;
+    if ((double) difference > this->max_distance_) return this->max_distance_ + 1;
+    const size_t band = this->limit_(std::max(length_of_a, length_of_b));
+
+    if (this->bit_parallel()) {
+        // the shorter string is the pattern, such that it takes as few words as possible
+        if (length_of_a > length_of_b) {
+            std::swap(ptr_to_a, ptr_to_b);
+            std::swap(length_of_a, length_of_b);
         }
+
+        thread_local PatternMasks masks {};
+        masks.assign(ptr_to_a, length_of_a);
+        return this->bound_((double) (masks.words() == 1 ? myers_distance(masks, ptr_to_b, length_of_b, band)
+                                                         : myers_block_distance(masks, ptr_to_b, length_of_b, band)));
     }
 
-    else {
-        /*
-         *
-         * in this case we don't have to scan two corner triangles (of size len1/2)
-         * in the matrix because no best path can go through them. note this
-         * breaks when length_of_a == length_of_b == 2 so the `memchr()` special case above is
-         * necessary
-         *
-         */
-        row[0] = length_of_a - half_of_length_a - 1;
-        for (row_index = 1; row_index < length_of_a; row_index++) {
-            size_t *ptr_to_row_element;
-            const char current_char_from_a = ptr_to_a[row_index - 1];
-            const char *ptr_to_current_char_from_b;
-
-            size_t row_index_copy_1, row_index_copy_2;
-            /* skip the upper triangle */
-            if (row_index >= length_of_a - half_of_length_a) {
-                size_t offset = row_index - (length_of_a - half_of_length_a);
-                size_t row_index_copy_3;
-
-                ptr_to_current_char_from_b = ptr_to_b + offset;
-                ptr_to_row_element = &row[offset];
-
-                row_index_copy_3 = *(ptr_to_row_element++) + (current_char_from_a != *(ptr_to_current_char_from_b++));
-                row_index_copy_2 = *ptr_to_row_element;
-                row_index_copy_2++;
-
-                row_index_copy_1 = row_index_copy_2;
-                if (row_index_copy_2 > row_index_copy_3)
-                    row_index_copy_2 = row_index_copy_3;
-
-                *(ptr_to_row_element++) = row_index_copy_2;
-            }
-            else {
-                ptr_to_row_element = &row[1];
-                ptr_to_current_char_from_b = ptr_to_b;
-                row_index_copy_1 = row_index_copy_2 = row_index;
-            }
+    const double substitution_cost = 1. + this->extra_cost_;
+    constexpr double unreachable = std::numeric_limits<double>::infinity();
 
-            /* skip the lower triangle */
-            if (row_index <= half_of_length_a + 1)
-                end = &row[length_of_b + row_index - half_of_length_a - 2];
+    // the previous row of the dynamic programme, which is overwritten by the current row as it is computed. Only the
+    // cells within `band` of the diagonal are computed (Ukkonen), as the distance of any path through the others is
+    // above `max_distance`.
+    std::vector<double> row (length_of_b + 1, unreachable);
+    std::iota(row.begin(), row.begin() + (std::ptrdiff_t) std::min(length_of_b, band) + 1, 0.);
 
-            /* main */
-            while (ptr_to_row_element <= end) {
-                size_t row_index_copy_3 = --row_index_copy_2 + (current_char_from_a != *(ptr_to_current_char_from_b++));
-                row_index_copy_1++;
+    for (size_t i = 1; i <= length_of_a; i++) {
+        const size_t begin = i > band ? i - band : 1;
+        const size_t end = std::min(length_of_b, i + band);
 
-                if (row_index_copy_1 > row_index_copy_3)
-                    row_index_copy_1 = row_index_copy_3;
+        double diagonal = row[begin - 1];
+        row[begin - 1] = begin == 1 && i <= band ? (double) i : unreachable;
+        double minimum = row[begin - 1];
 
-                row_index_copy_2 = *ptr_to_row_element;
-                row_index_copy_2++;
+        for (size_t j = begin; j <= end; j++) {
+            const double above = row[j];
+            const double substitution = diagonal + (ptr_to_a[i - 1] == ptr_to_b[j - 1] ? 0. : substitution_cost);
 
-                if (row_index_copy_1 > row_index_copy_2)
-                    row_index_copy_1 = row_index_copy_2;
-                *(ptr_to_row_element++) = row_index_copy_1;
-            }
+            row[j] = std::min(std::min(above, row[j - 1]) + 1., substitution);
+            diagonal = above;
+            minimum = std::min(minimum, row[j]);
+        }
+
+        // the distances do not decrease along the paths through the rows, so this row bounds the final distance
+        if (minimum > this->max_distance_) return this->max_distance_ + 1;
+    }
 
-            /* lower triangle sentinel */
-            if (row_index <= half_of_length_a) {
-                size_t row_index_copy_3 = --row_index_copy_1 + (current_char_from_a != (*ptr_to_current_char_from_b));
+    return this->bound_(row[length_of_b]);
+}
 
-                row_index_copy_2++;
-                if (row_index_copy_2 > row_index_copy_3)
-                    row_index_copy_2 = row_index_copy_3;
+double metric::Levenshtein::forward(const PatternMasks &a, const std::string &b) const {
+    /**
+     * Compute the unit-cost Levenshtein distance between a string, given by its pattern masks, and another string. It
+     * is the distance `forward` computes if `extra_cost` is 0, and is meant for comparing one string to many others.
+     *
+     * @param a: the pattern masks of an input string
+     * @param b: an input string to be compared
+     * @return the Levenshtein distance between the two input strings
+     */
+    if (a.size() == 0) return this->bound_((double) b.size());
+    if (b.empty()) return this->bound_((double) a.size());
 
-                *ptr_to_row_element = row_index_copy_2;
-            }
-        }
-    }
+    const size_t difference = a.size() > b.size() ? a.size() - b.size() : b.size() - a.size();
+    if ((double) difference > this->max_distance_) return this->max_distance_ + 1;
 
-    return (double) *end;
+    const size_t limit = this->limit_(std::max(a.size(), b.size()));
+    return this->bound_((double) (a.words() == 1 ? myers_distance(a, b.data(), b.size(), limit)
+                                                 : myers_block_distance(a, b.data(), b.size(), limit)));
 }
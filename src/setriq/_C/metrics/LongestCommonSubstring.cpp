@@ -2,39 +2,82 @@
 // Created by Benjamin Tenmann on 10/06/2022.
 //
 
+#include <cstdint>
+#include <vector>
+
 #include "metrics/LongestCommonSubstring.h"
+#include "utils/Bits.h"
+
+namespace {
+    size_t lcs_length(const PatternMasks& pattern, const char* text, const size_t& length) {
+        /**
+         * The length of the longest common subsequence of a pattern and a text, by the bit-parallel algorithm of
+         * Allison and Dix in the formulation of Hyyrö. The zero bits of `v` mark the pattern positions which are matched
+         * in a longest common subsequence of the pattern and the text read so far. The words of multi-word patterns are
+         * chained by the carry of the addition.
+         */
+        const size_t words = pattern.words();
+        if (words == 1) {
+            std::uint64_t v = ~std::uint64_t {0};
+            for (size_t j = 0; j < length; j++) {
+                const std::uint64_t u = v & pattern[text[j]][0];
+                v = (v + u) | (v - u);
+            }
+            const std::uint64_t used = ~std::uint64_t {0} >> (PatternMasks::word_size - pattern.size());
+            return bits::popcount64(~v & used);
+        }
+
+        std::vector<std::uint64_t> v (words, ~std::uint64_t {0});
+        for (size_t j = 0; j < length; j++) {
+            const std::uint64_t* masks = pattern[text[j]];
+            std::uint64_t carry = 0;
+            for (size_t w = 0; w < words; w++) {
+                const std::uint64_t u = v[w] & masks[w];
+                const std::uint64_t sum = v[w] + u;
+                const std::uint64_t x = sum + carry;
+                carry = (sum < v[w]) | (x < sum);
+                v[w] = x | (v[w] - u);
+            }
+        }
 
+        // the bits past the end of the pattern in the last word are not counted
+        v[words - 1] |= ~(~std::uint64_t {0} >> (words * PatternMasks::word_size - pattern.size()));
 
-inline size_t min(const size_t& x, const size_t& y) {
-    return x > y ? y : x;
+        size_t count = 0;
+        for (size_t w = 0; w < words; w++) count += bits::popcount64(~v[w]);
+        return count;
+    }
 }
 
+double metric::LongestCommonSubstring::forward(const std::string &a, const std::string &b) const {
+    /**
+     * Compute the number of insertions and deletions which turn one input string into the other, i.e. the sum of
+     * their lengths minus twice the length of their longest common subsequence.
+     *
+     * @param a: an input string to be compared
+     * @param b: an input string to be compared
+     * @return the distance between the two input strings
+     */
+    // the shorter string is the pattern, such that it takes as few words as possible
+    const auto& pattern = a.size() <= b.size() ? a : b;
+    const auto& text = a.size() <= b.size() ? b : a;
 
-double metric::LongestCommonSubstring::forward(const std::string &a, const std::string &b) {
-    const auto& len_a = a.size();
-    const auto& len_b = b.size();
+    thread_local PatternMasks masks {};
+    masks.assign(pattern.data(), pattern.size());
+    return this->forward(masks, text);
+}
 
-    // catch the trivial cases
-    if (!len_a) return (double) len_b;
-    if (!len_b) return (double) len_a;
+double metric::LongestCommonSubstring::forward(const PatternMasks &a, const std::string &b) const {
+    /**
+     * Compute the distance between a string, given by its pattern masks, and another string. It is meant for comparing
+     * one string to many others.
+     *
+     * @param a: the pattern masks of an input string
+     * @param b: an input string to be compared
+     * @return the distance between the two input strings
+     */
+    if (a.size() == 0) return (double) b.size();
+    if (b.empty()) return (double) a.size();
 
-    auto&& score_matrix = uint_matrix_t (len_a + 1, uint_vector_t(len_b + 1, 0));
-    for (auto i = 0ul; i <= len_a; i++) {
-        for (auto j = 0ul; j <= len_b; j++) {
-            if ((!i) || (!j)){
-                score_matrix[i][j] = (i + j);
-                continue;
-            }
-            if (a[i - 1] == b[j - 1]) {
-                score_matrix[i][j] = score_matrix[i - 1][j - 1];
-            }
-            else {
-                score_matrix[i][j] = min(
-                        score_matrix[i - 1][j] + 1,
-                        score_matrix[i][j - 1] + 1
-                        );
-            }
-        }
-    }
-    return (double) score_matrix[len_a][len_b];
+    return (double) (a.size() + b.size() - 2 * lcs_length(a, b.data(), b.size()));
 }
@@ -2,43 +2,71 @@
 // Created by Benjamin Tenmann on 10/06/2022.
 //
 
-#include "metrics/OptimalStringAlignment.h"
+#include <algorithm>
 
-inline size_t min(const size_t& deletion, const size_t& insertion, const size_t& substitution) {
-    if ((deletion < insertion) && (deletion < substitution))
-        return deletion;
-    else if ((insertion < deletion) && (insertion < substitution))
-        return insertion;
-    return substitution;
-}
+#include "metrics/OptimalStringAlignment.h"
 
-double metric::OptimalStringAlignment::forward(const std::string &a, const std::string &b) {
+double metric::OptimalStringAlignment::forward(const std::string &a, const std::string &b) const {
+    /**
+     * Compute the optimal string alignment distance between two input strings, i.e. the Levenshtein distance where
+     * transpositions of adjacent characters cost 1 as well, and no substring is edited more than once. Distances above
+     * `max_distance` are reported as `max_distance + 1`, and only the cells of the dynamic programme within
+     * `max_distance` of the diagonal are computed (Ukkonen).
+     *
+     * @param a: an input string to be compared
+     * @param b: an input string to be compared
+     * @return the OSA distance between the two input strings
+     */
     const auto& len_a = a.size();
     const auto& len_b = b.size();
 
     // catch trivial cases
-    if (!len_a) return (double) len_b;
-    if (!len_b) return (double) len_a;
-
-    auto&& score_matrix = uint_matrix_t(len_a + 1, uint_vector_t(len_b + 1, 0));
-    for (auto i = 0ul; i <= len_a; i++) {
-        for (auto j = 0ul; j <= len_b; j++) {
-            if ((!i) || (!j)) {
-                score_matrix[i][j] = (i + j);
-                continue;
-            }
-            const auto& cost = (a[i - 1] == b[j - 1]) ? 0 : 1;
-            score_matrix[i][j] = min(
-                    score_matrix[i - 1][j] + 1,
-                    score_matrix[i][j - 1] + 1,
-                    score_matrix[i - 1][j - 1] + cost
-                    );
-            if ((i > 1) && (j > 1) && (a[i - 1] == b[j]) && (a[i] == b[j - 1])) {
-                const auto &transposition = score_matrix[i - 2][j - 2] + 1;
-                if (transposition < score_matrix[i][j])
-                    score_matrix[i][j] = transposition;
-            }
+    if (!len_a) return this->bound_((double) len_b);
+    if (!len_b) return this->bound_((double) len_a);
+
+    // the distance is at least the difference in length, which is how many cells the band spans off the diagonal
+    const size_t difference = len_a > len_b ? len_a - len_b : len_b - len_a;
+    if ((double) difference > this->max_distance_) return this->max_distance_ + 1;
+
+    const size_t longest = std::max(len_a, len_b);
+    const size_t band = this->max_distance_ < (double) longest ? (size_t) this->max_distance_ : longest;
+    constexpr size_t unreachable = std::numeric_limits<size_t>::max() / 2;
+
+    // the rows i - 2, i - 1 and i of the dynamic programme, in a buffer of the thread which is reused for every pair.
+    // Row i is held in `rows[i % 3]`. Past the cells of the band, a row holds `unreachable` on either side.
+    thread_local uint_vector_t scratch;
+    scratch.resize(3 * (len_b + 1));
+    size_t* rows[3] = {&scratch[0], &scratch[len_b + 1], &scratch[2 * (len_b + 1)]};
+
+    for (size_t j = 0; j <= std::min(len_b, band); j++) rows[0][j] = j;
+    if (band < len_b) rows[0][band + 1] = unreachable;
+
+    size_t previous_minimum = 0;
+    for (size_t i = 1; i <= len_a; i++) {
+        const size_t begin = i > band ? i - band : 1;
+        const size_t end = std::min(len_b, i + band);
+
+        const size_t* above = rows[(i - 1) % 3];
+        const size_t* two_above = rows[(i - 2) % 3];
+        size_t* row = rows[i % 3];
+        row[begin - 1] = begin == 1 && i <= band ? i : unreachable;
+        if (end < len_b) row[end + 1] = unreachable;
+
+        size_t minimum = row[begin - 1];
+        for (size_t j = begin; j <= end; j++) {
+            const size_t cost = (a[i - 1] == b[j - 1]) ? 0 : 1;
+            auto score = std::min({above[j] + 1, row[j - 1] + 1, above[j - 1] + cost});
+            if ((i > 1) && (j > 1) && (a[i - 1] == b[j - 2]) && (a[i - 2] == b[j - 1]))
+                score = std::min(score, two_above[j - 2] + 1);
+
+            row[j] = score;
+            minimum = std::min(minimum, score);
         }
+
+        // a transposition skips a row, so every alignment passes through one of two consecutive rows
+        if ((double) std::min(minimum, previous_minimum) > this->max_distance_) return this->max_distance_ + 1;
+        previous_minimum = minimum;
     }
-    return (double) score_matrix[len_a][len_b];
+
+    return this->bound_((double) rows[len_a % 3][len_b]);
 }
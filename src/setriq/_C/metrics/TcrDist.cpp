@@ -2,17 +2,22 @@
 // Created by Benjamin Tenmann on 19/11/2021.
 //
 
+#include <algorithm>
 #include <stdexcept>
+#include <unordered_map>
 
 #include "metrics/TcrDist.h"
+#include "utils/Mismatches.h"
 
 metric::TcrDist::TcrDist(const double_matrix_t& scoring_matrix,
                          const token_index_map_t& index,
                          double gap_penalty,
                          char gap_symbol,
-                         double weight) : gap_penalty_{gap_penalty}, gap_symbol_{gap_symbol}, distance_weight_{weight} {
+                         double weight) : distance_weight_{weight} {
     /**
-     * Initialize the TcrDist object.
+     * Initialize the TcrDist object. The distance of every pair of residues is computed once: residues of the index
+     * take codes [0, n), all other residues code n and the gap symbol code n + 1, such that the distance of a pair is
+     * a single lookup without checking for gaps.
      *
      * @param scoring_matrix: the substitution scoring matrix
      * @param index: the token index
@@ -20,7 +25,53 @@ metric::TcrDist::TcrDist(const double_matrix_t& scoring_matrix,
      * @param gap_symbol: the gap symbol to be used (e.g. "-")
      * @param weight: the weight of the metric component output
      */
-    this->substitution_matrix_ = SubstitutionMatrix (scoring_matrix, index);
+    constexpr auto max_distance = 4.;
+
+    const SubstitutionMatrix substitution_matrix (scoring_matrix, index);
+    const auto& n = scoring_matrix.size();
+    const auto& gap = n + 1;
+
+    // residues which are not in the index are at the maximal distance from all others, as their score is NaN
+    auto&& costs = double_matrix_t (n + 2, double_vector_t (n + 2, gap_penalty));
+    for (size_t i = 0; i <= n; i++) {
+        for (size_t j = 0; j <= n; j++)
+            costs[i][j] = std::min(max_distance, max_distance - substitution_matrix.table()[i * (n + 1) + j]);
+    }
+
+    auto&& codes = token_index_map_t ();
+    for (int token = 0; token < 256; token++) {
+        const auto& c = (char) token;
+        const auto& found = index.find(c);
+        codes[c] = c == gap_symbol ? gap : (found != index.end() ? found->second : n);
+    }
+    this->costs_ = SubstitutionMatrix (costs, codes);
+}
+
+double metric::TcrDist::forward(const char* a, const char* b, const size_t& n) const {
+    /**
+     * Compute the TcrDist metric (Dash et al) between two sequences of length `n`.
+     *
+     * @param a: a sequence to be compared
+     * @param b: another sequence to be compared
+     * @param n: the length of the sequences
+     * @return TcrDist metric between the two sequences
+     */
+    auto&& distance = 0.;
+
+    // only the mismatching positions contribute to the distance, so runs of eight equal residues are skipped at once
+    size_t i = 0;
+    for (; i + mismatches::word_size <= n; i += mismatches::word_size) {
+        if (!mismatches::differing_bytes(a + i, b + i))
+            continue;
+        for (size_t k = i; k < i + mismatches::word_size; k++) {
+            if (a[k] != b[k]) distance += this->costs_(a[k], b[k]);
+        }
+    }
+    for (; i < n; i++) {
+        if (a[i] != b[i]) distance += this->costs_(a[i], b[i]);
+    }
+
+    return distance * this->distance_weight_;
 }
 
 double metric::TcrDist::forward(const std::string &a, const std::string &b) const {
@@ -32,26 +83,106 @@ double metric::TcrDist::forward(const std::string &a, const std::string &b) cons
      * @param b: another string to be compared
      * @return TcrDist metric between the two strings
      */
-    constexpr auto max_distance = 4.;
-    const auto& n = a.size();
+    return this->forward(a.data(), b.data(), std::min(a.size(), b.size()));
+}
+
+metric::TcrDistSum::TcrDistSum(std::vector<TcrDist> components,
+                               const std::vector<size_t>& lengths) : components_{std::move(components)}, offsets_{0} {
+    /**
+     * Initialize the TcrDistSum object.
+     *
+     * @param components: the TcrDist components
+     * @param lengths: the length of each component, which is the same in all records
+     */
+    if (lengths.size() != this->components_.size())
+        throw std::invalid_argument("the number of lengths does not match the number of components");
+
+    for (const auto& length : lengths) this->offsets_.push_back(this->offsets_.back() + length);
+    this->tables_.assign(this->components_.size(), Table {0, {}});
+}
 
-    const auto* ptr_a = &a.front();
-    const auto* ptr_b = &b.front();
+constexpr size_t metric::TcrDistSum::max_table_size;
 
-    auto&& distance = 0.;
-    for (size_t i = 0; i < n; i++) {
-        const auto& _a = *(ptr_a + i);
-        const auto& _b = *(ptr_b + i);
-        if (_a == _b)
-            continue;
+void metric::TcrDistSum::tabulate(const std::vector<const string_vector_t*>& records, const size_t& pairs) {
+    /**
+     * Tabulate the components with few distinct sequences among sets of records. A component is tabulated if it has at
+     * most `max_table_size` distinct sequences, and computing the distances between all of them takes fewer distance
+     * computations than the pairs the metric is about to compute. The cache refers to the records by their address,
+     * i.e. `records` must outlive the use of the metric on them.
+     *
+     * @param records: the sets of records the metric is about to be applied to
+     * @param pairs: the number of pairs of records the metric is about to compute the distances of
+     */
+    const auto& n_components = this->components_.size();
+    auto&& codes = std::vector<std::vector<std::uint16_t>> ();
+    for (const auto* set : records) codes.emplace_back(set->size() * n_components, 0);
 
-        if (_a == this->gap_symbol_ || _b == this->gap_symbol_) {
-            distance += this->gap_penalty_;
+    this->tables_.assign(n_components, Table {0, {}});
+    bool tabulated = false;
+    for (size_t c = 0; c < n_components; c++) {
+        const auto& offset = this->offsets_[c];
+        const auto& length = this->offsets_[c + 1] - offset;
+
+        // the distinct sequences of the component, in order of their first appearance
+        auto&& index = std::unordered_map<std::string, std::uint16_t> ();
+        auto&& values = std::vector<const char*> ();
+        const auto& encode = [&]() {
+            for (size_t s = 0; s < records.size(); s++) {
+                const auto& set = *records[s];
+                for (size_t i = 0; i < set.size(); i++) {
+                    const auto& inserted = index.emplace(set[i].substr(offset, length), (std::uint16_t) values.size());
+                    if (inserted.second) {
+                        if (values.size() == max_table_size) return false;
+                        values.push_back(&set[i][offset]);
+                    }
+                    codes[s][i * n_components + c] = inserted.first->second;
+                }
+            }
+            return true;
+        };
+        if (!encode() || values.size() * values.size() > pairs) continue;
+
+        const auto& size = values.size();
+        auto&& distances = double_vector_t (size * size);
+        for (size_t i = 0; i < size; i++) {
+            for (size_t j = 0; j < size; j++)
+                distances[i * size + j] = this->components_[c].forward(values[i], values[j], length);
+        }
+        this->tables_[c] = Table {size, std::move(distances)};
+        tabulated = true;
+    }
+
+    // without any tabulated components, the records are not looked up at all
+    if (!tabulated) return;
+    for (size_t s = 0; s < records.size(); s++) {
+        const auto& set = *records[s];
+        this->codes_.push_back({set.data(), set.data() + set.size(), std::move(codes[s])});
+    }
+}
+
+double metric::TcrDistSum::forward(const std::string &a, const std::string &b) const {
+    /**
+     * Compute the sum of the TcrDist components of two records, whose components are concatenated into one string.
+     * Be sure to provide records of the length given by the offsets of the components.
+     *
+     * @param a: a record to be compared
+     * @param b: another record to be compared
+     * @return the sum of the (weighted) TcrDist components between the two records
+     */
+    // the tabulated components of records of the cached sets are looked up, all others are computed
+    const auto* codes_a = this->codes_.empty() ? nullptr : this->codes(a);
+    const auto* codes_b = codes_a ? this->codes(b) : nullptr;
+
+    auto&& distance = 0.;
+    for (size_t c = 0; c < this->components_.size(); c++) {
+        const auto& table = this->tables_[c];
+        if (codes_b && table.size) {
+            distance += table.distances[codes_a[c] * table.size + codes_b[c]];
             continue;
         }
 
-        const auto& substitution = max_distance - this->substitution_matrix_(_a, _b);
-        distance += std::min(max_distance, substitution);
+        const auto& offset = this->offsets_[c];
+        distance += this->components_[c].forward(&a[offset], &b[offset], this->offsets_[c + 1] - offset);
     }
-    return distance * this->distance_weight_;
+    return distance;
 }
@@ -9,9 +9,19 @@
 #define STRINGIFY(x) #x
 #define MACRO_STRINGIFY(x) STRINGIFY(x)
 
+#include <pybind11/numpy.h>
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 
+#include <algorithm>
+#include <array>
+#include <limits>
+#include <stdexcept>
+#include <tuple>
+#include <type_traits>
+#include <utility>
+
+#include "neighbor_search.h"
 #include "pairwise_distance_computation.h"
 #include "metrics/CdrDist.h"
 #include "metrics/Levenshtein.h"
@@ -21,94 +31,989 @@
 #include "metrics/JaroWinkler.h"
 #include "metrics/LongestCommonSubstring.h"
 #include "metrics/OptimalStringAlignment.h"
+#include "utils/Repertoire.h"
 #include "utils/type_defs.h"
 
 namespace py = pybind11;
 
+// ----- input sequences -------------------------------------------------------------------------------------------- //
+class Sequences {
+    /**
+     * The sequences passed from Python: either a sequence of str, which is converted, or a Repertoire, whose converted
+     * sequences are viewed without a copy. It converts implicitly to the `string_vector_t` the computations take.
+     */
+private:
+    const string_vector_t* view_ = nullptr;
+    const Repertoire* repertoire_ = nullptr;
+    string_vector_t owned_;
+    bool none_ = false;
+
+public:
+    void view(const Repertoire& repertoire) { this->repertoire_ = &repertoire; this->view_ = &repertoire.sequences(); };
+    void own(string_vector_t&& sequences) {
+        this->owned_ = std::move(sequences);
+        this->view_ = nullptr;
+        this->repertoire_ = nullptr;
+    };
+    void set_none() { this->none_ = true; };
+
+    bool is_none() const { return this->none_; };
+    const Repertoire* repertoire() const { return this->repertoire_; };
+    const string_vector_t& get() const { return this->view_ ? *this->view_ : this->owned_; };
+    operator const string_vector_t&() const { return this->get(); };
+};
+
+// the same, but `None` is accepted as well (e.g. for the optional references of the neighbor searches)
+class OptionalSequences : public Sequences {};
+
+namespace pybind11 { namespace detail {
+    template<typename S, bool accepts_none>
+    struct sequences_caster {
+        PYBIND11_TYPE_CASTER(S, const_name("Sequence[str]"));
+
+        bool load(handle src, bool convert) {
+            if (accepts_none && src.is_none()) {
+                this->value.set_none();
+                return true;
+            }
+            if (isinstance<Repertoire>(src)) {
+                this->value.view(src.cast<const Repertoire&>());
+                return true;
+            }
+
+            make_caster<string_vector_t> caster;
+            if (!caster.load(src, convert)) return false;
+            this->value.own(cast_op<string_vector_t&&>(std::move(caster)));
+            return true;
+        }
+    };
+
+    template<> struct type_caster<Sequences> : sequences_caster<Sequences, false> {};
+    template<> struct type_caster<OptionalSequences> : sequences_caster<OptionalSequences, true> {};
+}}
+
+std::string describe_character(const char& c) {
+    // a residue is a single byte, which may be part of a multi-byte UTF-8 character, so all but printable ASCII is
+    // escaped to keep the error message valid UTF-8
+    if (c >= ' ' && c <= '~') return std::string (1, c);
+
+    const char* hex = "0123456789abcdef";
+    const auto& byte = (unsigned char) c;
+    return std::string {'\\', 'x', hex[byte >> 4], hex[byte & 15]};
+}
+
+residue_set_t alphabet_residues(const token_index_map_t& index, const std::string& symbols) {
+    residue_set_t valid;
+    for (const auto& token : index) valid.set((unsigned char) token.first);
+    for (const auto& symbol : symbols) valid.set((unsigned char) symbol);
+    return valid;
+}
+
+void check_alphabet(const string_vector_t& sequences,
+                    const residue_set_t& valid) {
+    for (size_t i = 0; i < sequences.size(); i++) {
+        for (const auto& residue : sequences[i]) {
+            if (!valid[(unsigned char) residue])
+                throw py::value_error("sequence " + std::to_string(i) + " ('" + sequences[i] + "') holds the character '"
+                                      + describe_character(residue) + "', which is not in the substitution matrix");
+        }
+    }
+}
+
+void check_alphabet(const string_vector_t& sequences,
+                    const token_index_map_t& index,
+                    const std::string& symbols = "") {
+    // the substitution matrix based metrics look up every residue, so residues outside of the index of the matrix are
+    // rejected before the computation starts -- an exception thrown within a parallel region would abort the process
+    check_alphabet(sequences, alphabet_residues(index, symbols));
+}
+
+void check_alphabet(const Sequences& sequences,
+                    const token_index_map_t& index,
+                    const std::string& symbols = "") {
+    // the same, but a Repertoire knows the residues it holds, so its sequences are only read if they hold invalid ones
+    const auto& valid = alphabet_residues(index, symbols);
+    if (sequences.repertoire() && sequences.repertoire()->holds_only(valid)) return;
+    check_alphabet(sequences.get(), valid);
+}
+
+// a TcrDist component: its substitution matrix and index, gap penalty, gap symbol, weight and the length of its sequences
+typedef std::tuple<double_matrix_t, token_index_map_t, double, char, double, size_t> tcr_dist_component_t;
+typedef std::vector<tcr_dist_component_t> tcr_dist_components_t;
+
+metric::TcrDistSum tcr_dist_metric(const tcr_dist_components_t& components) {
+    auto&& metrics = std::vector<metric::TcrDist> ();
+    auto&& lengths = std::vector<size_t> ();
+    for (const auto& component : components) {
+        metrics.emplace_back(std::get<0>(component), std::get<1>(component), std::get<2>(component),
+                             std::get<3>(component), std::get<4>(component));
+        lengths.push_back(std::get<5>(component));
+    }
+    return metric::TcrDistSum {std::move(metrics), lengths};
+}
+
+void check_records(const string_vector_t& records,
+                   const tcr_dist_components_t& components,
+                   const metric::TcrDistSum& metric) {
+    // the records hold their components concatenated, so every record must be as long as the components together and
+    // each component only holds the residues of its own substitution matrix (and the gap symbol)
+    const auto& offsets = metric.offsets();
+    for (size_t i = 0; i < records.size(); i++) {
+        if (records[i].size() != metric.size())
+            throw py::value_error("record " + std::to_string(i) + " is of length " + std::to_string(records[i].size())
+                                  + ", but its components are of length " + std::to_string(metric.size()));
+    }
+
+    for (size_t c = 0; c < components.size(); c++) {
+        std::array<bool, 256> valid {};
+        for (const auto& token : std::get<1>(components[c])) valid[(unsigned char) token.first] = true;
+        valid[(unsigned char) std::get<3>(components[c])] = true;
+
+        for (size_t i = 0; i < records.size(); i++) {
+            for (size_t k = offsets[c]; k < offsets[c + 1]; k++) {
+                if (!valid[(unsigned char) records[i][k]])
+                    throw py::value_error("component " + std::to_string(c) + " of record " + std::to_string(i) + " ('"
+                                          + records[i].substr(offsets[c], offsets[c + 1] - offsets[c])
+                                          + "') holds the character '"
+                                          + describe_character(records[i][k]) + "', which is not in the substitution matrix");
+            }
+        }
+    }
+}
+
+class TcrDistRecords {
+    /**
+     * A set of records prepared for the pairwise TcrDist computation: the records are checked and the components with
+     * few distinct sequences tabulated once, such that the distances can be computed in chunks of rows without
+     * repeating either. The tabulation refers to the records by their address, so the object cannot be copied.
+     */
+private:
+    string_vector_t records_;
+    metric::TcrDistSum metric_;
+
+public:
+    TcrDistRecords(string_vector_t records, const tcr_dist_components_t& components)
+        : records_{std::move(records)}, metric_{tcr_dist_metric(components)} {
+        check_records(this->records_, components, this->metric_);
+        this->metric_.tabulate({&this->records_}, this->records_.size() * this->records_.size() / 2);
+    };
+    TcrDistRecords(const TcrDistRecords&) = delete;
+    TcrDistRecords& operator=(const TcrDistRecords&) = delete;
+
+    size_t size() const { return this->records_.size(); };
+    const string_vector_t& records() const { return this->records_; };
+    const metric::TcrDistSum& metric() const { return this->metric_; };
+};
+
+void tabulate(metric::TcrDistSum& metric, const string_vector_t& records, const OptionalSequences& references) {
+    // tabulate the components with few distinct sequences among the records (and references) of a neighbor search
+    if (references.is_none()) {
+        metric.tabulate({&records}, records.size() * records.size() / 2);
+        return;
+    }
+    const string_vector_t& reference_records = references;
+    metric.tabulate({&records, &reference_records}, records.size() * reference_records.size());
+}
+
+// ----- output buffers --------------------------------------------------------------------------------------------- //
+template<typename V>
+py::array_t<typename V::value_type> as_array(V&& values,
+                                             const std::vector<py::ssize_t>& shape) {
+    /**
+     * Hand the memory of a vector over to NumPy, without copying it. The vector is moved onto the heap and freed by the
+     * capsule once the array is garbage collected.
+     *
+     * @param values: the computed values, e.g. distances
+     * @param shape: the shape of the returned array
+     * @return a NumPy array viewing the memory of `values`
+     */
+    auto* owner = new V (std::move(values));
+    py::capsule free_when_done (owner, [](void* ptr) { delete reinterpret_cast<V*>(ptr); });
+
+    return py::array_t<typename V::value_type> (shape, owner->data(), free_when_done);
+}
+
+template<typename O, typename F>
+py::array write_output(const py::object& out,
+                       const size_t& size,
+                       F& compute) {
+    /**
+     * Compute distances into a user provided output buffer of element type `O`. The buffer must be writeable and hold
+     * the expected number of elements. Integer buffers only accept distances which they represent exactly.
+     *
+     * @param out: the output buffer
+     * @param size: the number of distances to be written into the buffer
+     * @param compute: computes the distances into a pointer, returning whether all of them were stored exactly
+     * @return the output buffer as an array
+     */
+    auto&& buffer = py::reinterpret_borrow<py::array_t<O, py::array::c_style>>(out);
+    if (!buffer.writeable())
+        throw py::value_error("`out` must be writeable");
+    if ((size_t) buffer.size() != size)
+        throw py::value_error("`out` must have " + std::to_string(size) + " elements, not "
+                              + std::to_string(buffer.size()));
+
+    auto* distances = buffer.mutable_data();
+    bool exact;
+    {
+        py::gil_scoped_release release;
+        exact = compute(distances);
+    }
+    if (!exact)
+        throw std::overflow_error("the distances cannot be stored in `out` of dtype "
+                                  + py::str(buffer.dtype()).cast<std::string>()
+                                  + " -- they must be integers within the range of the dtype");
+    return std::move(buffer);
+}
+
+template<typename F>
+py::array write_output(const py::object& out,
+                       const size_t& size,
+                       F& compute) {
+    // the element type of the output is given by the dtype of the buffer. Compact dtypes cut the memory (bandwidth) of
+    // the output by a factor 2-8
+    if (py::isinstance<py::array_t<double, py::array::c_style>>(out))
+        return write_output<double>(out, size, compute);
+    if (py::isinstance<py::array_t<float, py::array::c_style>>(out))
+        return write_output<float>(out, size, compute);
+    if (py::isinstance<py::array_t<uint16_t, py::array::c_style>>(out))
+        return write_output<uint16_t>(out, size, compute);
+    if (py::isinstance<py::array_t<uint8_t, py::array::c_style>>(out))
+        return write_output<uint8_t>(out, size, compute);
+
+    throw py::type_error("`out` must be a C-contiguous numpy array of dtype float64, float32, uint16 or uint8");
+}
+
+// the inputs have been converted into C++ types by the time the functions below are called, so the GIL is released for
+// the duration of the computation. This keeps other Python threads responsive and allows several of them to compute
+// distances concurrently
+template<typename T>
+py::array pairwise(const T& metric,
+                   const string_vector_t& sequences,
+                   const py::object& out,
+                   const size_t& tile_size,
+                   const int& num_threads,
+                   const py::object& rows) {
+    const auto& n = sequences.size();
+
+    // optionally, only the rows [row_begin, row_end) of the upper triangle are computed, i.e. a contiguous segment of
+    // the condensed distance vector
+    const auto& all_rows = rows.is_none();
+    size_t row_begin = 0, row_end = n;
+    if (!all_rows) {
+        std::tie(row_begin, row_end) = rows.cast<std::pair<size_t, size_t>>();
+        if (row_begin > row_end || row_end > n)
+            throw py::value_error("`rows` must be a range (begin, end) with 0 <= begin <= end <= "
+                                  + std::to_string(n));
+    }
+    const auto& size = n ? condensed_offset(row_end, n) - condensed_offset(row_begin, n) : 0;
+
+    auto compute = [&](auto* distances) {
+        if (all_rows)
+            return pairwise_distance_computation(metric, sequences, distances, tile_size, num_threads);
+        return pairwise_rows_computation(metric, sequences, row_begin, row_end, distances, tile_size, num_threads);
+    };
+
+    if (out.is_none()) {
+        double_vector_t distances;
+        {
+            py::gil_scoped_release release;
+            distances.resize(size);
+            compute(distances.data());
+        }
+        return as_array(std::move(distances), {(py::ssize_t) size});
+    }
+    return write_output(out, size, compute);
+}
+
+template<typename T>
+py::array cross(const T& metric,
+                const string_vector_t& queries,
+                const string_vector_t& references,
+                const py::object& out,
+                const size_t& tile_size,
+                const int& num_threads) {
+    const auto& n = queries.size();
+    const auto& m = references.size();
+
+    auto compute = [&](auto* distances) {
+        return cross_distance_computation(metric, queries, references, distances, tile_size, num_threads);
+    };
+
+    if (out.is_none()) {
+        double_vector_t distances;
+        {
+            py::gil_scoped_release release;
+            distances.resize(n * m);
+            compute(distances.data());
+        }
+        return as_array(std::move(distances), {(py::ssize_t) n, (py::ssize_t) m});
+    }
+    return write_output(out, n * m, compute).reshape({(py::ssize_t) n, (py::ssize_t) m});
+}
+
+template<typename T>
+py::array diagonal(const T& metric,
+                   const string_vector_t& sequences,
+                   const py::object& out,
+                   const int& num_threads) {
+    const auto& n = sequences.size();
+
+    auto compute = [&](auto* distances) {
+        return diagonal_computation(metric, sequences, distances, num_threads);
+    };
+
+    if (out.is_none()) {
+        double_vector_t distances;
+        {
+            py::gil_scoped_release release;
+            distances.resize(n);
+            compute(distances.data());
+        }
+        return as_array(std::move(distances), {(py::ssize_t) n});
+    }
+    return write_output(out, n, compute);
+}
+
+template<typename T>
+py::tuple within_radius(const T& metric,
+                        const string_vector_t& sequences,
+                        const OptionalSequences& references,
+                        const double& radius,
+                        const size_t& tile_size,
+                        const int& num_threads) {
+    // the pairs within `radius` of each other, either among `sequences` or between `sequences` and `references`
+    NeighborList neighbors;
+    if (references.is_none()) {
+        py::gil_scoped_release release;
+        neighbors = radius_pairs_computation(metric, sequences, radius, tile_size, num_threads);
+    } else {
+        const string_vector_t& reference_sequences = references;
+        py::gil_scoped_release release;
+        neighbors = radius_cross_computation(metric, sequences, reference_sequences, radius, tile_size, num_threads);
+    }
+
+    const auto& size = (py::ssize_t) neighbors.distances.size();
+    return py::make_tuple(as_array(std::move(neighbors.rows), {size}),
+                          as_array(std::move(neighbors.columns), {size}),
+                          as_array(std::move(neighbors.distances), {size}));
+}
+
+template<typename T>
+py::tuple nearest_neighbors(const T& metric,
+                            const string_vector_t& sequences,
+                            const OptionalSequences& references,
+                            const size_t& k,
+                            const size_t& tile_size,
+                            const int& num_threads) {
+    // the `k` nearest neighbors of each of `sequences`, either among the others or among `references`
+    const auto& n = sequences.size();
+    auto&& indices = index_vector_t ();
+    auto&& distances = double_vector_t ();
+
+    if (references.is_none()) {
+        if (k == 0 || k >= n) throw py::value_error("k must be at least 1 and smaller than the number of sequences");
+        py::gil_scoped_release release;
+        indices.resize(n * k);
+        distances.resize(n * k);
+        kneighbors_pairwise_computation(metric, sequences, k, indices.data(), distances.data(), tile_size, num_threads);
+    } else {
+        const string_vector_t& reference_sequences = references;
+        if (k == 0 || k > reference_sequences.size())
+            throw py::value_error("k must be at least 1 and at most the number of references");
+        py::gil_scoped_release release;
+        indices.resize(n * k);
+        distances.resize(n * k);
+        kneighbors_cross_computation(metric, sequences, reference_sequences, k, indices.data(), distances.data(),
+                                     tile_size, num_threads);
+    }
+
+    const std::vector<py::ssize_t> shape {(py::ssize_t) n, (py::ssize_t) k};
+    return py::make_tuple(as_array(std::move(indices), shape), as_array(std::move(distances), shape));
+}
+
+double distance_bound(const py::object& max_distance) {
+    // the largest distance a bounded metric computes exactly, where None leaves it unbounded
+    return max_distance.is_none() ? std::numeric_limits<double>::infinity() : max_distance.cast<double>();
+}
+
+template<typename T>
+py::float_ single(const T& metric, const std::string& a, const std::string& b) {
+    double out;
+    {
+        py::gil_scoped_release release;
+        out = metric.forward(a, b);
+    }
+    return py::cast(out);
+}
+
+// ----- threads ---------------------------------------------------------------------------------------------------- //
+size_t effective_num_threads(const int& num_threads) {
+    return resolve_num_threads(num_threads);
+}
+
 // ----- pairwise distances ----------------------------------------------------------------------------------------- //
-py::list cdr_dist(const string_vector_t& sequences,
-                  const double_matrix_t& substitution_matrix,
-                  const token_index_map_t& index,
-                  const double& gap_opening_penalty,
-                  const double& gap_extension_penalty) {
+py::array cdr_dist(const Sequences& sequences,
+                   const double_matrix_t& substitution_matrix,
+                   const token_index_map_t& index,
+                   const double& gap_opening_penalty,
+                   const double& gap_extension_penalty,
+                   const py::object& out,
+                   const size_t& tile_size,
+                   const int& num_threads,
+                   const py::object& rows) {
+    check_alphabet(sequences, index);
     metric::CdrDist metric {substitution_matrix, index, gap_opening_penalty, gap_extension_penalty};
+    metric.cache_identity_scores(sequences);
 
-    double_vector_t out = pairwise_distance_computation(metric, sequences);
-    return py::cast(out);
+    return pairwise(metric, sequences, out, tile_size, num_threads, rows);
 }
 
-py::list levenshtein(const string_vector_t& sequences, const double& extra_cost) {
-    metric::Levenshtein metric {extra_cost};
+py::array levenshtein(const Sequences& sequences,
+                      const double& extra_cost,
+                      const py::object& max_distance,
+                      const py::object& out,
+                      const size_t& tile_size,
+                      const int& num_threads,
+                      const py::object& rows) {
+    metric::Levenshtein metric {extra_cost, distance_bound(max_distance)};
 
-    double_vector_t out = pairwise_distance_computation(metric, sequences);
-    return py::cast(out);
+    return pairwise(metric, sequences, out, tile_size, num_threads, rows);
 }
 
-py::list tcr_dist_component(const string_vector_t& sequences,
-                            const double_matrix_t& substitution_matrix,
-                            const token_index_map_t& index,
-                            const double& gap_penalty,
-                            const char& gap_symbol,
-                            const double& distance_weight) {
+py::array tcr_dist_component(const Sequences& sequences,
+                             const double_matrix_t& substitution_matrix,
+                             const token_index_map_t& index,
+                             const double& gap_penalty,
+                             const char& gap_symbol,
+                             const double& distance_weight,
+                             const py::object& out,
+                             const size_t& tile_size,
+                             const int& num_threads,
+                             const py::object& rows) {
+    check_alphabet(sequences, index, std::string(1, gap_symbol));
     metric::TcrDist metric {substitution_matrix, index, gap_penalty, gap_symbol, distance_weight};
 
-    double_vector_t out = pairwise_distance_computation(metric, sequences);
-    return py::cast(out);
+    return pairwise(metric, sequences, out, tile_size, num_threads, rows);
 }
 
-py::list hamming(const string_vector_t& sequences, const double& mismatch_score) {
+py::array tcr_dist(const TcrDistRecords& records,
+                   const py::object& out,
+                   const size_t& tile_size,
+                   const int& num_threads,
+                   const py::object& rows) {
+    return pairwise(records.metric(), records.records(), out, tile_size, num_threads, rows);
+}
+
+py::array hamming(const Sequences& sequences,
+                  const double& mismatch_score,
+                  const py::object& out,
+                  const size_t& tile_size,
+                  const int& num_threads,
+                  const py::object& rows) {
     metric::Hamming metric {mismatch_score};
 
-    double_vector_t out = pairwise_distance_computation(metric, sequences);
-    return py::cast(out);
+    return pairwise(metric, sequences, out, tile_size, num_threads, rows);
 }
 
-py::list jaro(const string_vector_t& sequences, const jaro_weighting_t& jaro_weights) {
+py::array jaro(const Sequences& sequences,
+               const jaro_weighting_t& jaro_weights,
+               const py::object& out,
+               const size_t& tile_size,
+               const int& num_threads,
+               const py::object& rows) {
     metric::Jaro metric {jaro_weights};
 
-    double_vector_t out = pairwise_distance_computation(metric, sequences);
-    return py::cast(out);
+    return pairwise(metric, sequences, out, tile_size, num_threads, rows);
 }
 
-py::list jaro_winkler(const string_vector_t& sequences,
-                      const double& p,
-                      const size_t& max_l,
-                      const jaro_weighting_t& jaro_weights) {
+py::array jaro_winkler(const Sequences& sequences,
+                       const double& p,
+                       const size_t& max_l,
+                       const jaro_weighting_t& jaro_weights,
+                       const py::object& out,
+                       const size_t& tile_size,
+                       const int& num_threads,
+                       const py::object& rows) {
     metric::JaroWinkler metric {p, max_l, metric::Jaro{jaro_weights}};
 
-    double_vector_t out = pairwise_distance_computation(metric, sequences);
-    return py::cast(out);
+    return pairwise(metric, sequences, out, tile_size, num_threads, rows);
 }
 
-py::list longest_common_substring(const string_vector_t& sequences) {
+py::array longest_common_substring(const Sequences& sequences,
+                                   const py::object& out,
+                                   const size_t& tile_size,
+                                   const int& num_threads,
+                                   const py::object& rows) {
     metric::LongestCommonSubstring metric {};
 
-    double_vector_t out = pairwise_distance_computation(metric, sequences);
-    return py::cast(out);
+    return pairwise(metric, sequences, out, tile_size, num_threads, rows);
 }
 
-py::list optimal_string_alignment(const string_vector_t& sequences) {
-    metric::OptimalStringAlignment metric {};
+py::array optimal_string_alignment(const Sequences& sequences,
+                                   const py::object& max_distance,
+                                   const py::object& out,
+                                   const size_t& tile_size,
+                                   const int& num_threads,
+                                   const py::object& rows) {
+    metric::OptimalStringAlignment metric {distance_bound(max_distance)};
 
-    double_vector_t out = pairwise_distance_computation(metric, sequences);
-    return py::cast(out);
+    return pairwise(metric, sequences, out, tile_size, num_threads, rows);
+}
+
+// ----- cross distances -------------------------------------------------------------------------------------------- //
+py::array cdr_dist_cross(const Sequences& queries,
+                         const Sequences& references,
+                         const double_matrix_t& substitution_matrix,
+                         const token_index_map_t& index,
+                         const double& gap_opening_penalty,
+                         const double& gap_extension_penalty,
+                         const py::object& out,
+                         const size_t& tile_size,
+                         const int& num_threads) {
+    check_alphabet(queries, index);
+    check_alphabet(references, index);
+    metric::CdrDist metric {substitution_matrix, index, gap_opening_penalty, gap_extension_penalty};
+    metric.cache_identity_scores(queries);
+    metric.cache_identity_scores(references);
+
+    return cross(metric, queries, references, out, tile_size, num_threads);
+}
+
+py::array levenshtein_cross(const Sequences& queries,
+                            const Sequences& references,
+                            const double& extra_cost,
+                            const py::object& max_distance,
+                            const py::object& out,
+                            const size_t& tile_size,
+                            const int& num_threads) {
+    metric::Levenshtein metric {extra_cost, distance_bound(max_distance)};
+
+    return cross(metric, queries, references, out, tile_size, num_threads);
+}
+
+py::array tcr_dist_component_cross(const Sequences& queries,
+                                   const Sequences& references,
+                                   const double_matrix_t& substitution_matrix,
+                                   const token_index_map_t& index,
+                                   const double& gap_penalty,
+                                   const char& gap_symbol,
+                                   const double& distance_weight,
+                                   const py::object& out,
+                                   const size_t& tile_size,
+                                   const int& num_threads) {
+    check_alphabet(queries, index, std::string(1, gap_symbol));
+    check_alphabet(references, index, std::string(1, gap_symbol));
+    metric::TcrDist metric {substitution_matrix, index, gap_penalty, gap_symbol, distance_weight};
+
+    return cross(metric, queries, references, out, tile_size, num_threads);
+}
+
+py::array tcr_dist_cross(const Sequences& queries,
+                         const Sequences& references,
+                         const tcr_dist_components_t& components,
+                         const py::object& out,
+                         const size_t& tile_size,
+                         const int& num_threads) {
+    auto metric = tcr_dist_metric(components);
+    check_records(queries, components, metric);
+    check_records(references, components, metric);
+
+    const string_vector_t& query_records = queries;
+    const string_vector_t& reference_records = references;
+    metric.tabulate({&query_records, &reference_records}, query_records.size() * reference_records.size());
+    return cross(metric, query_records, reference_records, out, tile_size, num_threads);
+}
+
+py::array hamming_cross(const Sequences& queries,
+                        const Sequences& references,
+                        const double& mismatch_score,
+                        const py::object& out,
+                        const size_t& tile_size,
+                        const int& num_threads) {
+    metric::Hamming metric {mismatch_score};
+
+    return cross(metric, queries, references, out, tile_size, num_threads);
+}
+
+py::array jaro_cross(const Sequences& queries,
+                     const Sequences& references,
+                     const jaro_weighting_t& jaro_weights,
+                     const py::object& out,
+                     const size_t& tile_size,
+                     const int& num_threads) {
+    metric::Jaro metric {jaro_weights};
+
+    return cross(metric, queries, references, out, tile_size, num_threads);
+}
+
+py::array jaro_winkler_cross(const Sequences& queries,
+                             const Sequences& references,
+                             const double& p,
+                             const size_t& max_l,
+                             const jaro_weighting_t& jaro_weights,
+                             const py::object& out,
+                             const size_t& tile_size,
+                             const int& num_threads) {
+    metric::JaroWinkler metric {p, max_l, metric::Jaro{jaro_weights}};
+
+    return cross(metric, queries, references, out, tile_size, num_threads);
+}
+
+py::array longest_common_substring_cross(const Sequences& queries,
+                                         const Sequences& references,
+                                         const py::object& out,
+                                         const size_t& tile_size,
+                                         const int& num_threads) {
+    metric::LongestCommonSubstring metric {};
+
+    return cross(metric, queries, references, out, tile_size, num_threads);
+}
+
+py::array optimal_string_alignment_cross(const Sequences& queries,
+                                         const Sequences& references,
+                                         const py::object& max_distance,
+                                         const py::object& out,
+                                         const size_t& tile_size,
+                                         const int& num_threads) {
+    metric::OptimalStringAlignment metric {distance_bound(max_distance)};
+
+    return cross(metric, queries, references, out, tile_size, num_threads);
+}
+
+// ----- radius neighbors ------------------------------------------------------------------------------------------- //
+py::tuple cdr_dist_radius(const Sequences& sequences,
+                          const double_matrix_t& substitution_matrix,
+                          const token_index_map_t& index,
+                          const double& gap_opening_penalty,
+                          const double& gap_extension_penalty,
+                          const double& radius,
+                          const OptionalSequences& references,
+                          const size_t& tile_size,
+                          const int& num_threads) {
+    check_alphabet(sequences, index);
+    if (!references.is_none()) check_alphabet(references, index);
+    metric::CdrDist metric {substitution_matrix, index, gap_opening_penalty, gap_extension_penalty};
+    metric.cache_identity_scores(sequences);
+    if (!references.is_none()) metric.cache_identity_scores(references);
+
+    return within_radius(metric, sequences, references, radius, tile_size, num_threads);
+}
+
+py::tuple levenshtein_radius(const Sequences& sequences,
+                             const double& extra_cost,
+                             const double& radius,
+                             const py::object& max_distance,
+                             const OptionalSequences& references,
+                             const size_t& tile_size,
+                             const int& num_threads) {
+    // the distances beyond the radius are discarded, so they need not be computed exactly
+    metric::Levenshtein metric {extra_cost, std::min(distance_bound(max_distance), radius)};
+
+    return within_radius(metric, sequences, references, radius, tile_size, num_threads);
+}
+
+py::tuple tcr_dist_component_radius(const Sequences& sequences,
+                                    const double_matrix_t& substitution_matrix,
+                                    const token_index_map_t& index,
+                                    const double& gap_penalty,
+                                    const char& gap_symbol,
+                                    const double& distance_weight,
+                                    const double& radius,
+                                    const OptionalSequences& references,
+                                    const size_t& tile_size,
+                                    const int& num_threads) {
+    check_alphabet(sequences, index, std::string(1, gap_symbol));
+    if (!references.is_none()) check_alphabet(references, index, std::string(1, gap_symbol));
+    metric::TcrDist metric {substitution_matrix, index, gap_penalty, gap_symbol, distance_weight};
+
+    return within_radius(metric, sequences, references, radius, tile_size, num_threads);
+}
+
+py::tuple tcr_dist_radius(const Sequences& records,
+                          const tcr_dist_components_t& components,
+                          const double& radius,
+                          const OptionalSequences& references,
+                          const size_t& tile_size,
+                          const int& num_threads) {
+    auto metric = tcr_dist_metric(components);
+    check_records(records, components, metric);
+    if (!references.is_none()) check_records(references, components, metric);
+    tabulate(metric, records, references);
+
+    return within_radius(metric, records, references, radius, tile_size, num_threads);
+}
+
+py::tuple hamming_radius(const Sequences& sequences,
+                         const double& mismatch_score,
+                         const double& radius,
+                         const OptionalSequences& references,
+                         const size_t& tile_size,
+                         const int& num_threads) {
+    metric::Hamming metric {mismatch_score};
+
+    return within_radius(metric, sequences, references, radius, tile_size, num_threads);
+}
+
+py::tuple jaro_radius(const Sequences& sequences,
+                      const jaro_weighting_t& jaro_weights,
+                      const double& radius,
+                      const OptionalSequences& references,
+                      const size_t& tile_size,
+                      const int& num_threads) {
+    metric::Jaro metric {jaro_weights};
+
+    return within_radius(metric, sequences, references, radius, tile_size, num_threads);
+}
+
+py::tuple jaro_winkler_radius(const Sequences& sequences,
+                              const double& p,
+                              const size_t& max_l,
+                              const jaro_weighting_t& jaro_weights,
+                              const double& radius,
+                              const OptionalSequences& references,
+                              const size_t& tile_size,
+                              const int& num_threads) {
+    metric::JaroWinkler metric {p, max_l, metric::Jaro{jaro_weights}};
+
+    return within_radius(metric, sequences, references, radius, tile_size, num_threads);
+}
+
+py::tuple longest_common_substring_radius(const Sequences& sequences,
+                                          const double& radius,
+                                          const OptionalSequences& references,
+                                          const size_t& tile_size,
+                                          const int& num_threads) {
+    metric::LongestCommonSubstring metric {};
+
+    return within_radius(metric, sequences, references, radius, tile_size, num_threads);
+}
+
+py::tuple optimal_string_alignment_radius(const Sequences& sequences,
+                                          const double& radius,
+                                          const py::object& max_distance,
+                                          const OptionalSequences& references,
+                                          const size_t& tile_size,
+                                          const int& num_threads) {
+    metric::OptimalStringAlignment metric {std::min(distance_bound(max_distance), radius)};
+
+    return within_radius(metric, sequences, references, radius, tile_size, num_threads);
+}
+
+// ----- nearest neighbors ------------------------------------------------------------------------------------------ //
+py::tuple cdr_dist_kneighbors(const Sequences& sequences,
+                              const double_matrix_t& substitution_matrix,
+                              const token_index_map_t& index,
+                              const double& gap_opening_penalty,
+                              const double& gap_extension_penalty,
+                              const size_t& k,
+                              const OptionalSequences& references,
+                              const size_t& tile_size,
+                              const int& num_threads) {
+    check_alphabet(sequences, index);
+    if (!references.is_none()) check_alphabet(references, index);
+    metric::CdrDist metric {substitution_matrix, index, gap_opening_penalty, gap_extension_penalty};
+    metric.cache_identity_scores(sequences);
+    if (!references.is_none()) metric.cache_identity_scores(references);
+
+    return nearest_neighbors(metric, sequences, references, k, tile_size, num_threads);
+}
+
+py::tuple levenshtein_kneighbors(const Sequences& sequences,
+                                 const double& extra_cost,
+                                 const size_t& k,
+                                 const py::object& max_distance,
+                                 const OptionalSequences& references,
+                                 const size_t& tile_size,
+                                 const int& num_threads) {
+    metric::Levenshtein metric {extra_cost, distance_bound(max_distance)};
+
+    return nearest_neighbors(metric, sequences, references, k, tile_size, num_threads);
+}
+
+py::tuple tcr_dist_component_kneighbors(const Sequences& sequences,
+                                        const double_matrix_t& substitution_matrix,
+                                        const token_index_map_t& index,
+                                        const double& gap_penalty,
+                                        const char& gap_symbol,
+                                        const double& distance_weight,
+                                        const size_t& k,
+                                        const OptionalSequences& references,
+                                        const size_t& tile_size,
+                                        const int& num_threads) {
+    check_alphabet(sequences, index, std::string(1, gap_symbol));
+    if (!references.is_none()) check_alphabet(references, index, std::string(1, gap_symbol));
+    metric::TcrDist metric {substitution_matrix, index, gap_penalty, gap_symbol, distance_weight};
+
+    return nearest_neighbors(metric, sequences, references, k, tile_size, num_threads);
+}
+
+py::tuple tcr_dist_kneighbors(const Sequences& records,
+                              const tcr_dist_components_t& components,
+                              const size_t& k,
+                              const OptionalSequences& references,
+                              const size_t& tile_size,
+                              const int& num_threads) {
+    auto metric = tcr_dist_metric(components);
+    check_records(records, components, metric);
+    if (!references.is_none()) check_records(references, components, metric);
+    tabulate(metric, records, references);
+
+    return nearest_neighbors(metric, records, references, k, tile_size, num_threads);
+}
+
+py::tuple hamming_kneighbors(const Sequences& sequences,
+                             const double& mismatch_score,
+                             const size_t& k,
+                             const OptionalSequences& references,
+                             const size_t& tile_size,
+                             const int& num_threads) {
+    metric::Hamming metric {mismatch_score};
+
+    return nearest_neighbors(metric, sequences, references, k, tile_size, num_threads);
+}
+
+py::tuple jaro_kneighbors(const Sequences& sequences,
+                          const jaro_weighting_t& jaro_weights,
+                          const size_t& k,
+                          const OptionalSequences& references,
+                          const size_t& tile_size,
+                          const int& num_threads) {
+    metric::Jaro metric {jaro_weights};
+
+    return nearest_neighbors(metric, sequences, references, k, tile_size, num_threads);
+}
+
+py::tuple jaro_winkler_kneighbors(const Sequences& sequences,
+                                  const double& p,
+                                  const size_t& max_l,
+                                  const jaro_weighting_t& jaro_weights,
+                                  const size_t& k,
+                                  const OptionalSequences& references,
+                                  const size_t& tile_size,
+                                  const int& num_threads) {
+    metric::JaroWinkler metric {p, max_l, metric::Jaro{jaro_weights}};
+
+    return nearest_neighbors(metric, sequences, references, k, tile_size, num_threads);
+}
+
+py::tuple longest_common_substring_kneighbors(const Sequences& sequences,
+                                              const size_t& k,
+                                              const OptionalSequences& references,
+                                              const size_t& tile_size,
+                                              const int& num_threads) {
+    metric::LongestCommonSubstring metric {};
+
+    return nearest_neighbors(metric, sequences, references, k, tile_size, num_threads);
+}
+
+py::tuple optimal_string_alignment_kneighbors(const Sequences& sequences,
+                                              const size_t& k,
+                                              const py::object& max_distance,
+                                              const OptionalSequences& references,
+                                              const size_t& tile_size,
+                                              const int& num_threads) {
+    metric::OptimalStringAlignment metric {distance_bound(max_distance)};
+
+    return nearest_neighbors(metric, sequences, references, k, tile_size, num_threads);
+}
+
+// ----- duplicates ------------------------------------------------------------------------------------------------- //
+py::array cdr_dist_diagonal(const Sequences& sequences,
+                            const double_matrix_t& substitution_matrix,
+                            const token_index_map_t& index,
+                            const double& gap_opening_penalty,
+                            const double& gap_extension_penalty,
+                            const py::object& out,
+                            const int& num_threads) {
+    // the distance of each sequence to itself, which is not necessarily 0 under CDR-dist
+    check_alphabet(sequences, index);
+    metric::CdrDist metric {substitution_matrix, index, gap_opening_penalty, gap_extension_penalty};
+    metric.cache_identity_scores(sequences);
+
+    return diagonal(metric, sequences, out, num_threads);
+}
+
+py::array expand_condensed(const py::array& distances,
+                           const py::array_t<index_t, py::array::c_style | py::array::forcecast>& inverse,
+                           const py::object& out,
+                           const int& num_threads,
+                           const py::object& diagonal) {
+    // expand the condensed distances among unique sequences to all pairs of the sequences they were drawn from, see
+    // `expand_condensed_computation`. The output buffer and the diagonal must be of the same dtype as `distances`
+    if (!(distances.flags() & py::array::c_style))
+        throw py::value_error("`distances` must be C-contiguous");
+    if (!py::isinstance<py::array>(out) || !distances.dtype().is(py::reinterpret_borrow<py::array>(out).dtype()))
+        throw py::type_error("`out` must be an array of the same dtype as `distances`");
+    if (!diagonal.is_none() && (!py::isinstance<py::array>(diagonal)
+                                || !distances.dtype().is(py::reinterpret_borrow<py::array>(diagonal).dtype())))
+        throw py::type_error("`diagonal` must be an array of the same dtype as `distances`");
+
+    const auto& n = (size_t) inverse.size();
+    const auto* indices = inverse.data();
+    size_t n_unique = 0;
+    for (size_t i = 0; i < n; i++) {
+        if (indices[i] < 0) throw py::value_error("`inverse` must not hold negative indices");
+        n_unique = std::max(n_unique, (size_t) indices[i] + 1);
+    }
+    if ((size_t) distances.size() != condensed_offset(n_unique, n_unique))
+        throw py::value_error("`distances` must hold the condensed distances among " + std::to_string(n_unique)
+                              + " unique sequences");
+
+    const void* diagonal_data = nullptr;
+    if (!diagonal.is_none()) {
+        const auto& values = py::reinterpret_borrow<py::array>(diagonal);
+        if (!(values.flags() & py::array::c_style) || (size_t) values.size() != n_unique)
+            throw py::value_error("`diagonal` must be a C-contiguous array of " + std::to_string(n_unique)
+                                  + " elements");
+        diagonal_data = values.data();
+    }
+
+    const auto* source = distances.data();
+    auto compute = [&](auto* target) {
+        using O = typename std::remove_pointer<decltype(target)>::type;
+        expand_condensed_computation(static_cast<const O*>(source), indices, n, n_unique, target, num_threads,
+                                     static_cast<const O*>(diagonal_data));
+        return true;
+    };
+    return write_output(out, condensed_offset(n, n), compute);
 }
 
 // ----- single dispatch -------------------------------------------------------------------------------------------- //
-py::float_ cdr_dist_sd(const std::string& a, std::string& b,
+class CdrDistSd {
+    /**
+     * A CdrDist metric for single dispatch, which is prepared once for a substitution matrix and its gap penalties.
+     * Converting the substitution matrix costs far more than aligning two CDR3 sequences, so callers which compare many
+     * pairs under the same settings keep the prepared metric rather than converting the matrix on every call.
+     */
+private:
+    metric::CdrDist metric_;
+    token_index_map_t index_;
+
+public:
+    CdrDistSd(const double_matrix_t& substitution_matrix, const token_index_map_t& index,
+              const double& gap_opening_penalty, const double& gap_extension_penalty)
+        : metric_ {substitution_matrix, index, gap_opening_penalty, gap_extension_penalty}, index_ {index} {}
+
+    py::float_ operator () (const std::string& a, const std::string& b) const {
+        check_alphabet({a, b}, this->index_);
+        return single(this->metric_, a, b);
+    }
+};
+
+py::float_ cdr_dist_sd(const std::string& a, const std::string& b,
                        const double_matrix_t& substitution_matrix,
                        const token_index_map_t& index,
                        const double& gap_opening_penalty,
                        const double& gap_extension_penalty) {
-    metric::CdrDist metric {substitution_matrix, index, gap_opening_penalty, gap_extension_penalty};
-    double out = metric.forward(a, b);
-    return py::cast(out);
+    return CdrDistSd {substitution_matrix, index, gap_opening_penalty, gap_extension_penalty}(a, b);
 }
 
-py::float_ levenshtein_sd(const std::string& a, const std::string& b, const double& extra_cost) {
-    metric::Levenshtein metric {extra_cost};
-    double out = metric.forward(a, b);
-    return py::cast(out);
+py::float_ levenshtein_sd(const std::string& a, const std::string& b,
+                          const double& extra_cost,
+                          const py::object& max_distance) {
+    metric::Levenshtein metric {extra_cost, distance_bound(max_distance)};
+    return single(metric, a, b);
 }
 
 py::float_ tcr_dist_component_sd(const std::string& a, const std::string& b,
@@ -117,21 +1022,19 @@ py::float_ tcr_dist_component_sd(const std::string& a, const std::string& b,
                                  const double& gap_penalty,
                                  const char& gap_symbol,
                                  const double& distance_weight) {
+    check_alphabet({a, b}, index, std::string(1, gap_symbol));
     metric::TcrDist metric {substitution_matrix, index, gap_penalty, gap_symbol, distance_weight};
-    double out = metric.forward(a, b);
-    return py::cast(out);
+    return single(metric, a, b);
 }
 
 py::float_ hamming_sd(const std::string& a, const std::string& b, const double& mismatch_score) {
     metric::Hamming metric {mismatch_score};
-    double out = metric.forward(a, b);
-    return py::cast(out);
+    return single(metric, a, b);
 }
 
 py::float_ jaro_sd(const std::string& a, const std::string& b, const jaro_weighting_t& jaro_weights) {
     metric::Jaro metric {jaro_weights};
-    double out = metric.forward(a, b);
-    return py::cast(out);
+    return single(metric, a, b);
 }
 
 py::float_ jaro_winkler_sd(const std::string& a, const std::string& b,
@@ -139,60 +1042,269 @@ py::float_ jaro_winkler_sd(const std::string& a, const std::string& b,
                            const size_t& max_l,
                            const jaro_weighting_t& jaro_weights) {
     metric::JaroWinkler metric {p, max_l, metric::Jaro{jaro_weights}};
-    double out = metric.forward(a, b);
-    return py::cast(out);
+    return single(metric, a, b);
 }
 
 py::float_ longest_common_substring_sd(const std::string& a, const std::string& b) {
     metric::LongestCommonSubstring metric {};
-    double out = metric.forward(a, b);
-    return py::cast(out);
+    return single(metric, a, b);
 }
 
-py::float_ optimal_string_alignment_sd(const std::string& a, const std::string& b) {
-    metric::OptimalStringAlignment metric {};
-    double out = metric.forward(a, b);
-    return py::cast(out);
+py::float_ optimal_string_alignment_sd(const std::string& a, const std::string& b, const py::object& max_distance) {
+    metric::OptimalStringAlignment metric {distance_bound(max_distance)};
+    return single(metric, a, b);
 }
 
 // ----- module def ------------------------------------------------------------------------------------------------- //
 PYBIND11_MODULE(EXTENSION_NAME, m) {
     m.doc() = "Python module written in C++ for pairwise distance computation for sequences.";
 
+    m.def("effective_num_threads", &effective_num_threads,
+          "Resolve the number of threads a computation runs with for a requested number of threads.",
+          py::arg("num_threads") = 0);
+
     // pairwise
     m.def("cdr_dist", &cdr_dist, "Compute the pairwise CDR-dist metric for a set of CDR3 sequences.",
           py::arg("sequences"), py::arg("substitution_matrix"), py::arg("index"),
-          py::arg("gap_opening_penalty"), py::arg("gap_extension_penalty"));
+          py::arg("gap_opening_penalty"), py::arg("gap_extension_penalty"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
 
     m.def("levenshtein", &levenshtein, "Compute the pairwise Levenshtein distances for a set of sequences.",
-          py::arg("sequences"), py::arg("extra_cost"));
+          py::arg("sequences"), py::arg("extra_cost"), py::arg("max_distance") = py::none(),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
 
     m.def("tcr_dist_component", &tcr_dist_component, "Compute pairwise TCR-dist for a set of TCR components.",
           py::arg("sequences"), py::arg("substitution_matrix"), py::arg("index"),
-          py::arg("gap_penalty"), py::arg("gap_symbol"), py::arg("weight"));
+          py::arg("gap_penalty"), py::arg("gap_symbol"), py::arg("weight"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
+
+    m.def("tcr_dist", &tcr_dist,
+          "Compute the pairwise sum of several TCR-dist components for a set of prepared records.",
+          py::arg("records"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
 
     m.def("hamming", &hamming, "Compute pairwise Hamming distance for a set of sequences.",
-          py::arg("sequences"), py::arg("mismatch_score"));
+          py::arg("sequences"), py::arg("mismatch_score"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
 
     m.def("jaro", &jaro, "Compute pairwise Jaro distance for a set of sequences.",
-          py::arg("sequences"), py::arg("jaro_weights"));
+          py::arg("sequences"), py::arg("jaro_weights"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
 
     m.def("jaro_winkler", &jaro_winkler, "Compute pairwise Jaro-Winkler distance for a set of sequences.",
-          py::arg("sequences"), py::arg("p"), py::arg("max_l"), py::arg("jaro_weights"));
+          py::arg("sequences"), py::arg("p"), py::arg("max_l"), py::arg("jaro_weights"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
 
     m.def("longest_common_substring", &longest_common_substring, "Compute pairwise LCS for a set of sequences.",
-          py::arg("sequences"));
+          py::arg("sequences"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
 
     m.def("optimal_string_alignment", &optimal_string_alignment, "Compute pairwise OSA for a set of sequences.",
-          py::arg("sequences"));
+          py::arg("sequences"), py::arg("max_distance") = py::none(),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0, py::arg("rows") = py::none());
+
+    // cross
+    m.def("cdr_dist_cross", &cdr_dist_cross,
+          "Compute the CDR-dist metric between every query and every reference CDR3 sequence.",
+          py::arg("queries"), py::arg("references"), py::arg("substitution_matrix"), py::arg("index"),
+          py::arg("gap_opening_penalty"), py::arg("gap_extension_penalty"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("levenshtein_cross", &levenshtein_cross,
+          "Compute the Levenshtein distances between every query and every reference sequence.",
+          py::arg("queries"), py::arg("references"), py::arg("extra_cost"), py::arg("max_distance") = py::none(),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("tcr_dist_component_cross", &tcr_dist_component_cross,
+          "Compute TCR-dist between every query and every reference TCR component.",
+          py::arg("queries"), py::arg("references"), py::arg("substitution_matrix"), py::arg("index"),
+          py::arg("gap_penalty"), py::arg("gap_symbol"), py::arg("weight"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("tcr_dist_cross", &tcr_dist_cross,
+          "Compute the sum of several TCR-dist components between every query and every reference record.",
+          py::arg("queries"), py::arg("references"), py::arg("components"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("hamming_cross", &hamming_cross,
+          "Compute the Hamming distance between every query and every reference sequence.",
+          py::arg("queries"), py::arg("references"), py::arg("mismatch_score"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("jaro_cross", &jaro_cross, "Compute the Jaro distance between every query and every reference sequence.",
+          py::arg("queries"), py::arg("references"), py::arg("jaro_weights"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("jaro_winkler_cross", &jaro_winkler_cross,
+          "Compute the Jaro-Winkler distance between every query and every reference sequence.",
+          py::arg("queries"), py::arg("references"), py::arg("p"), py::arg("max_l"), py::arg("jaro_weights"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("longest_common_substring_cross", &longest_common_substring_cross,
+          "Compute the LCS between every query and every reference sequence.",
+          py::arg("queries"), py::arg("references"),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("optimal_string_alignment_cross", &optimal_string_alignment_cross,
+          "Compute the OSA between every query and every reference sequence.",
+          py::arg("queries"), py::arg("references"), py::arg("max_distance") = py::none(),
+          py::arg("out") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    // radius neighbors
+    m.def("cdr_dist_radius", &cdr_dist_radius,
+          "Find all pairs of sequences within a radius of each other under the CDR-dist metric.",
+          py::arg("sequences"), py::arg("substitution_matrix"), py::arg("index"),
+          py::arg("gap_opening_penalty"), py::arg("gap_extension_penalty"), py::arg("radius"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("levenshtein_radius", &levenshtein_radius,
+          "Find all pairs of sequences within a radius of each other under the Levenshtein distance.",
+          py::arg("sequences"), py::arg("extra_cost"), py::arg("radius"), py::arg("max_distance") = py::none(),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("tcr_dist_component_radius", &tcr_dist_component_radius,
+          "Find all pairs of sequences within a radius of each other under the TCR-dist.",
+          py::arg("sequences"), py::arg("substitution_matrix"), py::arg("index"),
+          py::arg("gap_penalty"), py::arg("gap_symbol"), py::arg("weight"), py::arg("radius"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("tcr_dist_radius", &tcr_dist_radius,
+          "Find all pairs of records within a radius of each other under the sum of several TCR-dist components.",
+          py::arg("records"), py::arg("components"), py::arg("radius"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("hamming_radius", &hamming_radius,
+          "Find all pairs of sequences within a radius of each other under the Hamming distance.",
+          py::arg("sequences"), py::arg("mismatch_score"), py::arg("radius"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("jaro_radius", &jaro_radius,
+          "Find all pairs of sequences within a radius of each other under the Jaro distance.",
+          py::arg("sequences"), py::arg("jaro_weights"), py::arg("radius"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("jaro_winkler_radius", &jaro_winkler_radius,
+          "Find all pairs of sequences within a radius of each other under the Jaro-Winkler distance.",
+          py::arg("sequences"), py::arg("p"), py::arg("max_l"), py::arg("jaro_weights"), py::arg("radius"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("longest_common_substring_radius", &longest_common_substring_radius,
+          "Find all pairs of sequences within a radius of each other under the LCS.",
+          py::arg("sequences"), py::arg("radius"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("optimal_string_alignment_radius", &optimal_string_alignment_radius,
+          "Find all pairs of sequences within a radius of each other under the OSA.",
+          py::arg("sequences"), py::arg("radius"), py::arg("max_distance") = py::none(),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    // nearest neighbors
+    m.def("cdr_dist_kneighbors", &cdr_dist_kneighbors,
+          "Find the k nearest neighbors of each sequence under the CDR-dist metric.",
+          py::arg("sequences"), py::arg("substitution_matrix"), py::arg("index"),
+          py::arg("gap_opening_penalty"), py::arg("gap_extension_penalty"), py::arg("k"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("levenshtein_kneighbors", &levenshtein_kneighbors,
+          "Find the k nearest neighbors of each sequence under the Levenshtein distance.",
+          py::arg("sequences"), py::arg("extra_cost"), py::arg("k"), py::arg("max_distance") = py::none(),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("tcr_dist_component_kneighbors", &tcr_dist_component_kneighbors,
+          "Find the k nearest neighbors of each sequence under the TCR-dist.",
+          py::arg("sequences"), py::arg("substitution_matrix"), py::arg("index"),
+          py::arg("gap_penalty"), py::arg("gap_symbol"), py::arg("weight"), py::arg("k"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("tcr_dist_kneighbors", &tcr_dist_kneighbors,
+          "Find the k nearest neighbors of each record under the sum of several TCR-dist components.",
+          py::arg("records"), py::arg("components"), py::arg("k"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("hamming_kneighbors", &hamming_kneighbors,
+          "Find the k nearest neighbors of each sequence under the Hamming distance.",
+          py::arg("sequences"), py::arg("mismatch_score"), py::arg("k"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("jaro_kneighbors", &jaro_kneighbors,
+          "Find the k nearest neighbors of each sequence under the Jaro distance.",
+          py::arg("sequences"), py::arg("jaro_weights"), py::arg("k"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("jaro_winkler_kneighbors", &jaro_winkler_kneighbors,
+          "Find the k nearest neighbors of each sequence under the Jaro-Winkler distance.",
+          py::arg("sequences"), py::arg("p"), py::arg("max_l"), py::arg("jaro_weights"), py::arg("k"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("longest_common_substring_kneighbors", &longest_common_substring_kneighbors,
+          "Find the k nearest neighbors of each sequence under the LCS.",
+          py::arg("sequences"), py::arg("k"),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    m.def("optimal_string_alignment_kneighbors", &optimal_string_alignment_kneighbors,
+          "Find the k nearest neighbors of each sequence under the OSA.",
+          py::arg("sequences"), py::arg("k"), py::arg("max_distance") = py::none(),
+          py::arg("references") = py::none(), py::arg("tile_size") = 0, py::arg("num_threads") = 0);
+
+    // repertoires
+    py::class_<Repertoire>(m, "Repertoire",
+                           "A set of sequences held in the form the distance computations take, such that they can be "
+                           "reused across calls without being converted again.")
+        .def(py::init<string_vector_t>(), py::arg("sequences"))
+        .def("__len__", &Repertoire::size)
+        .def("__getitem__", [](const Repertoire& self, const py::ssize_t& i) {
+            const auto& n = (py::ssize_t) self.size();
+            if (i < -n || i >= n) throw py::index_error("Repertoire index out of range");
+            return self.sequences()[i < 0 ? i + n : i];
+        }, py::arg("i"))
+        .def("__iter__", [](const Repertoire& self) {
+            return py::make_iterator(self.sequences().begin(), self.sequences().end());
+        }, py::keep_alive<0, 1>())
+        .def_property_readonly("lengths", [](const Repertoire& self) {
+            return as_array(self.lengths(), {(py::ssize_t) self.size()});
+        }, "The lengths (in bytes) of the sequences.")
+        .def("find_invalid", [](const Repertoire& self, const std::string& alphabet) {
+            auto&& invalid = self.find_invalid(alphabet);
+            const auto& n = (py::ssize_t) invalid.size();
+            return as_array(std::move(invalid), {n});
+        }, "Find the sequences which hold residues outside of an alphabet.", py::arg("alphabet"))
+        .def("holds_only", [](const Repertoire& self, const std::string& alphabet) {
+            return self.holds_only(alphabet_residues({}, alphabet));
+        }, "Whether all residues of the sequences are in an alphabet.", py::arg("alphabet"));
+
+    py::class_<TcrDistRecords>(m, "TcrDistRecords",
+                               "A set of TCR records, whose components are concatenated into one string, prepared for "
+                               "the pairwise TCR-dist computation.")
+        .def(py::init<string_vector_t, const tcr_dist_components_t&>(), py::arg("records"), py::arg("components"))
+        .def("__len__", &TcrDistRecords::size);
+
+    // duplicates
+    m.def("cdr_dist_diagonal", &cdr_dist_diagonal,
+          "Compute the CDR-dist metric between each CDR3 sequence and itself.",
+          py::arg("sequences"), py::arg("substitution_matrix"), py::arg("index"),
+          py::arg("gap_opening_penalty"), py::arg("gap_extension_penalty"),
+          py::arg("out") = py::none(), py::arg("num_threads") = 0);
+
+    m.def("expand_condensed", &expand_condensed,
+          "Expand the condensed distances among unique sequences to all pairs of their duplicates.",
+          py::arg("distances"), py::arg("inverse"), py::arg("out"), py::arg("num_threads") = 0,
+          py::arg("diagonal") = py::none());
 
     // single dispatch
     m.def("cdr_dist_sd", &cdr_dist_sd, "Compute the CDR-dist metric between two CDR3 sequences.",
           py::arg("a"), py::arg("b"), py::arg("substitution_matrix"), py::arg("index"),
           py::arg("gap_opening_penalty"), py::arg("gap_extension_penalty"));
 
+    py::class_<CdrDistSd>(m, "CdrDistSd",
+                          "A CDR-dist metric prepared once for a substitution matrix and gap penalties, which computes "
+                          "the distance between two CDR3 sequences when called.")
+        .def(py::init<const double_matrix_t&, const token_index_map_t&, const double&, const double&>(),
+             py::arg("substitution_matrix"), py::arg("index"),
+             py::arg("gap_opening_penalty"), py::arg("gap_extension_penalty"))
+        .def("__call__", &CdrDistSd::operator(), py::arg("a"), py::arg("b"));
+
     m.def("levenshtein_sd", &levenshtein_sd, "Compute the Levenshtein distance between two sequences.",
-          py::arg("a"), py::arg("b"), py::arg("extra_cost"));
+          py::arg("a"), py::arg("b"), py::arg("extra_cost"), py::arg("max_distance") = py::none());
 
     m.def("tcr_dist_component_sd", &tcr_dist_component_sd, "Compute TCR-dist between two TCR components.",
           py::arg("a"), py::arg("b"), py::arg("substitution_matrix"), py::arg("index"),
@@ -211,7 +1323,7 @@ PYBIND11_MODULE(EXTENSION_NAME, m) {
           py::arg("a"), py::arg("b"));
 
     m.def("optimal_string_alignment_sd", &optimal_string_alignment_sd, "Compute the OSA between two strings.",
-          py::arg("a"), py::arg("b"));
+          py::arg("a"), py::arg("b"), py::arg("max_distance") = py::none());
 
 #ifdef VERSION_INFO
     m.attr("__version__") = MACRO_STRINGIFY(VERSION_INFO);
@@ -0,0 +1,52 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#include <algorithm>
+
+#include "utils/BlockPartition.h"
+
+BlockPartition::BlockPartition(const string_vector_t& input_strings,
+                               const size_t& block_size,
+                               const size_t& min_blocks) :
+        BlockPartition(input_strings, 0, input_strings.size(), block_size, min_blocks) {}
+
+BlockPartition::BlockPartition(const string_vector_t& input_strings,
+                               const size_t& first,
+                               const size_t& last,
+                               const size_t& block_size,
+                               const size_t& min_blocks) : boundaries_{first} {
+    /**
+     * Partition a (contiguous range of a) set of sequences into contiguous blocks, which form the sides of the tiles the
+     * distance computation is traversed in. The blocks hold (approximately) the same total number of residues rather
+     * than the same number of sequences. The cost of comparing two sequences is roughly proportional to the product of
+     * their lengths, so any two off-diagonal tiles cost about the same, regardless of how the sequence lengths are
+     * distributed.
+     *
+     * @param input_strings: the sequences to be partitioned
+     * @param first: the index of the first sequence to be partitioned
+     * @param last: the index one past the last sequence to be partitioned
+     * @param block_size: the average number of sequences per block
+     * @param min_blocks: the minimum number of blocks, e.g. to produce enough tiles to keep all threads busy
+     */
+    if (last <= first) return;
+    const auto& n = last - first;
+
+    // prefix sums of the sequence lengths (length 0 still costs something)
+    auto&& length_sum = uint_vector_t (n + 1, 0);
+    for (size_t i = 0; i < n; i++)
+        length_sum[i + 1] = length_sum[i] + std::max(input_strings[first + i].size(), (size_t) 1);
+
+    const size_t n_blocks = std::min(std::max((n + block_size - 1) / block_size, min_blocks), n);
+    const auto& total_length = (double) length_sum[n];
+
+    for (size_t block = 1; block < n_blocks; block++) {
+        const auto& target = (size_t) (total_length * (double) block / (double) n_blocks);
+        const auto& boundary = std::lower_bound(length_sum.begin(), length_sum.end(), target);
+        const auto idx = first + (size_t) std::distance(length_sum.begin(), boundary);
+
+        if (idx > this->boundaries_.back() && idx < last)
+            this->boundaries_.push_back(idx);
+    }
+    this->boundaries_.push_back(last);
+}
@@ -0,0 +1,61 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#include <algorithm>
+#include <limits>
+
+#include "utils/NearestNeighbors.h"
+
+NearestNeighbors::NearestNeighbors(const size_t& n, const size_t& k) : k_(k), heaps_(n * k), sizes_(n, 0) {
+    /**
+     * Keep track of the `k` nearest neighbors of each of `n` sequences, using one bounded max-heap per sequence. The
+     * memory is O(n * k), independent of the number of candidates offered. A heap must not be offered candidates from
+     * two threads at the same time.
+     *
+     * @param n: the number of sequences
+     * @param k: the number of neighbors per sequence
+     */
+}
+
+void NearestNeighbors::offer(const size_t& row, const Candidate& candidate) {
+    /**
+     * Offer a candidate neighbor to a sequence. It is kept if it is closer than the furthest of the current neighbors.
+     *
+     * @param row: the index of the sequence
+     * @param candidate: the distance and index of the candidate neighbor
+     */
+    if (this->k_ == 0) return;
+
+    auto* heap = this->heaps_.data() + row * this->k_;
+    auto& size = this->sizes_[row];
+
+    if (size < this->k_) {
+        heap[size++] = candidate;
+        std::push_heap(heap, heap + size);
+    } else if (candidate < heap[0]) {
+        std::pop_heap(heap, heap + this->k_);
+        heap[this->k_ - 1] = candidate;
+        std::push_heap(heap, heap + this->k_);
+    }
+}
+
+void NearestNeighbors::write(index_t* indices, double* distances) {
+    /**
+     * Write the neighbors of every sequence, sorted by distance, into row-major (n x k) arrays. Sequences with fewer
+     * than `k` neighbors are padded with an index of -1 and an infinite distance.
+     *
+     * @param indices: the indices of the neighbors
+     * @param distances: the distances to the neighbors
+     */
+    for (size_t row = 0; row < this->sizes_.size(); row++) {
+        auto* heap = this->heaps_.data() + row * this->k_;
+        const auto& size = this->sizes_[row];
+        std::sort_heap(heap, heap + size);
+
+        for (size_t l = 0; l < this->k_; l++) {
+            indices[row * this->k_ + l] = l < size ? heap[l].index : -1;
+            distances[row * this->k_ + l] = l < size ? heap[l].distance : std::numeric_limits<double>::infinity();
+        }
+    }
+}
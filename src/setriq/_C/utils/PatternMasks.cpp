@@ -0,0 +1,31 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#include <algorithm>
+
+#include "utils/PatternMasks.h"
+
+constexpr size_t PatternMasks::word_size;
+
+void PatternMasks::assign(const char* pattern, const size_t& length) {
+    /**
+     * Set the masks to those of a new pattern. The object is meant to be reused for the rows of a distance computation,
+     * so only the masks of the characters of the previous pattern are cleared, rather than the masks of all 256.
+     *
+     * @param pattern: the characters of the pattern
+     * @param length: the length of the pattern
+     */
+    const size_t words = (length + word_size - 1) / word_size;
+    if (words != this->words_) {
+        this->words_ = words;
+        this->masks_.assign(256 * words, 0);
+    } else {
+        for (const auto& token : this->pattern_)
+            std::fill_n(&this->masks_[(unsigned char) token * words], words, 0);
+    }
+
+    this->pattern_.assign(pattern, length);
+    for (size_t i = 0; i < length; i++)
+        this->masks_[(unsigned char) pattern[i] * words + i / word_size] |= std::uint64_t {1} << (i % word_size);
+}
@@ -0,0 +1,55 @@
+//
+// Created by setriq contributors on 17/10/2026.
+//
+
+#include <array>
+#include <utility>
+
+#include "utils/Repertoire.h"
+
+Repertoire::Repertoire(string_vector_t sequences) : sequences_{std::move(sequences)}, residues_{} {
+    /**
+     * Hold a set of sequences in the form the distance computations take them, such that they can be reused across
+     * calls without being converted again. The residues the sequences hold are collected once, such that checking
+     * them against an alphabet does not take another pass over the sequences.
+     *
+     * @param sequences: the sequences
+     */
+    for (const auto& sequence : this->sequences_) {
+        for (const auto& residue : sequence) this->residues_.set((unsigned char) residue);
+    }
+}
+
+index_vector_t Repertoire::lengths() const {
+    /**
+     * The lengths (in bytes) of the sequences.
+     */
+    auto&& lengths = index_vector_t ();
+    lengths.reserve(this->sequences_.size());
+    for (const auto& sequence : this->sequences_) lengths.push_back((index_t) sequence.size());
+
+    return lengths;
+}
+
+index_vector_t Repertoire::find_invalid(const std::string &alphabet) const {
+    /**
+     * Find the sequences which hold residues outside of an alphabet. The residues are checked byte by byte against a
+     * lookup table, i.e. a multi-byte character of the alphabet makes each of its bytes valid.
+     *
+     * @param alphabet: the valid characters
+     * @return the indices of the sequences holding invalid residues, in ascending order
+     */
+    std::array<bool, 256> valid {};
+    for (const auto& c : alphabet) valid[(unsigned char) c] = true;
+
+    auto&& invalid = index_vector_t ();
+    for (size_t i = 0; i < this->sequences_.size(); i++) {
+        for (const auto& residue : this->sequences_[i]) {
+            if (!valid[(unsigned char) residue]) {
+                invalid.push_back((index_t) i);
+                break;
+            }
+        }
+    }
+    return invalid;
+}
@@ -51,6 +51,7 @@ from .modules import (
     Levenshtein,
     LongestCommonSubstring,
     OptimalStringAlignment,
+    Repertoire,
     SubstitutionMatrix,
     TcrDist,
     single_dispatch,
@@ -67,6 +68,7 @@ __all__ = [
     "Levenshtein",
     "LongestCommonSubstring",
     "OptimalStringAlignment",
+    "Repertoire",
     "SubstitutionMatrix",
     "TcrDist",
     "single_dispatch",
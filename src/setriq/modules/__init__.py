@@ -24,6 +24,7 @@ from .distances import (
     OptimalStringAlignment,
     TcrDist,
 )
+from .repertoire import Repertoire
 from .substitution import BLOSUM45, BLOSUM62, BLOSUM90, SubstitutionMatrix
 
 __all__ = [
@@ -39,5 +40,6 @@ __all__ = [
     "JaroWinkler",
     "LongestCommonSubstring",
     "OptimalStringAlignment",
+    "Repertoire",
     "single_dispatch",
 ]
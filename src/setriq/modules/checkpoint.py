@@ -0,0 +1,105 @@
+"""
+Checkpointing of distance computations written to disk.
+
+"""
+
+import os
+import pathlib
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import srsly
+
+__all__ = [
+    "Checkpoint",
+]
+
+RowRange = Tuple[int, int]
+
+
+class Checkpoint:
+    """
+    The sidecar manifest of a distance computation which is written to a memory-mapped ``.npy`` file. It records the
+    row ranges of the upper triangle whose distances have been written to the file, such that an interrupted computation
+    can be resumed where it stopped.
+
+    Attributes
+    ----------
+    path : pathlib.Path
+        the path of the manifest, i.e. the path of the output file with the suffix ``.manifest.json`` appended
+    fingerprint : str
+        identifies the computation (metric, its settings and the input sequences) the manifest belongs to
+    completed : List[Tuple[int, int]]
+        the sorted, disjoint row ranges ``[begin, end)`` which have been computed
+
+    """
+
+    suffix: str = ".manifest.json"
+
+    def __init__(
+        self,
+        output_path: Union[str, pathlib.Path],
+        fingerprint: str,
+        completed: Optional[List[RowRange]] = None,
+    ):
+        output_path = pathlib.Path(output_path)
+        self.path = output_path.with_name(output_path.name + self.suffix)
+        self.fingerprint = fingerprint
+        self.completed: List[RowRange] = completed or []
+
+    @classmethod
+    def load(
+        cls, output_path: Union[str, pathlib.Path], fingerprint: str
+    ) -> Optional["Checkpoint"]:
+        """
+        Load the manifest of an output file, if it exists and belongs to the same computation.
+
+        Parameters
+        ----------
+        output_path : Union[str, pathlib.Path]
+            the path of the output file
+        fingerprint : str
+            identifies the computation to be resumed
+
+        Returns
+        -------
+        checkpoint : Checkpoint, optional
+            the checkpoint of the computation, or ``None`` if there is nothing to resume from
+
+        """
+        checkpoint = cls(output_path, fingerprint)
+        if not checkpoint.path.exists():
+            return None
+
+        try:
+            values: Dict[str, Any] = srsly.read_json(checkpoint.path)
+        except ValueError:
+            return None
+        if values.get("fingerprint") != fingerprint:
+            return None
+
+        checkpoint.completed = [(begin, end) for begin, end in values["completed"]]
+        return checkpoint
+
+    def save(self) -> None:
+        # the manifest is replaced atomically, so that an interruption never leaves a partially written manifest behind
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        srsly.write_json(
+            tmp, {"fingerprint": self.fingerprint, "completed": self.completed}
+        )
+        os.replace(tmp, self.path)
+
+    def contains(self, begin: int, end: int) -> bool:
+        """Check whether the rows ``[begin, end)`` have been computed."""
+        return any(lo <= begin and end <= hi for lo, hi in self.completed)
+
+    def add(self, begin: int, end: int) -> None:
+        """Record the rows ``[begin, end)`` as computed and save the manifest."""
+        completed: List[RowRange] = []
+        for lo, hi in sorted([*self.completed, (begin, end)]):
+            if completed and lo <= completed[-1][1]:
+                completed[-1] = (completed[-1][0], max(completed[-1][1], hi))
+            else:
+                completed.append((lo, hi))
+
+        self.completed = completed
+        self.save()
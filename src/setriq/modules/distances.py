@@ -4,36 +4,50 @@ Python API for sequence distance functions.
 """
 
 import abc
+import hashlib
+import pathlib
 import warnings
 from typing import (
     Any,
+    Callable,
     Dict,
     Generic,
+    Iterable,
+    Iterator,
     List,
     Optional,
     Sequence,
     Set,
+    Tuple,
     TypeVar,
     Union,
 )
 
 import numpy as np
 import numpy.typing as npt
-import pandas as pd
-from glom import glom
-from scipy import spatial
+import srsly
+from scipy import sparse, spatial
 from sklearn import preprocessing
 
 import setriq._C as C
 
+from .checkpoint import Checkpoint
+from .repertoire import Repertoire
 from .substitution import BLOSUM45, SubstitutionMatrix
 from .utils import (
     TCR_DIST_DEFAULT,
     TcrDistDef,
+    check_dtype,
     check_jaro_weights,
     check_jaro_winkler_params,
+    check_max_distance,
+    check_n_jobs,
+    condensed_offset,
     enforce_list,
     ensure_equal_sequence_length,
+    ensure_equal_sequence_length_cross,
+    row_chunks,
+    unique_records,
 )
 
 __all__ = [
@@ -48,7 +62,18 @@ __all__ = [
     "OptimalStringAlignment",
 ]
 
-FloatArray = npt.NDArray[np.float64]
+# float64 (default), float32, uint16 or uint8
+DistanceArray = npt.NDArray[Any]
+# the rows, columns and distances of pairs of neighboring sequences
+NeighborArrays = Tuple[
+    npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.float64]
+]
+# the (n x k) indices and distances of the nearest neighbors of each sequence
+KNeighborArrays = Tuple[npt.NDArray[np.int64], npt.NDArray[np.float64]]
+DEFAULT_CHUNK_PAIRS = 2**24
+# the largest share of unique sequences for which the distances are computed among the unique sequences only, i.e. at
+# least ~19% of the pairs are saved
+MAX_UNIQUE_FRACTION = 0.9
 SeqRecord = TypeVar("SeqRecord", bound=Union[str, Dict[str, str]])
 
 
@@ -62,26 +87,645 @@ class Metric(abc.ABC, Generic[SeqRecord]):
     forward(self, *args, **kwargs):
         an abstract method which needs to be implemented in every subclass. It is accessed via the ``__call__`` method
         of the base class.
+    forward_cross(self, queries, references):
+        computes the distances between two sets of sequences. It is accessed via the ``cross`` method of the base
+        class. By default, it dispatches to ``cross_fn`` with the ``call_args`` of the instance.
+    forward_radius(self, sequences, references, radius):
+        finds the pairs of sequences within ``radius`` of each other. It is accessed via the ``radius_pairs`` method of
+        the base class. By default, it dispatches to ``radius_fn`` with the ``call_args`` of the instance.
+    forward_kneighbors(self, sequences, references, k):
+        finds the ``k`` nearest neighbors of each sequence. It is accessed via the ``kneighbors`` method of the base
+        class. By default, it dispatches to ``kneighbors_fn`` with the ``call_args`` of the instance.
+    forward_diagonal(self, sequences):
+        computes the distance of each sequence to itself, which deduplication assigns to pairs of identical sequences.
+        By default, it returns None, i.e. the distance of a sequence to itself is 0.
+
+    Keyword arguments of the subclasses which are not specific to the metric (e.g. ``tile_size`` or ``n_jobs``) are
+    passed on to the base class.
 
     """
 
     call_args: Dict[str, Any]
+    cross_fn: Callable[..., DistanceArray]
+    radius_fn: Callable[..., NeighborArrays]
+    kneighbors_fn: Callable[..., KNeighborArrays]
+
+    def __init__(
+        self,
+        return_squareform: bool = False,
+        tile_size: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        dtype: npt.DTypeLike = np.float64,
+        deduplicate: bool = True,
+    ):
+        """
+        Initialize the settings shared by all metrics.
+
+        Parameters
+        ----------
+        return_squareform : bool
+            whether to return the square distance matrix instead of its flat upper triangle (default = False)
+        tile_size : int, optional
+            the (average) number of sequences along each side of the tiles in which the distance matrix is computed.
+            The sequences of a tile are kept in cache while its distances are computed. If not set, the default of the
+            C++ engine is used.
+        n_jobs : int, optional
+            the number of threads used to compute the distances. If not set, the OpenMP default is used, which can be
+            set through ``OMP_NUM_THREADS`` or limited with ``threadpoolctl``. Negative values count back from the
+            default, i.e. ``-1`` uses all threads and ``-2`` all but one.
+        dtype : np.dtype
+            the dtype of the computed distances, one of ``float64`` (default), ``float32``, ``uint16`` or ``uint8``. The
+            compact dtypes reduce the memory of the output by a factor 2-8. Integer dtypes are suited to metrics with
+            integer distances (e.g. ``Levenshtein``) -- an ``OverflowError`` is raised for distances which they cannot
+            represent exactly.
+        deduplicate : bool
+            whether to compute the pairwise distances among the unique sequences only and copy them to the pairs of
+            their duplicates (default = True). This cuts the number of computed pairs quadratically in the number of
+            duplicates, e.g. by half if 30% of the sequences are repeats. Identical sequences are at the distance of a
+            sequence to itself (see ``forward_diagonal``).
+            It has no effect on metrics whose settings make them asymmetric (see ``symmetric``).
+
+        """
+        if tile_size is not None and tile_size < 1:
+            raise ValueError("`tile_size` must be a positive integer")
+        check_n_jobs(n_jobs)
 
-    def __init__(self, return_squareform: bool = False):
         self.return_squareform = return_squareform
+        self.tile_size = tile_size
+        self.n_jobs = n_jobs
+        self.dtype = check_dtype(dtype)
+        self.deduplicate = deduplicate
+
+    def engine_args(self, n_jobs: Optional[int] = None) -> Dict[str, Any]:
+        # keyword arguments understood by all C++ entry points -- they control how, not what, is computed
+        check_n_jobs(n_jobs)
+        if n_jobs is None:
+            n_jobs = self.n_jobs
+
+        return {"tile_size": self.tile_size or 0, "num_threads": n_jobs or 0}
+
+    def _allocate(self, size: int) -> Optional[DistanceArray]:
+        # float64 outputs are allocated by the C++ engine, all others are passed to it as output buffers
+        if self.dtype == np.float64:
+            return None
+        return np.empty(size, dtype=self.dtype)
 
     @abc.abstractmethod
-    def forward(self, sequences: Sequence[SeqRecord]) -> List[float]:
+    def forward(
+        self,
+        sequences: Sequence[SeqRecord],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
         pass
 
     @enforce_list(argnum=1, convert_iterable=True)
-    def __call__(self, sequences: Sequence[SeqRecord]) -> FloatArray:
-        out = np.array(self.forward(sequences))
+    def __call__(
+        self,
+        sequences: Sequence[SeqRecord],
+        out: Optional[DistanceArray] = None,
+        n_jobs: Optional[int] = None,
+    ) -> DistanceArray:
+        """
+        Compute the pairwise distances between all sequences.
+
+        Parameters
+        ----------
+        sequences : Sequence[SeqRecord]
+            the sequences to be compared
+        out : np.ndarray, optional
+            a C-contiguous float64 array of length ``N * (N - 1) / 2`` into which the (flat) distances are written. It
+            can be reused across calls to avoid allocating a new output buffer every time.
+        n_jobs : int, optional
+            the number of threads used for this call, overriding the ``n_jobs`` of the metric
+
+        Returns
+        -------
+        distances : np.ndarray
+            the flat upper triangle of the distance matrix, or its square form if ``return_squareform`` is set
+
+        """
+        n = len(sequences)
+        if self.deduplicate and self.symmetric and n > 2:
+            uniques, inverse = self._unique(sequences)
+            # the copying of the distances only pays off if it saves a sizeable share of the pairs
+            if len(uniques) <= MAX_UNIQUE_FRACTION * n:
+                distances = self._expand(uniques, inverse, out, n_jobs)
+                if self.return_squareform:
+                    distances = spatial.distance.squareform(distances)
+
+                return distances
+
+        if out is None:
+            out = self._allocate(condensed_offset(n, n))
+        distances = self.forward(sequences, out=out, **self.engine_args(n_jobs))
+        if self.return_squareform:
+            distances = spatial.distance.squareform(distances)
+
+        return distances
+
+    @property
+    def symmetric(self) -> bool:
+        # whether the distance between two sequences does not depend on their order, which deduplication relies on
+        return True
+
+    def _prepare(self, sequences: Sequence[SeqRecord]) -> Any:
+        # the sequences in the form ``forward`` takes them, such that computing their distances in chunks converts and
+        # checks them once rather than for every chunk
+        if isinstance(sequences, Repertoire):
+            return sequences
+        return Repertoire(sequences)  # type: ignore[arg-type]
+
+    def _unique(
+        self, sequences: Sequence[SeqRecord]
+    ) -> Tuple[Sequence[SeqRecord], npt.NDArray[np.int64]]:
+        if isinstance(sequences, Repertoire):
+            return sequences.unique()  # type: ignore[return-value]
+        return unique_records(sequences)
+
+    def _expand(
+        self,
+        uniques: Sequence[SeqRecord],
+        inverse: npt.NDArray[np.int64],
+        out: Optional[DistanceArray],
+        n_jobs: Optional[int],
+    ) -> DistanceArray:
+        # compute the distances among the unique sequences and copy them to all pairs of their duplicates
+        args = self.engine_args(n_jobs)
+        m = len(uniques)
+        if isinstance(out, np.ndarray):
+            unique_out: Optional[DistanceArray] = np.empty(
+                condensed_offset(m, m), dtype=out.dtype
+            )
+        else:
+            unique_out = self._allocate(condensed_offset(m, m))
+        distances = self.forward(uniques, out=unique_out, **args)
+        diagonal = self.forward_diagonal(
+            uniques,
+            out=np.empty(m, dtype=distances.dtype),
+            num_threads=args["num_threads"],
+        )
+
+        if out is None:
+            out = np.empty(
+                condensed_offset(len(inverse), len(inverse)), distances.dtype
+            )
+        return C.expand_condensed(
+            distances,
+            inverse,
+            out=out,
+            num_threads=args["num_threads"],
+            diagonal=diagonal,
+        )
+
+    def forward_diagonal(
+        self,
+        sequences: Sequence[SeqRecord],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> Optional[DistanceArray]:
+        # the distance of each sequence to itself, or None if it is 0 for all sequences. Metrics under which it is not
+        # (e.g. ``CdrDist``) override this to compute it with their kernel
+        return None
+
+    @enforce_list(argnum=1, convert_iterable=True)
+    def unique_distances(
+        self,
+        sequences: Sequence[SeqRecord],
+        n_jobs: Optional[int] = None,
+    ) -> Tuple[Sequence[SeqRecord], DistanceArray, npt.NDArray[np.int64]]:
+        """
+        Compute the pairwise distances among the unique sequences only, without copying them to the pairs of their
+        duplicates. For highly redundant repertoires, this result is much smaller than the full distance matrix.
+
+        Parameters
+        ----------
+        sequences : Sequence[SeqRecord]
+            the sequences to be compared
+        n_jobs : int, optional
+            the number of threads used for this call, overriding the ``n_jobs`` of the metric
+
+        Returns
+        -------
+        uniques : Sequence[SeqRecord]
+            the unique sequences, in order of their first appearance (a ``Repertoire`` if ``sequences`` is one)
+        distances : np.ndarray
+            the distances among ``uniques``, as the flat upper triangle of the distance matrix or its square form (if
+            ``return_squareform`` is set). The diagonal of the square form holds the distance of each unique sequence
+            to itself.
+        inverse : np.ndarray
+            the index into ``uniques`` of every sequence, i.e. the distance between ``sequences[i]`` and
+            ``sequences[j]`` is that between ``uniques[inverse[i]]`` and ``uniques[inverse[j]]``. For metrics which are
+            not ``symmetric``, the distance between two unique sequences is oriented by the order of their first
+            appearance.
+
+        Examples
+        --------
+        >>> metric = Levenshtein(return_squareform=True)
+        >>> uniques, distances, inverse = metric.unique_distances(sequences)
+        >>> distances[inverse[0], inverse[1]]  # the distance between sequences[0] and sequences[1]
+
+        """
+        uniques, inverse = self._unique(sequences)
+        m = len(uniques)
+        distances = self.forward(
+            uniques,
+            out=self._allocate(condensed_offset(m, m)),
+            **self.engine_args(n_jobs),
+        )
         if self.return_squareform:
-            out = spatial.distance.squareform(out)
+            diagonal = self.forward_diagonal(
+                uniques,
+                out=np.empty(m, dtype=distances.dtype),
+                num_threads=self.engine_args(n_jobs)["num_threads"],
+            )
+            distances = spatial.distance.squareform(distances)
+            if diagonal is not None:
+                np.fill_diagonal(distances, diagonal)
+
+        return uniques, distances, inverse
+
+    def forward_cross(
+        self,
+        queries: Sequence[SeqRecord],
+        references: Sequence[SeqRecord],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        distances = self.cross_fn(
+            queries, references, out=out, **self.call_args, **kwargs
+        )
+
+        return distances
+
+    @enforce_list(argnum=1, convert_iterable=True)
+    @enforce_list(argnum=2, convert_iterable=True)
+    def cross(
+        self,
+        queries: Sequence[SeqRecord],
+        references: Sequence[SeqRecord],
+        out: Optional[DistanceArray] = None,
+        n_jobs: Optional[int] = None,
+    ) -> DistanceArray:
+        """
+        Compute the distances between every query and every reference sequence. Unlike ``__call__``, no distances are
+        computed within ``queries`` or within ``references``, which makes this the method of choice for looking up a
+        (small) set of sequences in a (large) reference database.
+
+        Parameters
+        ----------
+        queries : Sequence[SeqRecord]
+            the sequences to be looked up
+        references : Sequence[SeqRecord]
+            the sequences to be compared against
+        out : np.ndarray, optional
+            a C-contiguous float64 array with ``len(queries) * len(references)`` elements into which the distances are
+            written
+        n_jobs : int, optional
+            the number of threads used for this call, overriding the ``n_jobs`` of the metric
+
+        Returns
+        -------
+        distances : np.ndarray
+            a ``len(queries) x len(references)`` matrix, where element ``(i, j)`` holds the distance between
+            ``queries[i]`` and ``references[j]``
+
+        Examples
+        --------
+        >>> metric = Levenshtein()
+        >>> metric.cross(['CASSLKPNTEAFF'], ['CASSAHIANYGYTF', 'CASRGATETQYF'])
+        ... array([[8., 8.]])
+
+        """
+        if out is None:
+            out = self._allocate(len(queries) * len(references))
+        distances = self.forward_cross(
+            queries, references, out=out, **self.engine_args(n_jobs)
+        )
+        distances = distances.reshape(len(queries), len(references))
+
+        return distances
+
+    def forward_radius(
+        self,
+        sequences: Sequence[SeqRecord],
+        references: Optional[Sequence[SeqRecord]],
+        radius: float,
+        **kwargs: Any,
+    ) -> NeighborArrays:
+        neighbors = self.radius_fn(
+            sequences, **self.call_args, radius=radius, references=references, **kwargs
+        )
+
+        return neighbors
+
+    @enforce_list(argnum=1, convert_iterable=True)
+    def radius_pairs(
+        self,
+        sequences: Sequence[SeqRecord],
+        radius: float,
+        references: Optional[Sequence[SeqRecord]] = None,
+        return_sparse: bool = True,
+        n_jobs: Optional[int] = None,
+    ) -> Union[sparse.csr_matrix, NeighborArrays]:
+        """
+        Find all pairs of sequences within a distance of ``radius`` of each other. Only those pairs are kept, such that
+        the memory scales with the number of neighbors rather than with the number of pairs.
+
+        Parameters
+        ----------
+        sequences : Sequence[SeqRecord]
+            the sequences to be compared
+        radius : float
+            the maximum distance (inclusive) between two neighboring sequences
+        references : Sequence[SeqRecord], optional
+            if set, the sequences are compared against the references (as in ``cross``) instead of each other
+        return_sparse : bool
+            whether to return a sparse matrix rather than the ``(rows, columns, distances)`` arrays of the pairs
+            (default = True)
+        n_jobs : int, optional
+            the number of threads used for this call, overriding the ``n_jobs`` of the metric
+
+        Returns
+        -------
+        neighbors : Union[sparse.csr_matrix, Tuple[np.ndarray, np.ndarray, np.ndarray]]
+            if ``return_sparse``, a ``len(sequences) x len(sequences)`` (or ``len(sequences) x len(references)``)
+            sparse matrix of the distances between neighbors. It is symmetric if no references are given. Neighbors at a
+            distance of 0 are stored explicitly, i.e. only the stored elements of the matrix are neighbors. Otherwise,
+            the rows, columns and distances of the pairs, ordered by row and column. Without references, only the pairs
+            with ``row < column`` are returned.
+
+        Examples
+        --------
+        >>> metric = Levenshtein()
+        >>> neighbors = metric.radius_pairs(sequences, radius=2)
+        >>> n_neighbors = neighbors.getnnz(axis=1)
+
+        """
+        if references is not None and not isinstance(references, Repertoire):
+            references = list(references)
+        rows, columns, distances = self.forward_radius(
+            sequences, references, radius, **self.engine_args(n_jobs)
+        )
+        if not return_sparse:
+            return rows, columns, distances
+
+        if references is None:
+            shape = (len(sequences), len(sequences))
+            rows, columns = np.concatenate([rows, columns]), np.concatenate(
+                [columns, rows]
+            )
+            distances = np.concatenate([distances, distances])
+        else:
+            shape = (len(sequences), len(references))
+
+        return sparse.csr_matrix((distances, (rows, columns)), shape=shape)
+
+    def forward_kneighbors(
+        self,
+        sequences: Sequence[SeqRecord],
+        references: Optional[Sequence[SeqRecord]],
+        k: int,
+        **kwargs: Any,
+    ) -> KNeighborArrays:
+        neighbors = self.kneighbors_fn(
+            sequences, **self.call_args, k=k, references=references, **kwargs
+        )
+
+        return neighbors
+
+    @enforce_list(argnum=1, convert_iterable=True)
+    def kneighbors(
+        self,
+        sequences: Sequence[SeqRecord],
+        k: int,
+        references: Optional[Sequence[SeqRecord]] = None,
+        return_sparse: bool = False,
+        n_jobs: Optional[int] = None,
+    ) -> Union[KNeighborArrays, sparse.csr_matrix]:
+        """
+        Find the ``k`` nearest neighbors of each sequence, either among the other sequences or among the references.
+        Only the neighbors are kept, such that the memory scales with ``len(sequences) * k`` rather than with the number
+        of pairs. Ties in distance are broken by the index of the neighbor, i.e. the result is deterministic.
+
+        Parameters
+        ----------
+        sequences : Sequence[SeqRecord]
+            the sequences whose neighbors are searched for
+        k : int
+            the number of neighbors per sequence
+        references : Sequence[SeqRecord], optional
+            if set, the neighbors are searched for among the references instead of the other sequences
+        return_sparse : bool
+            whether to return the neighbors as a sparse kNN graph rather than the ``(indices, distances)`` arrays
+            (default = False)
+        n_jobs : int, optional
+            the number of threads used for this call, overriding the ``n_jobs`` of the metric
+
+        Returns
+        -------
+        neighbors : Union[Tuple[np.ndarray, np.ndarray], sparse.csr_matrix]
+            if ``return_sparse``, a ``len(sequences) x len(sequences)`` (or ``len(sequences) x len(references)``)
+            sparse matrix with the distances to the ``k`` neighbors of each row. Neighbors at a distance of 0 are stored
+            explicitly. Otherwise, the ``len(sequences) x k`` indices and distances of the neighbors, sorted by
+            distance. A sequence is never its own neighbor.
+
+        Examples
+        --------
+        >>> metric = Levenshtein()
+        >>> indices, distances = metric.kneighbors(sequences, k=10)
+
+        """
+        if references is not None and not isinstance(references, Repertoire):
+            references = list(references)
+        available = len(sequences) - 1 if references is None else len(references)
+        if not 1 <= k <= available:
+            raise ValueError(
+                f"k must be between 1 and {available} (the number of candidate neighbors), got {k}"
+            )
+
+        indices, distances = self.forward_kneighbors(
+            sequences, references, k, **self.engine_args(n_jobs)
+        )
+        if not return_sparse:
+            return indices, distances
+
+        n_columns = len(sequences) if references is None else len(references)
+        indptr = np.arange(0, indices.size + 1, k)
+        return sparse.csr_matrix(
+            (distances.ravel(), indices.ravel(), indptr),
+            shape=(len(sequences), n_columns),
+        )
+
+    @enforce_list(argnum=1, convert_iterable=True)
+    def iter_chunks(
+        self,
+        sequences: Sequence[SeqRecord],
+        chunk_pairs: int = DEFAULT_CHUNK_PAIRS,
+        n_jobs: Optional[int] = None,
+    ) -> Iterator[Tuple[int, DistanceArray]]:
+        """
+        Compute the pairwise distances between all sequences chunk by chunk. Each chunk is a contiguous segment of the
+        flat upper triangle returned by ``__call__`` and is only computed once it is requested, so that distance
+        matrices which do not fit into memory can be processed (and discarded) piece by piece.
+
+        Parameters
+        ----------
+        sequences : Sequence[SeqRecord]
+            the sequences to be compared
+        chunk_pairs : int
+            the maximum number of distances per chunk. Chunks hold complete rows of the upper triangle, i.e. the
+            distances of a sequence to all subsequent ones, so a chunk exceeds ``chunk_pairs`` if a single row does.
+            (default = 2 ** 24, i.e. 128 MB per chunk)
+        n_jobs : int, optional
+            the number of threads used for this call, overriding the ``n_jobs`` of the metric
+
+        Yields
+        ------
+        start : int
+            the index of the first distance of the chunk in the flat upper triangle
+        distances : np.ndarray
+            the distances of the chunk
+
+        Examples
+        --------
+        >>> metric = Levenshtein()
+        >>> for start, distances in metric.iter_chunks(sequences, chunk_pairs=1_000_000):
+        ...     neighbours = start + np.flatnonzero(distances <= 1)
+
+        """
+        if chunk_pairs < 1:
+            raise ValueError("`chunk_pairs` must be a positive integer")
+
+        n = len(sequences)
+        engine_args = self.engine_args(n_jobs)
+        prepared = self._prepare(sequences)
+        for row_begin, row_end in row_chunks(n, chunk_pairs):
+            start, stop = (condensed_offset(row, n) for row in (row_begin, row_end))
+            distances = self.forward(
+                prepared,
+                out=self._allocate(stop - start),
+                rows=(row_begin, row_end),
+                **engine_args,
+            )
+            yield start, distances
+
+    @enforce_list(argnum=1, convert_iterable=True)
+    def memmap(
+        self,
+        sequences: Sequence[SeqRecord],
+        path: Union[str, pathlib.Path],
+        return_squareform: Optional[bool] = None,
+        chunk_pairs: int = DEFAULT_CHUNK_PAIRS,
+        resume: bool = True,
+        n_jobs: Optional[int] = None,
+    ) -> np.memmap:
+        """
+        Compute the pairwise distances between all sequences straight into a memory-mapped ``.npy`` file, for distance
+        matrices which do not fit into memory. The distances are computed in chunks (see ``iter_chunks``) and every
+        completed chunk is recorded in a sidecar manifest (``<path>.manifest.json``). If the computation is interrupted,
+        calling this method again with the same metric and sequences resumes it from the last completed chunk.
+
+        Parameters
+        ----------
+        sequences : Sequence[SeqRecord]
+            the sequences to be compared
+        path : Union[str, pathlib.Path]
+            the path of the ``.npy`` file to which the distances are written
+        return_squareform : bool, optional
+            whether to write the square distance matrix instead of its flat upper triangle. Defaults to the
+            ``return_squareform`` of the metric.
+        chunk_pairs : int
+            the maximum number of distances per chunk, i.e. the granularity of the checkpoints (default = 2 ** 24)
+        resume : bool
+            whether to resume from an existing manifest. If ``False``, or if the manifest belongs to a different
+            computation, the file is overwritten. (default = True)
+        n_jobs : int, optional
+            the number of threads used for this call, overriding the ``n_jobs`` of the metric
+
+        Returns
+        -------
+        distances : np.memmap
+            the distances, memory-mapped from ``path``
+
+        Examples
+        --------
+        >>> metric = TcrDist()
+        >>> distances = metric.memmap(sequences, 'distances.npy')  # rerun after an interruption to resume
+
+        """
+        if chunk_pairs < 1:
+            raise ValueError("`chunk_pairs` must be a positive integer")
+        if return_squareform is None:
+            return_squareform = self.return_squareform
+
+        n = len(sequences)
+        shape = (n, n) if return_squareform else (condensed_offset(n, n),)
+        fingerprint = self._fingerprint(sequences, return_squareform)
+
+        checkpoint = Checkpoint.load(path, fingerprint) if resume else None
+        out: Optional[np.memmap] = None
+        if checkpoint is not None and pathlib.Path(path).exists():
+            out = np.lib.format.open_memmap(path, mode="r+")
+            if out.shape != shape or out.dtype != self.dtype:
+                out = None
+        if out is None:
+            out = np.lib.format.open_memmap(
+                path, mode="w+", dtype=self.dtype, shape=shape
+            )
+            checkpoint = Checkpoint(path, fingerprint)
+            checkpoint.save()
+
+        engine_args = self.engine_args(n_jobs)
+        prepared = None
+        for row_begin, row_end in row_chunks(n, chunk_pairs):
+            if checkpoint.contains(row_begin, row_end):  # type: ignore[union-attr]
+                continue
+            if prepared is None:
+                prepared = self._prepare(sequences)
+
+            if return_squareform:
+                start, stop = (condensed_offset(row, n) for row in (row_begin, row_end))
+                distances = self.forward(
+                    prepared,
+                    out=self._allocate(stop - start),
+                    rows=(row_begin, row_end),
+                    **engine_args,
+                )
+                _scatter_rows(out, distances, row_begin, row_end)
+            else:
+                start, stop = (condensed_offset(row, n) for row in (row_begin, row_end))
+                self.forward(
+                    prepared,
+                    out=out[start:stop],
+                    rows=(row_begin, row_end),
+                    **engine_args,
+                )
+            # the distances have to be on disk before they are recorded as completed
+            out.flush()
+            checkpoint.add(row_begin, row_end)  # type: ignore[union-attr]
 
         return out
 
+    @property
+    def settings(self) -> Dict[str, Any]:
+        # the settings which determine the computed distances, e.g. to identify a computation which is to be resumed
+        return self.call_args
+
+    def _fingerprint(
+        self, sequences: Sequence[SeqRecord], return_squareform: bool
+    ) -> str:
+        digest = hashlib.sha256(type(self).__name__.encode())
+        digest.update(
+            srsly.json_dumps(
+                [self.settings, return_squareform], sort_keys=True
+            ).encode()
+        )
+        for record in sequences:
+            digest.update(srsly.json_dumps(record, sort_keys=True).encode())
+
+        return digest.hexdigest()
+
     def to_sklearn(self) -> preprocessing.FunctionTransformer:
         """Creates a FunctionTransformer from a given Metric instance.
 
@@ -98,6 +742,24 @@ class Metric(abc.ABC, Generic[SeqRecord]):
         )
 
 
+def _scatter_rows(
+    out: DistanceArray,
+    distances: DistanceArray,
+    row_begin: int,
+    row_end: int,
+) -> None:
+    # write the rows [row_begin, row_end) of the flat upper triangle into a square distance matrix, together with their
+    # mirror image in the lower triangle. Both are written as (row-wise) contiguous blocks
+    n, n_rows = len(out), row_end - row_begin
+    block = np.zeros((n_rows, n - row_begin), dtype=out.dtype)
+    block[np.triu_indices(n_rows, k=1, m=n - row_begin)] = distances
+
+    diagonal = block[:, :n_rows]
+    diagonal += diagonal.T
+    out[row_begin:row_end, row_begin:] = block
+    out[row_end:, row_begin:row_end] = block[:, n_rows:].T
+
+
 class CdrDist(Metric[str]):
     """
     The CdrDist [1]_ class. Inherits from Metric.
@@ -122,17 +784,37 @@ class CdrDist(Metric[str]):
         gap_opening_penalty: float = 10.0,
         gap_extension_penalty: float = 1.0,
         return_squareform: bool = False,
+        **kwargs: Any,
     ):
-        super(CdrDist, self).__init__(return_squareform)
+        super(CdrDist, self).__init__(return_squareform, **kwargs)
         self.call_args = {
             **substitution_matrix,
             "gap_opening_penalty": gap_opening_penalty,
             "gap_extension_penalty": gap_extension_penalty,
         }
         self.fn = C.cdr_dist
+        self.cross_fn = C.cdr_dist_cross
+        self.radius_fn = C.cdr_dist_radius
+        self.kneighbors_fn = C.cdr_dist_kneighbors
 
-    def forward(self, sequences: Sequence[str]) -> List[float]:
-        out = self.fn(sequences, **self.call_args)
+    def forward(
+        self,
+        sequences: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.fn(sequences, out=out, **self.call_args, **kwargs)
+
+        return out
+
+    def forward_diagonal(
+        self,
+        sequences: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> Optional[DistanceArray]:
+        # the distance of a sequence to itself is not necessarily 0, e.g. it is undefined (NaN) for the empty sequence
+        out = C.cdr_dist_diagonal(sequences, out=out, **self.call_args, **kwargs)
 
         return out
 
@@ -148,6 +830,9 @@ class Levenshtein(Metric[str]):
     >>>
     >>> metric = Levenshtein()
     >>> distances = metric(sequences)
+    >>>
+    >>> metric = Levenshtein(max_distance=3)  # distances above 3 are reported as 4
+    >>> distances = metric(sequences)
 
     References
     ----------
@@ -157,13 +842,40 @@ class Levenshtein(Metric[str]):
 
     """
 
-    def __init__(self, extra_cost: float = 0.0, return_squareform: bool = False):
-        super(Levenshtein, self).__init__(return_squareform)
-        self.call_args = {"extra_cost": extra_cost}
+    def __init__(
+        self,
+        extra_cost: float = 0.0,
+        return_squareform: bool = False,
+        max_distance: Optional[float] = None,
+        **kwargs: Any,
+    ):
+        """
+        Initialize a Levenshtein object.
+
+        Parameters
+        ----------
+        extra_cost : float
+            the additional cost of a substitution, i.e. substitutions cost ``1 + extra_cost`` (default = 0.0)
+        max_distance : float, optional
+            if set, distances above ``max_distance`` are reported as ``max_distance + 1``. The computation of a distance
+            stops as soon as it is bound to exceed it, which makes small cutoffs much faster to apply.
+
+        """
+        check_max_distance(max_distance)
+        super(Levenshtein, self).__init__(return_squareform, **kwargs)
+        self.call_args = {"extra_cost": extra_cost, "max_distance": max_distance}
         self.fn = C.levenshtein
+        self.cross_fn = C.levenshtein_cross
+        self.radius_fn = C.levenshtein_radius
+        self.kneighbors_fn = C.levenshtein_kneighbors
 
-    def forward(self, sequences: Sequence[str]) -> List[float]:
-        out = self.fn(sequences, **self.call_args)
+    def forward(
+        self,
+        sequences: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.fn(sequences, out=out, **self.call_args, **kwargs)
 
         return out
 
@@ -189,6 +901,7 @@ class TcrDistComponent(Metric[str]):
         gap_symbol: str = "-",
         weight: float = 1.0,
         return_squareform: bool = False,
+        **kwargs: Any,
     ):
         """
         Initialize a TcrDistComponent object.
@@ -205,7 +918,7 @@ class TcrDistComponent(Metric[str]):
             the weighting of the component weight
 
         """
-        super(TcrDistComponent, self).__init__(return_squareform)
+        super(TcrDistComponent, self).__init__(return_squareform, **kwargs)
         self.call_args = {
             **substitution_matrix,
             "gap_penalty": gap_penalty,
@@ -213,18 +926,64 @@ class TcrDistComponent(Metric[str]):
             "weight": weight,
         }
         self.fn = C.tcr_dist_component
+        self.cross_fn = C.tcr_dist_component_cross
+        self.radius_fn = C.tcr_dist_component_radius
+        self.kneighbors_fn = C.tcr_dist_component_kneighbors
 
     @ensure_equal_sequence_length(argnum=1)
-    def forward(self, sequences: Sequence[str]) -> List[float]:
-        out = self.fn(sequences, **self.call_args)
+    def forward(
+        self,
+        sequences: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.fn(sequences, out=out, **self.call_args, **kwargs)
 
         return out
 
+    @ensure_equal_sequence_length_cross
+    def forward_cross(
+        self,
+        queries: Sequence[str],
+        references: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.cross_fn(queries, references, out=out, **self.call_args, **kwargs)
+
+        return out
+
+    @ensure_equal_sequence_length_cross
+    def forward_radius(
+        self,
+        sequences: Sequence[str],
+        references: Optional[Sequence[str]],
+        radius: float,
+        **kwargs: Any,
+    ) -> NeighborArrays:
+        neighbors = super(TcrDistComponent, self).forward_radius(
+            sequences, references, radius, **kwargs
+        )
+        return neighbors
+
+    @ensure_equal_sequence_length_cross
+    def forward_kneighbors(
+        self,
+        sequences: Sequence[str],
+        references: Optional[Sequence[str]],
+        k: int,
+        **kwargs: Any,
+    ) -> KNeighborArrays:
+        neighbors = super(TcrDistComponent, self).forward_kneighbors(
+            sequences, references, k, **kwargs
+        )
+        return neighbors
+
 
 class TcrDist(Metric[Dict[str, str]]):
     """
     TcrDist [1]_ class. Inherits from Metric. It is a container class for individual TcrDistComponent instances.
-    Components are executed sequentially and their results aggregated at the end (summation).
+    The components of each record are concatenated, such that the sum of all components is computed in a single pass.
 
     Attributes
     ----------
@@ -255,7 +1014,15 @@ class TcrDist(Metric[Dict[str, str]]):
         "Please ensure that the input is a list of dictionaries, each with keys: {}"
     ).format(", ".join(repr(key) for key, _ in _default))
 
-    def __init__(self, return_squareform: bool = False, **components: TcrDistComponent):
+    def __init__(
+        self,
+        return_squareform: bool = False,
+        tile_size: Optional[int] = None,
+        n_jobs: Optional[int] = None,
+        dtype: npt.DTypeLike = np.float64,
+        deduplicate: bool = True,
+        **components: TcrDistComponent,
+    ):
         """
         Initialize a TcrDist object. Initialization can happen in two ways:
             1. no arguments are passed, instantiating the default configuration of TcrDist -- i.e. the configuration
@@ -265,6 +1032,17 @@ class TcrDist(Metric[Dict[str, str]]):
 
         Parameters
         ----------
+        return_squareform : bool
+            whether to return the square distance matrix instead of its flat upper triangle (default = False)
+        tile_size : int, optional
+            the tile size used by the C++ engine (see ``Metric``). It applies to all components.
+        n_jobs : int, optional
+            the number of threads used to compute the distances (see ``Metric``). It applies to all components.
+        dtype : np.dtype
+            the dtype of the computed distances (see ``Metric``)
+        deduplicate : bool
+            whether to compute the distances among unique records only (see ``Metric``). Records are compared on their
+            components, i.e. additional keys have no effect.
         components : keyword arguments
             either a set of keyword arguments, where each value is a TcrDistComponent instance which will be stored as
             an attribute with the key as its name OR `None` -- in which case the default configuration is loaded (Dash
@@ -292,7 +1070,13 @@ class TcrDist(Metric[Dict[str, str]]):
         additional keys will have no effect.
 
         """
-        super(TcrDist, self).__init__(return_squareform)
+        super(TcrDist, self).__init__(
+            return_squareform,
+            tile_size=tile_size,
+            n_jobs=n_jobs,
+            dtype=dtype,
+            deduplicate=deduplicate,
+        )
         parts: List[str] = []
 
         # user-defined configuration
@@ -317,14 +1101,73 @@ class TcrDist(Metric[Dict[str, str]]):
             warnings.warn(self._default_msg, UserWarning)
 
         self.components = parts
+        self.fn = C.tcr_dist
+        self.cross_fn = C.tcr_dist_cross
+        self.radius_fn = C.tcr_dist_radius
+        self.kneighbors_fn = C.tcr_dist_kneighbors
 
-    def _check_input_format(self, ipt: pd.Index) -> None:
+    def _check_input_format(self, ipt: Iterable[str]) -> None:
         pts: Set[str] = set(self.components)
 
         diff: Set[str] = pts.difference(ipt)
         if diff:
             raise ValueError("Missing key(s): {}".format(", ".join(map(repr, diff))))
 
+    def _columns(self, records: Sequence[Dict[str, str]]) -> List[List[str]]:
+        # the sequences of each component, in the order of the components
+        try:
+            return [[record[part] for record in records] for part in self.components]
+        except (KeyError, TypeError):
+            # report the missing keys, also of records which are not dictionaries at all
+            for record in records:
+                self._check_input_format(record if isinstance(record, dict) else [])
+            raise
+
+    def _concatenate(
+        self, *records: Sequence[Dict[str, str]]
+    ) -> Tuple[List[List[str]], List[Tuple[Any, ...]]]:
+        """
+        Prepare sets of records for the C++ engine, which computes all components in a single pass. The components of
+        each record are concatenated into one string, which requires the sequences of each component to be of a single
+        length across all sets.
+
+        Parameters
+        ----------
+        records : Sequence[Dict[str, str]]
+            the sets of records to be compared with one another
+
+        Returns
+        -------
+        concatenated : List[List[str]]
+            the concatenated components of the records of each set
+        components : List[tuple]
+            the arguments of each component (its substitution matrix and index, gap penalty, gap symbol and weight)
+            and the length of its sequences
+
+        """
+        columns = [self._columns(sequences) for sequences in records]
+
+        components: List[Tuple[Any, ...]] = []
+        for part, *parts in zip(self.components, *columns):
+            lengths = set().union(*({len(sequence) for sequence in p} for p in parts))
+            if len(lengths) > 1:
+                raise ValueError("Sequences must be of equal length")
+
+            args = getattr(self, part).call_args
+            components.append(
+                (
+                    args["substitution_matrix"],
+                    args["index"],
+                    args["gap_penalty"],
+                    args["gap_symbol"],
+                    args["weight"],
+                    lengths.pop() if lengths else 0,
+                )
+            )
+
+        concatenated = [["".join(record) for record in zip(*cols)] for cols in columns]
+        return concatenated, components
+
     @property
     def required_input_keys(self) -> List[str]:
         """
@@ -338,6 +1181,10 @@ class TcrDist(Metric[Dict[str, str]]):
         """
         return self.components
 
+    @property
+    def settings(self) -> Dict[str, Any]:
+        return {name: getattr(self, name).settings for name in self.components}
+
     @property
     def default_definition(self) -> TcrDistDef:
         """
@@ -351,27 +1198,83 @@ class TcrDist(Metric[Dict[str, str]]):
         """
         return self._default
 
-    def forward(self, sequences: Sequence[Dict[str, str]]) -> List[float]:
-        if not sequences:
-            return []
+    def _unique(
+        self, sequences: Sequence[Dict[str, str]]
+    ) -> Tuple[Sequence[Dict[str, str]], npt.NDArray[np.int64]]:
+        self._columns(sequences)  # reports records with missing components
+        return unique_records(
+            sequences, key=lambda record: tuple(record[c] for c in self.components)
+        )
 
-        # check the input keys provided -- assumes consistency
-        self._check_input_format(pd.DataFrame(sequences).columns)
+    def _prepare(self, sequences: Sequence[Dict[str, str]]) -> C.TcrDistRecords:
+        # the records are concatenated, checked and their components tabulated once
+        (records,), components = self._concatenate(sequences)
+        return C.TcrDistRecords(records, components)
 
-        # iterate through components and collect component output
-        out: List[FloatArray] = []
-        for part in self.components:
-            # gather sequences of the associated field into a list
-            sqs: List[str] = glom(sequences, [part])
-            component: TcrDistComponent = getattr(self, part)
+    def forward(
+        self,
+        sequences: Union[Sequence[Dict[str, str]], C.TcrDistRecords],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        records = (
+            sequences
+            if isinstance(sequences, C.TcrDistRecords)
+            else self._prepare(sequences)
+        )
+        out = self.fn(records, out=out, **kwargs)
+        return out
 
-            # execute component on list of associated sequences
-            result: FloatArray = component(sqs)
-            out.append(result)
+    def forward_cross(
+        self,
+        queries: Sequence[Dict[str, str]],
+        references: Sequence[Dict[str, str]],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        (query_records, reference_records), components = self._concatenate(
+            queries, references
+        )
+        out = self.cross_fn(
+            query_records, reference_records, components, out=out, **kwargs
+        )
+        return out
 
-        # aggregate the component outputs
-        res: FloatArray = np.stack(out).sum(axis=0)
-        return res.tolist()
+    def forward_radius(
+        self,
+        sequences: Sequence[Dict[str, str]],
+        references: Optional[Sequence[Dict[str, str]]],
+        radius: float,
+        **kwargs: Any,
+    ) -> NeighborArrays:
+        if references is None:
+            (records,), components = self._concatenate(sequences)
+            return self.radius_fn(records, components, radius=radius, **kwargs)
+
+        (records, reference_records), components = self._concatenate(
+            sequences, references
+        )
+        return self.radius_fn(
+            records, components, radius=radius, references=reference_records, **kwargs
+        )
+
+    def forward_kneighbors(
+        self,
+        sequences: Sequence[Dict[str, str]],
+        references: Optional[Sequence[Dict[str, str]]],
+        k: int,
+        **kwargs: Any,
+    ) -> KNeighborArrays:
+        if references is None:
+            (records,), components = self._concatenate(sequences)
+            return self.kneighbors_fn(records, components, k=k, **kwargs)
+
+        (records, reference_records), components = self._concatenate(
+            sequences, references
+        )
+        return self.kneighbors_fn(
+            records, components, k=k, references=reference_records, **kwargs
+        )
 
 
 class Hamming(Metric[str]):
@@ -389,16 +1292,66 @@ class Hamming(Metric[str]):
     .. [1] https://en.wikipedia.org/wiki/Hamming_distance
     """
 
-    def __init__(self, mismatch_score: float = 1.0, return_squareform: bool = False):
-        super(Hamming, self).__init__(return_squareform)
+    def __init__(
+        self,
+        mismatch_score: float = 1.0,
+        return_squareform: bool = False,
+        **kwargs: Any,
+    ):
+        super(Hamming, self).__init__(return_squareform, **kwargs)
         self.call_args = {"mismatch_score": mismatch_score}
         self.fn = C.hamming
+        self.cross_fn = C.hamming_cross
+        self.radius_fn = C.hamming_radius
+        self.kneighbors_fn = C.hamming_kneighbors
 
     @ensure_equal_sequence_length(argnum=1)
-    def forward(self, sequences: Sequence[str]) -> List[float]:
-        out = self.fn(sequences, **self.call_args)
+    def forward(
+        self,
+        sequences: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.fn(sequences, out=out, **self.call_args, **kwargs)
         return out
 
+    @ensure_equal_sequence_length_cross
+    def forward_cross(
+        self,
+        queries: Sequence[str],
+        references: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.cross_fn(queries, references, out=out, **self.call_args, **kwargs)
+        return out
+
+    @ensure_equal_sequence_length_cross
+    def forward_radius(
+        self,
+        sequences: Sequence[str],
+        references: Optional[Sequence[str]],
+        radius: float,
+        **kwargs: Any,
+    ) -> NeighborArrays:
+        neighbors = super(Hamming, self).forward_radius(
+            sequences, references, radius, **kwargs
+        )
+        return neighbors
+
+    @ensure_equal_sequence_length_cross
+    def forward_kneighbors(
+        self,
+        sequences: Sequence[str],
+        references: Optional[Sequence[str]],
+        k: int,
+        **kwargs: Any,
+    ) -> KNeighborArrays:
+        neighbors = super(Hamming, self).forward_kneighbors(
+            sequences, references, k, **kwargs
+        )
+        return neighbors
+
 
 class Jaro(Metric[str]):
     """
@@ -421,14 +1374,29 @@ class Jaro(Metric[str]):
         self,
         jaro_weights: Optional[List[float]] = None,
         return_squareform: bool = False,
+        **kwargs: Any,
     ):
-        super(Jaro, self).__init__(return_squareform)
+        super(Jaro, self).__init__(return_squareform, **kwargs)
         jaro_weights = check_jaro_weights(jaro_weights)
         self.call_args = {"jaro_weights": jaro_weights}
         self.fn = C.jaro
+        self.cross_fn = C.jaro_cross
+        self.radius_fn = C.jaro_radius
+        self.kneighbors_fn = C.jaro_kneighbors
 
-    def forward(self, sequences: Sequence[str]) -> List[float]:
-        out = self.fn(sequences, **self.call_args)
+    @property
+    def symmetric(self) -> bool:
+        # the first two weights apply to the first and the second sequence respectively
+        weights = self.call_args["jaro_weights"]
+        return weights[0] == weights[1]
+
+    def forward(
+        self,
+        sequences: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.fn(sequences, out=out, **self.call_args, **kwargs)
         return out
 
 
@@ -456,13 +1424,17 @@ class JaroWinkler(Jaro):
         max_l: int = 4,
         jaro_weights: Optional[List[float]] = None,
         return_squareform: bool = False,
+        **kwargs: Any,
     ):
         super(JaroWinkler, self).__init__(
-            jaro_weights=jaro_weights, return_squareform=return_squareform
+            jaro_weights=jaro_weights, return_squareform=return_squareform, **kwargs
         )
         self.call_args["p"] = p
         self.call_args["max_l"] = max_l
         self.fn = C.jaro_winkler  # type: ignore[assignment]
+        self.cross_fn = C.jaro_winkler_cross
+        self.radius_fn = C.jaro_winkler_radius
+        self.kneighbors_fn = C.jaro_winkler_kneighbors
 
 
 class LongestCommonSubstring(Metric[str]):
@@ -481,12 +1453,21 @@ class LongestCommonSubstring(Metric[str]):
 
     """
 
-    def __init__(self, return_squareform: bool = False):
-        super(LongestCommonSubstring, self).__init__(return_squareform)
+    def __init__(self, return_squareform: bool = False, **kwargs: Any):
+        super(LongestCommonSubstring, self).__init__(return_squareform, **kwargs)
+        self.call_args = {}
         self.fn = C.longest_common_substring
+        self.cross_fn = C.longest_common_substring_cross
+        self.radius_fn = C.longest_common_substring_radius
+        self.kneighbors_fn = C.longest_common_substring_kneighbors
 
-    def forward(self, sequences: Sequence[str]) -> List[float]:
-        out = self.fn(sequences)
+    def forward(
+        self,
+        sequences: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.fn(sequences, out=out, **kwargs)
         return out
 
 
@@ -506,10 +1487,35 @@ class OptimalStringAlignment(Metric[str]):
 
     """
 
-    def __init__(self, return_squareform: bool = False):
-        super(OptimalStringAlignment, self).__init__(return_squareform)
+    def __init__(
+        self,
+        return_squareform: bool = False,
+        max_distance: Optional[float] = None,
+        **kwargs: Any,
+    ):
+        """
+        Initialize an OptimalStringAlignment object.
+
+        Parameters
+        ----------
+        max_distance : float, optional
+            if set, distances above ``max_distance`` are reported as ``max_distance + 1``, and only the cells of the
+            dynamic programme within ``max_distance`` of its diagonal are computed
+
+        """
+        check_max_distance(max_distance)
+        super(OptimalStringAlignment, self).__init__(return_squareform, **kwargs)
+        self.call_args = {"max_distance": max_distance}
         self.fn = C.optimal_string_alignment
+        self.cross_fn = C.optimal_string_alignment_cross
+        self.radius_fn = C.optimal_string_alignment_radius
+        self.kneighbors_fn = C.optimal_string_alignment_kneighbors
 
-    def forward(self, sequences: Sequence[str]) -> List[float]:
-        out = self.fn(sequences)
+    def forward(
+        self,
+        sequences: Sequence[str],
+        out: Optional[DistanceArray] = None,
+        **kwargs: Any,
+    ) -> DistanceArray:
+        out = self.fn(sequences, out=out, **self.call_args, **kwargs)
         return out
@@ -0,0 +1,125 @@
+"""
+Pre-encoded sets of sequences.
+
+"""
+
+from collections.abc import Sequence
+from typing import Dict, Iterable, List, Optional, Tuple, Union, overload
+
+import numpy as np
+import numpy.typing as npt
+
+import setriq._C as C
+
+__all__ = [
+    "Repertoire",
+]
+
+
+class Repertoire(C.Repertoire):
+    """
+    A set of sequences which is converted into the form the C++ engine takes once, such that it can be passed to any
+    metric repeatedly without being converted again. It is an immutable sequence of ``str``. The alphabet and the
+    lengths of the sequences are checked in C++, without converting them back to Python. The residues the sequences
+    hold are collected once, such that the metrics check them against their substitution matrix without reading the
+    sequences again.
+
+    Examples
+    --------
+    >>> repertoire = Repertoire(['CASSLKPNTEAFF', 'CASSAHIANYGYTF', 'CASRGATETQYF'], alphabet=BLOSUM62.index)
+    >>>
+    >>> distances = CdrDist()(repertoire)
+    >>> neighbors = Levenshtein().kneighbors(repertoire, k=1)
+
+    """
+
+    def __init__(
+        self, sequences: Iterable[str], alphabet: Optional[Iterable[str]] = None
+    ):
+        """
+        Initialize a Repertoire object.
+
+        Parameters
+        ----------
+        sequences : Iterable[str]
+            the sequences
+        alphabet : Iterable[str], optional
+            if set, the characters the sequences may hold. A ``ValueError`` is raised for sequences holding other
+            characters.
+
+        """
+        super(Repertoire, self).__init__(list(sequences))
+        self._unique: Optional[Tuple[Repertoire, npt.NDArray[np.int64]]] = None
+        if alphabet is not None:
+            self.check_alphabet(alphabet)
+
+    def check_alphabet(self, alphabet: Iterable[str]) -> None:
+        """
+        Check that the sequences only hold characters of ``alphabet``. The sequences are only read to report those which
+        do not.
+
+        Parameters
+        ----------
+        alphabet : Iterable[str]
+            the valid characters
+
+        """
+        key = "".join(set(alphabet))
+        if self.holds_only(key):
+            return
+
+        invalid = self.find_invalid(key)
+        if invalid.size:
+            i = int(invalid[0])
+            characters = sorted(set("".join(self[j] for j in invalid)) - set(key))
+            raise ValueError(
+                f"the sequences hold characters which are not in the alphabet: {characters}. The first offending "
+                f"sequence is sequence {i} ({self[i]!r})"
+            )
+
+    def unique(self) -> Tuple["Repertoire", npt.NDArray[np.int64]]:
+        """
+        The unique sequences, in order of their first appearance, and the index into them of every sequence. The result
+        is cached.
+
+        Returns
+        -------
+        uniques : Repertoire
+            the unique sequences
+        inverse : np.ndarray
+            the index of every sequence in ``uniques``
+
+        """
+        if self._unique is None:
+            index: Dict[str, int] = {}
+            inverse = np.fromiter(
+                (index.setdefault(sequence, len(index)) for sequence in self),
+                dtype=np.int64,
+                count=len(self),
+            )
+            uniques = Repertoire(index)
+            self._unique = (uniques, inverse)
+
+        return self._unique
+
+    @overload
+    def __getitem__(self, i: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, i: slice) -> "Repertoire":
+        ...
+
+    def __getitem__(self, i: Union[int, slice]) -> Union[str, "Repertoire"]:
+        if isinstance(i, slice):
+            return Repertoire([self[j] for j in range(*i.indices(len(self)))])
+        return super(Repertoire, self).__getitem__(i)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(n_sequences={len(self)})"
+
+    def tolist(self) -> List[str]:
+        return list(self)
+
+
+Sequence.register(Repertoire)
@@ -43,7 +43,9 @@ An example for computing the pairwise sequence distances using PySpark and setri
 
 """
 
-from typing import List, Optional
+import collections
+import threading
+from typing import Dict, List, Optional, Tuple
 
 import setriq._C as C
 
@@ -51,6 +53,7 @@ from .substitution import BLOSUM45, SubstitutionMatrix
 from .utils import (
     check_jaro_weights,
     check_jaro_winkler_params,
+    check_max_distance,
     ensure_equal_sequence_length_sd,
     single_dispatch,
     tcr_dist_sd_component_check,
@@ -68,6 +71,40 @@ __all__ = [
 ]
 
 
+# the prepared CdrDist metrics of the most recently used settings. An entry is found by the ids of the substitution
+# matrix and index, and holds copies of their contents. It is only reused while the matrix and index still hold the
+# contents it was prepared from, i.e. if they were neither modified in place nor freed and their ids taken by others
+_CdrDistEntry = Tuple[List[List[float]], Dict[str, int], C.CdrDistSd]
+_CDR_DIST_METRICS: "collections.OrderedDict[Tuple[int, int, float, float], _CdrDistEntry]" = (
+    collections.OrderedDict()
+)
+_CDR_DIST_METRICS_LOCK = threading.Lock()
+_MAX_CDR_DIST_METRICS = 16
+
+
+def _cdr_dist_metric(
+    substitution_matrix: SubstitutionMatrix,
+    gap_opening_penalty: float,
+    gap_extension_penalty: float,
+) -> C.CdrDistSd:
+    matrix, index = substitution_matrix.substitution_matrix, substitution_matrix.index
+    key = (id(matrix), id(index), gap_opening_penalty, gap_extension_penalty)
+    with _CDR_DIST_METRICS_LOCK:
+        cached = _CDR_DIST_METRICS.get(key)
+        if cached is not None and cached[0] == matrix and cached[1] == index:
+            _CDR_DIST_METRICS.move_to_end(key)
+            return cached[2]
+
+        metric = C.CdrDistSd(matrix, index, gap_opening_penalty, gap_extension_penalty)
+        _CDR_DIST_METRICS[key] = ([list(row) for row in matrix], dict(index), metric)
+        _CDR_DIST_METRICS.move_to_end(key)
+        # the least recently used metric is dropped, such that at most a few settings are held at any time
+        if len(_CDR_DIST_METRICS) > _MAX_CDR_DIST_METRICS:
+            _CDR_DIST_METRICS.popitem(last=False)
+
+    return metric
+
+
 @single_dispatch
 def cdr_dist(
     a: str,
@@ -103,30 +140,33 @@ def cdr_dist(
        by CDR sequence similarity. BMC bioinformatics, 20(1), pp.1-14. (https://doi.org/10.1186/s12859-019-2864-8)
 
     """
-    distance = C.cdr_dist_sd(
-        a,
-        b,
-        **substitution_matrix,  # type: ignore[arg-type]
-        gap_opening_penalty=gap_opening_penalty,
-        gap_extension_penalty=gap_extension_penalty
+    metric = _cdr_dist_metric(
+        substitution_matrix, gap_opening_penalty, gap_extension_penalty
     )
+    distance = metric(a, b)
     return distance
 
 
 @single_dispatch
-def levenshtein(a: str, b: str, extra_cost: float = 0.0) -> float:
+def levenshtein(
+    a: str, b: str, extra_cost: float = 0.0, max_distance: Optional[float] = None
+) -> float:
     """
     Compute the Levenshtein distance [1]_ between two sequences. Based on the implementation in [2]_.
 
     {params}
     extra_cost: float
-        Additional cost assigned by Levenshtein algorithm.
+        the additional cost of a substitution, i.e. substitutions cost ``1 + extra_cost`` (default = 0.0)
+    max_distance: float, optional
+        if set, a distance above ``max_distance`` is reported as ``max_distance + 1``, and its computation stops as soon
+        as it is bound to exceed it
 
     {returns}
 
     Examples
     --------
     >>> levenshtein('AASQ', 'PASQ')
+    >>> levenshtein('CASSLKPNTEAFF', 'CASRGATETQYF', max_distance=3)  # 4.0, as the distance is above 3
 
     References
     ----------
@@ -135,7 +175,8 @@ def levenshtein(a: str, b: str, extra_cost: float = 0.0) -> float:
     .. [2] python-Levenshtein (https://github.com/ztane/python-Levenshtein)
 
     """
-    distance = C.levenshtein_sd(a, b, extra_cost=extra_cost)
+    check_max_distance(max_distance)
+    distance = C.levenshtein_sd(a, b, extra_cost=extra_cost, max_distance=max_distance)
     return distance
 
 
@@ -298,11 +339,16 @@ def longest_common_substring(a: str, b: str) -> float:
 
 
 @single_dispatch
-def optimal_string_alignment(a: str, b: str) -> float:
+def optimal_string_alignment(
+    a: str, b: str, max_distance: Optional[float] = None
+) -> float:
     """
     Compute the OSA [1]_ between two sequences.
 
     {params}
+    max_distance: float, optional
+        if set, a distance above ``max_distance`` is reported as ``max_distance + 1``, and its computation stops as soon
+        as it is bound to exceed it
 
     {returns}
 
@@ -315,5 +361,6 @@ def optimal_string_alignment(a: str, b: str) -> float:
     .. [1] https://en.wikipedia.org/wiki/Damerau%E2%80%93Levenshtein_distance
 
     """
-    distance = C.optimal_string_alignment_sd(a, b)
+    check_max_distance(max_distance)
+    distance = C.optimal_string_alignment_sd(a, b, max_distance=max_distance)
     return distance
@@ -4,9 +4,28 @@ Package utilities. Not meant for outside use.
 
 import enum
 import inspect
+import numbers
 from functools import WRAPPER_ASSIGNMENTS, wraps
-from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
-
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+import numpy as np
+import numpy.typing as npt
+
+from .repertoire import Repertoire
 from .substitution import BLOSUM62, SubstitutionMatrix
 
 __all__ = [
@@ -15,12 +34,19 @@ __all__ = [
     "single_dispatch",
     "tcr_dist_sd_component_check",
     "ensure_equal_sequence_length_sd",
+    "ensure_equal_sequence_length_cross",
     "check_jaro_weights",
     "check_jaro_winkler_params",
+    "check_dtype",
+    "check_n_jobs",
+    "condensed_offset",
+    "row_chunks",
+    "unique_records",
     "TCR_DIST_DEFAULT",
     "TcrDistDef",
 ]
 
+T = TypeVar("T")
 TcrDistComponentDef = Dict[str, Union[float, SubstitutionMatrix]]
 NamedTCRDD = Tuple[str, TcrDistComponentDef]
 TcrDistDef = List[NamedTCRDD]
@@ -167,7 +193,8 @@ def enforce_list(argnum: int = 0, convert_iterable: bool = True):
         def _fn(*args, **kwargs):
             argument, arg_type = _get_argument(params, argname, argidx, args, kwargs)
             if isinstance(argument, Iterable) and not isinstance(argument, str):
-                if not isinstance(argument, list) and convert_iterable:
+                # repertoires are passed on as they are, to avoid converting them again
+                if not isinstance(argument, (list, Repertoire)) and convert_iterable:
                     argument = list(argument)
             else:
                 argument = [argname]
@@ -220,10 +247,15 @@ def ensure_equal_sequence_length(argnum: int):
         @wraps(fn, assigned=WRAPPER_ASSIGNMENTS)
         def _fn(*args, **kwargs):
             argument, _ = _get_argument(params, argname, argidx, args, kwargs)
-            if (
-                argument
-                and not (len(argument[0]) == pd.Series(argument).str.len()).all()
-            ):
+            if isinstance(argument, Repertoire):
+                lengths = argument.lengths
+                equal = not lengths.size or lengths.min() == lengths.max()
+            else:
+                equal = (
+                    not argument
+                    or (len(argument[0]) == pd.Series(argument).str.len()).all()
+                )
+            if not equal:
                 raise ValueError("Sequences must be of equal length")
             out = fn(*args, **kwargs)
             return out
@@ -254,6 +286,32 @@ def ensure_equal_sequence_length_sd(fn: Callable) -> Callable:
     return _fn
 
 
+def ensure_equal_sequence_length_cross(fn: Callable) -> Callable:
+    # the cross-distance counterpart of `ensure_equal_sequence_length` -- queries and references need to share a single
+    # sequence length, not just be of equal length within themselves. The references are optional (`None`)
+    signature = inspect.signature(fn)
+    fn = _add_func_signature(fn, signature)
+
+    @wraps(fn, assigned=WRAPPER_ASSIGNMENTS)
+    def _fn(self, queries, references, *args, **kwargs):
+        lengths = set().union(
+            *(_lengths(records) for records in (queries, references or []))
+        )
+        if len(lengths) > 1:
+            raise ValueError("Sequences must be of equal length")
+        out = fn(self, queries, references, *args, **kwargs)
+        return out
+
+    return _fn
+
+
+def _lengths(sequences: Sequence[str]) -> Set[int]:
+    # the distinct lengths of a set of sequences
+    if isinstance(sequences, Repertoire):
+        return set(np.unique(sequences.lengths).tolist())
+    return {len(sequence) for sequence in sequences}
+
+
 def single_dispatch(fn: Callable) -> Callable:
     signature = inspect.signature(fn)
     fn = _add_func_signature(fn, signature)
@@ -347,6 +405,72 @@ def check_jaro_weights(weights: Optional[List[float]]) -> List[float]:
     return weights
 
 
+def check_max_distance(max_distance: Optional[float]) -> None:
+    if max_distance is not None and not max_distance >= 0:
+        raise ValueError("`max_distance` has to be non-negative")
+
+
+SUPPORTED_DTYPES = ("float64", "float32", "uint16", "uint8")
+
+
+def check_dtype(dtype: npt.DTypeLike) -> np.dtype:
+    dtype = np.dtype(dtype)
+    if dtype.name not in SUPPORTED_DTYPES:
+        raise TypeError(
+            f"`dtype` has to be one of {', '.join(SUPPORTED_DTYPES)}, not {dtype.name}"
+        )
+    return dtype
+
+
+def check_n_jobs(n_jobs: Optional[int]) -> None:
+    if n_jobs is None:
+        return
+    if not isinstance(n_jobs, numbers.Integral) or isinstance(n_jobs, bool):
+        raise TypeError("`n_jobs` has to be an integer")
+    if n_jobs == 0:
+        raise ValueError("`n_jobs` cannot be 0")
+
+
+def condensed_offset(row: int, n: int) -> int:
+    # the index of the pair (row, row + 1) in the flat upper triangle of the distance matrix of `n` sequences
+    return row * (2 * n - row - 1) // 2
+
+
+def row_chunks(n: int, chunk_pairs: int) -> Iterator[Tuple[int, int]]:
+    # split the rows of the upper triangle into consecutive ranges [begin, end), each holding at most `chunk_pairs`
+    # pairs -- or a single row, if it holds more than that
+    row_begin = 0
+    while row_begin < n - 1:
+        row_end = row_begin + 1
+        pairs = n - row_end
+        while row_end < n - 1 and pairs + n - row_end - 1 <= chunk_pairs:
+            pairs += n - row_end - 1
+            row_end += 1
+        yield row_begin, row_end
+        row_begin = row_end
+
+
+def unique_records(
+    records: Sequence[T], key: Optional[Callable[[T], Hashable]] = None
+) -> Tuple[List[T], npt.NDArray[np.int64]]:
+    # the distinct records in order of first appearance, and the index of each record in the list of distinct records.
+    # Records are compared through `key`, which defaults to the record itself (and the sorted items of dictionaries)
+    def default_key(record: Any) -> Hashable:
+        return tuple(sorted(record.items())) if isinstance(record, dict) else record
+
+    key = key or default_key
+    index: Dict[Hashable, int] = {}
+    uniques: List[T] = []
+    inverse: List[int] = []
+    for record in records:
+        u = index.setdefault(key(record), len(uniques))
+        if u == len(uniques):
+            uniques.append(record)
+        inverse.append(u)
+
+    return uniques, np.array(inverse, dtype=np.int64)
+
+
 def check_jaro_winkler_params(fn: Callable):
     # checks that Jaro-Winkler parameters are sensibly defined
     argname_p = "p"
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWY"
+
+
+@pytest.fixture()
+def random_sequences():
+    def _method(n, size=12, alphabet=AMINO_ACIDS, n_unique=None, seed=0):
+        # `size` is the length of the sequences or a (min, max) range of lengths. If `n_unique` is set, the `n`
+        # sequences are drawn from a pool of `n_unique` sequences, i.e. they hold duplicates
+        rng = np.random.default_rng(seed)
+        low, high = (size, size) if isinstance(size, int) else size
+        characters = np.array(list(alphabet))
+        sequences = [
+            "".join(rng.choice(characters, size=length))
+            for length in rng.integers(low, high + 1, size=n_unique or n)
+        ]
+        if n_unique is not None:
+            sequences = [sequences[i] for i in rng.integers(0, n_unique, size=n)]
+
+        return sequences
+
+    return _method
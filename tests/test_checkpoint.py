@@ -0,0 +1,36 @@
+import pytest
+
+from setriq.modules import checkpoint
+
+
+def test_checkpoint(tmp_path):
+    path = tmp_path / "distances.npy"
+    ckpt = checkpoint.Checkpoint(path, "abc")
+    assert ckpt.path == tmp_path / "distances.npy.manifest.json"
+    assert checkpoint.Checkpoint.load(path, "abc") is None
+
+    for begin, end in [(4, 6), (0, 2), (2, 4), (8, 9)]:
+        ckpt.add(begin, end)
+    assert ckpt.completed == [(0, 6), (8, 9)]
+
+    loaded = checkpoint.Checkpoint.load(path, "abc")
+    assert loaded is not None
+    assert loaded.completed == ckpt.completed
+
+
+@pytest.mark.parametrize(
+    ["rows", "expected"],
+    [((0, 6), True), ((1, 3), True), ((5, 8), False), ((6, 8), False)],
+)
+def test_checkpoint_contains(tmp_path, rows, expected):
+    ckpt = checkpoint.Checkpoint(tmp_path / "distances.npy", "abc", [(0, 6), (8, 9)])
+    assert ckpt.contains(*rows) == expected
+
+
+def test_checkpoint_mismatch(tmp_path):
+    path = tmp_path / "distances.npy"
+    checkpoint.Checkpoint(path, "abc").add(0, 2)
+    assert checkpoint.Checkpoint.load(path, "xyz") is None
+
+    (tmp_path / "distances.npy.manifest.json").write_text("{")
+    assert checkpoint.Checkpoint.load(path, "abc") is None
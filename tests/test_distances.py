@@ -1,9 +1,12 @@
 import decimal as dc
+import functools
 import itertools
 import warnings
+from concurrent import futures
 
 import numpy as np
 import pytest
+from scipy import spatial
 from sklearn import preprocessing
 
 import setriq
@@ -72,6 +75,24 @@ optimal_string_alignment_results = [
 ]
 
 
+# the metrics of single sequences, and those of them whose distances are integers
+METRICS = [
+    setriq.CdrDist,
+    setriq.Levenshtein,
+    setriq.Hamming,
+    setriq.Jaro,
+    setriq.JaroWinkler,
+    setriq.LongestCommonSubstring,
+    setriq.OptimalStringAlignment,
+]
+INTEGER_METRICS = [
+    setriq.Levenshtein,
+    setriq.Hamming,
+    setriq.LongestCommonSubstring,
+    setriq.OptimalStringAlignment,
+]
+
+
 # ------ Fixtures ---------------------------------------------------------------------------------------------------- #
 @pytest.fixture()
 def cdr_dist():
@@ -109,10 +130,10 @@ def tcr_dist_keys():
 
 @pytest.fixture()
 def tcr_dist_base():
-    def _method():
+    def _method(**kwargs):
         with warnings.catch_warnings():
             warnings.simplefilter("ignore")
-            metric = setriq.TcrDist()
+            metric = setriq.TcrDist(**kwargs)
 
         return metric
 
@@ -184,6 +205,99 @@ def test_cdr_dist(cdr_dist, sequences, distances):
     assert all(r == tgt for r, tgt in zip(res, distances))
 
 
+def expected_cdr_dist(
+    a, b, substitution_matrix, gap_opening_penalty, gap_extension_penalty
+):
+    # Smith-Waterman, with the best gap of any length ending in each cell searched for explicitly
+    def align(x, y):
+        scores = np.zeros((len(x) + 1, len(y) + 1))
+        for i, j in itertools.product(range(1, len(x) + 1), range(1, len(y) + 1)):
+            gaps = [
+                scores[i - k, j] - gap_opening_penalty - (k - 1) * gap_extension_penalty
+                for k in range(1, i + 1)
+            ] + [
+                scores[i, j - k] - gap_opening_penalty - (k - 1) * gap_extension_penalty
+                for k in range(1, j + 1)
+            ]
+            substitution = scores[i - 1, j - 1] + substitution_matrix(
+                x[i - 1], y[j - 1]
+            )
+            scores[i, j] = max(0, substitution, *gaps)
+        return scores.max()
+
+    def identity(x):
+        return sum(substitution_matrix(c, c) for c in x)
+
+    return 1 - np.sqrt(align(a, b) ** 2 / (identity(a) * identity(b)))
+
+
+@pytest.mark.parametrize(
+    ["gap_opening_penalty", "gap_extension_penalty"], [(10, 1), (2, 1), (1, 3), (0, 0)]
+)
+def test_cdr_dist_gaps(gap_opening_penalty, gap_extension_penalty):
+    sequences = [
+        "CASSLKPNTEAFF",
+        "CASSAHIANYGYTF",
+        "CWWSLKPNTEAFF",
+        "CSLKPYF",
+        "WCASSLKW",
+    ]
+    metric = setriq.CdrDist(
+        gap_opening_penalty=gap_opening_penalty,
+        gap_extension_penalty=gap_extension_penalty,
+    )
+
+    expected = [
+        expected_cdr_dist(
+            a, b, setriq.BLOSUM45, gap_opening_penalty, gap_extension_penalty
+        )
+        for a, b in itertools.combinations(sequences, 2)
+    ]
+    np.testing.assert_allclose(metric(sequences), expected)
+
+
+@pytest.mark.parametrize(
+    ["substitution_matrix", "gap_opening_penalty"],
+    [
+        (setriq.BLOSUM45, 10.0),
+        (setriq.BLOSUM62, 3.0),
+        (setriq.BLOSUM62, 3.5),  # non-integer penalty, i.e. the scalar path
+        (
+            setriq.SubstitutionMatrix(
+                setriq.BLOSUM62.index,
+                (np.array(setriq.BLOSUM62.substitution_matrix) * 0.5).tolist(),
+            ),
+            3.0,
+        ),
+    ],
+)
+def test_cdr_dist_lanes(random_sequences, substitution_matrix, gap_opening_penalty):
+    # the pairwise computation aligns several sequences at once, the single dispatch one pair at a time
+    sequences = random_sequences(40, size=(0, 29))
+    sequences.append("W" * 3000)  # its scores overflow int16
+    metric = setriq.CdrDist(
+        substitution_matrix=substitution_matrix,
+        gap_opening_penalty=gap_opening_penalty,
+        n_jobs=2,
+    )
+
+    expected = [
+        setriq.single_dispatch.cdr_dist(
+            a,
+            b,
+            substitution_matrix=substitution_matrix,
+            gap_opening_penalty=gap_opening_penalty,
+        )
+        for a, b in itertools.combinations(sequences, 2)
+    ]
+    np.testing.assert_array_equal(metric(sequences), expected)
+
+    cross = metric.cross(sequences[:5], sequences)
+    np.testing.assert_array_equal(
+        cross, spatial.distance.squareform(metric(sequences))[:5]
+    )
+
+
 @pytest.mark.parametrize(
     ["sequences", "distances"], zip(test_cases, levensthein_test_results)
 )
@@ -264,6 +378,89 @@ def test_tcr_dist_custom_error():
         setriq.TcrDist(rainbows=rainbows, butterflies=butterflies)
 
 
+def test_tcr_dist_components(tcr_dist_custom, tcr_dist_keys):
+    # the components are computed in a single pass, which matches the sum of the components computed one by one
+    rng = np.random.default_rng(0)
+    lengths = dict(zip(tcr_dist_keys, [12, 10, 7, 19]))
+    sequences = [
+        {
+            key: "".join(rng.choice(list("ACDEFGHIKLMNPQRSTVWY-"), size=length))
+            for key, length in lengths.items()
+        }
+        for _ in range(30)
+    ]
+    metric = tcr_dist_custom()
+
+    def expected(queries, references):
+        return sum(
+            getattr(metric, key).cross(
+                [q[key] for q in queries], [r[key] for r in references]
+            )
+            for key in tcr_dist_keys
+        )
+
+    full = expected(sequences, sequences)
+    np.testing.assert_allclose(
+        metric(sequences), full[np.triu_indices(len(sequences), k=1)]
+    )
+    np.testing.assert_allclose(
+        metric.cross(sequences[:5], sequences), full[:5], rtol=1e-12
+    )
+
+    # each component has to be of a single length, also across queries and references
+    shorter = [{**record, "cdr_2": record["cdr_2"][:-1]} for record in sequences]
+    with pytest.raises(ValueError):
+        metric(sequences + shorter[:1])
+    with pytest.raises(ValueError):
+        metric.cross(sequences, shorter)
+
+    with pytest.raises(ValueError):
+        metric([{**record, "cdr_3": "a" * 19} for record in sequences[:2]])
+
+
+@pytest.mark.parametrize(["n_germlines", "n_records"], [(5, 40), (600, 700)])
+def test_tcr_dist_tabulated(tcr_dist_custom, tcr_dist_keys, n_germlines, n_records):
+    # components with few distinct sequences (e.g. those given by the V gene) are looked up in a table of the distances
+    # between their distinct sequences, which gives the same distances as computing them pair by pair
+    rng = np.random.default_rng(n_germlines)
+
+    def random_sequence(length):
+        return "".join(rng.choice(list("ACDEFGHIKLMNPQRSTVWY-"), size=length))
+
+    germlines = [
+        {"cdr_1": random_sequence(12), "cdr_2": random_sequence(10)}
+        for _ in range(n_germlines)
+    ]
+    sequences = [
+        {
+            **germlines[i % n_germlines],
+            "cdr_2_5": "SRSN-GY",
+            "cdr_3": random_sequence(15),
+        }
+        for i in range(n_records)
+    ]
+    queries, references = sequences[:3], sequences[3:]
+    metric = tcr_dist_custom()
+
+    expected = sum(
+        getattr(metric, key).cross(
+            [q[key] for q in queries], [r[key] for r in references]
+        )
+        for key in tcr_dist_keys
+    )
+    np.testing.assert_array_equal(metric.cross(queries, references), expected)
+
+    expected_indices, expected_distances = expected_kneighbors(expected, 3)
+    indices, distances = metric.kneighbors(queries, 3, references=references)
+    assert np.array_equal(indices, expected_indices)
+    assert np.array_equal(distances, expected_distances)
+
+    expected = sum(
+        getattr(metric, key)([s[key] for s in sequences[:40]]) for key in tcr_dist_keys
+    )
+    np.testing.assert_array_equal(metric(sequences[:40]), expected)
+
+
 @pytest.mark.parametrize(["sequences", "distances"], zip(test_cases, hamming_results))
 def test_hamming(sequences, distances):
     metric = setriq.Hamming()
@@ -276,6 +473,34 @@ def test_hamming(sequences, distances):
     assert all(r == tgt for r, tgt in zip(res, distances))
 
 
+@pytest.mark.parametrize("length", [7, 8, 9, 16, 23])
+def test_mismatch_words(length):
+    # the residues are compared eight at a time, with the remainder of a sequence compared one by one
+    rng = np.random.default_rng(length)
+    sequences = ["".join(rng.choice(list("AC-"), size=length)) for _ in range(20)]
+    sequences[1] = sequences[0][:-1] + ("A" if sequences[0][-1] != "A" else "C")
+
+    expected = [
+        sum(x != y for x, y in zip(a, b))
+        for a, b in itertools.combinations(sequences, 2)
+    ]
+    np.testing.assert_array_equal(
+        setriq.Hamming(mismatch_score=2.0)(sequences), np.multiply(expected, 2.0)
+    )
+
+    matrix = setriq.BLOSUM62
+    expected = [
+        sum(
+            4.0 if "-" in (x, y) else min(4.0, 4.0 - matrix(x, y))
+            for x, y in zip(a, b)
+            if x != y
+        )
+        for a, b in itertools.combinations(sequences, 2)
+    ]
+    metric = setriq.modules.distances.TcrDistComponent(matrix, gap_penalty=4.0)
+    np.testing.assert_array_equal(metric(sequences), expected)
+
+
 @pytest.mark.parametrize(["sequences", "distances"], zip(test_cases, jaro_results))
 def test_jaro(sequences, distances):
     metric = setriq.Jaro()
@@ -316,6 +541,104 @@ def test_longest_common_substring(sequences, distances):
     assert all(r == tgt for r, tgt in zip(res, distances))
 
 
+def levenshtein_reference(a, b):
+    row = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        diagonal, row[0] = row[0], i
+        for j, y in enumerate(b, 1):
+            diagonal, row[j] = row[j], min(
+                row[j] + 1, row[j - 1] + 1, diagonal + (x != y)
+            )
+    return float(row[-1])
+
+
+def jaro_winkler_reference(a, b, p):
+    if not (a and b):
+        return float(bool(a or b))
+    window = max(len(a), len(b)) // 2 - 1
+    if window < 0:
+        return float(a != b)
+
+    matched_a, matched_b = [False] * len(a), [False] * len(b)
+    for i, x in enumerate(a):
+        for j in range(max(i - window, 0), min(i + window + 1, len(b))):
+            if x == b[j] and not matched_b[j]:
+                matched_a[i] = matched_b[j] = True
+                break
+    m = sum(matched_a)
+    if m == 0:
+        return 1.0
+
+    x = [c for c, f in zip(a, matched_a) if f]
+    y = [c for c, f in zip(b, matched_b) if f]
+    t = sum(u != v for u, v in zip(x, y)) / 2
+    jaro = 1 - (m / len(a) + m / len(b) + (m - t) / m) / 3
+    prefix = next(
+        (k for k, (u, v) in enumerate(zip(a[:4], b[:4])) if u != v),
+        min(len(a), len(b), 4),
+    )
+    return jaro * (1 - prefix * p)
+
+
+def longest_common_substring_reference(a, b):
+    row = [0] * (len(b) + 1)
+    for x in a:
+        diagonal = 0
+        for j, y in enumerate(b, 1):
+            diagonal, row[j] = row[j], (
+                diagonal + 1 if x == y else max(row[j], row[j - 1])
+            )
+    return float(len(a) + len(b) - 2 * row[-1])
+
+
+@pytest.mark.parametrize("alphabet", ["AB", "ACDEFGHIKLMNPQRSTVWY"])
+@pytest.mark.parametrize(
+    ["metric", "single_dispatch", "reference", "rtol"],
+    [
+        (
+            setriq.Levenshtein,
+            setriq.single_dispatch.levenshtein,
+            levenshtein_reference,
+            0.0,
+        ),
+        (
+            setriq.Jaro,
+            setriq.single_dispatch.jaro,
+            functools.partial(jaro_winkler_reference, p=0.0),
+            1e-12,
+        ),
+        (
+            setriq.JaroWinkler,
+            functools.partial(setriq.single_dispatch.jaro_winkler, p=0.1),
+            functools.partial(jaro_winkler_reference, p=0.1),
+            1e-12,
+        ),
+        (
+            setriq.LongestCommonSubstring,
+            setriq.single_dispatch.longest_common_substring,
+            longest_common_substring_reference,
+            0.0,
+        ),
+    ],
+)
+def test_bit_parallel(metric, single_dispatch, reference, rtol, alphabet):
+    # the distances are computed with bit masks, in one word up to 64 characters and in several beyond. The sizes lie
+    # on either side of the word boundaries, and the last two sequences overlap others partially
+    rng = np.random.default_rng(0)
+    sequences = [
+        "".join(rng.choice(list(alphabet), size=size))
+        for size in [0, 1, 13, 63, 64, 65, 100, 128, 129, 200]
+    ]
+    sequences += [sequences[3][:10] + sequences[2], sequences[5][:3]]
+    pairs = list(itertools.combinations(sequences, 2))
+
+    expected = [reference(a, b) for a, b in pairs]
+    np.testing.assert_allclose(metric(n_jobs=2)(sequences), expected, rtol=rtol, atol=0)
+    np.testing.assert_allclose(
+        [single_dispatch(a, b) for a, b in pairs], expected, rtol=rtol, atol=0
+    )
+
+
 @pytest.mark.parametrize(
     ["sequences", "distances"], zip(test_cases, optimal_string_alignment_results)
 )
@@ -330,6 +653,60 @@ def test_optimal_string_alignment(sequences, distances):
     assert all(r == tgt for r, tgt in zip(res, distances))
 
 
+def test_optimal_string_alignment_transpositions():
+    metric = setriq.OptimalStringAlignment()
+
+    # "ABC" -> "BAC" (transposition) -> "BACAB" (two insertions)
+    np.testing.assert_array_equal(metric(["ABC", "BACAB"]), [3.0])
+    np.testing.assert_array_equal(metric(["CCCA", "ACAC"]), [2.0])
+    assert setriq.single_dispatch.optimal_string_alignment("ABC", "BACAB") == 3.0
+
+
+@pytest.mark.parametrize(
+    ["metric", "single_dispatch"],
+    [
+        (setriq.Levenshtein, setriq.single_dispatch.levenshtein),
+        (
+            functools.partial(setriq.Levenshtein, extra_cost=0.5),
+            functools.partial(setriq.single_dispatch.levenshtein, extra_cost=0.5),
+        ),
+        (
+            setriq.OptimalStringAlignment,
+            setriq.single_dispatch.optimal_string_alignment,
+        ),
+    ],
+)
+@pytest.mark.parametrize("max_distance", [0, 1, 3, 2.5])
+def test_max_distance(metric, single_dispatch, max_distance):
+    # distances above the bound are reported as `max_distance + 1`, all others are exact
+    rng = np.random.default_rng(0)
+    sequences = ["CASSLKPNTEAFF", "CASSLKPNTEAF", "CASLSKPNTEAFF", "CASSAHIANYGYTF", ""]
+    sequences += ["".join(rng.choice(list("AB"), size=size)) for size in [3, 5, 70, 72]]
+
+    expected = metric()(sequences)
+    expected[expected > max_distance] = max_distance + 1
+    np.testing.assert_array_equal(
+        metric(max_distance=max_distance)(sequences), expected
+    )
+    np.testing.assert_array_equal(
+        [
+            single_dispatch(a, b, max_distance=max_distance)
+            for a, b in itertools.combinations(sequences, 2)
+        ],
+        expected,
+    )
+
+    cross = metric(max_distance=max_distance).cross(sequences[:3], sequences)
+    np.testing.assert_array_equal(cross, spatial.distance.squareform(expected)[:3])
+
+
+def test_max_distance_invalid():
+    with pytest.raises(ValueError, match="non-negative"):
+        setriq.Levenshtein(max_distance=-1)
+    with pytest.raises(ValueError, match="non-negative"):
+        setriq.single_dispatch.optimal_string_alignment("A", "B", max_distance=-1)
+
+
 @pytest.mark.parametrize(
     ["metric", "case"],
     itertools.product(
@@ -352,3 +729,690 @@ def test_to_sklearn(metric, case):
     estimator = metric.to_sklearn()
     assert isinstance(estimator, preprocessing.FunctionTransformer)
     assert isinstance(estimator.transform(case), np.ndarray)
+
+
+@pytest.mark.parametrize(
+    ["metric", "case"],
+    itertools.product(
+        [
+            setriq.CdrDist(),
+            setriq.Levenshtein(),
+            setriq.Jaro(),
+            setriq.JaroWinkler(),
+            setriq.LongestCommonSubstring(),
+            setriq.OptimalStringAlignment(),
+        ],
+        [
+            (["CASSLKPNTEAFF"], ["CASSAHIANYGYTF", "CASRGATETQYF"]),
+            (["CASSLKPNTEAFF", "CASSAHIANYGYTF"], ["CASRGATETQYF"]),
+            (["CASSLKPNTEAFF", "CASSAHIANYGYTF"], []),
+        ],
+    ),
+)
+def test_cross(metric, case):
+    queries, references = case
+    res = metric.cross(queries, references)
+    assert isinstance(res, np.ndarray)
+    assert res.shape == (len(queries), len(references))
+
+    # the cross distances are the off-diagonal block of the full distance matrix
+    n = len(queries)
+    full = metric(queries + references)
+    if len(full):
+        full = spatial.distance.squareform(full)
+        assert np.allclose(res, full[:n, n:])
+
+
+@pytest.mark.parametrize(
+    ["metric", "case"],
+    itertools.product(
+        [
+            setriq.Hamming(),
+            setriq.modules.distances.TcrDistComponent(setriq.BLOSUM62, 4.0),
+        ],
+        [(["AASQ"], ["PASQ", "PAPQ"]), (["AASQ"], ["PAS"])],
+    ),
+)
+def test_cross_equal_length(metric, case):
+    queries, references = case
+    if len({len(seq) for seq in queries + references}) > 1:
+        with pytest.raises(ValueError):
+            metric.cross(queries, references)
+        return
+
+    res = metric.cross(queries, references)
+    assert res.shape == (len(queries), len(references))
+    assert np.all(res > 0.0)
+
+
+@pytest.mark.parametrize(
+    ["queries", "references"],
+    [(test_cases[0], ["PAPQ", "AASA"]), (test_cases[1], ["KLA"])],
+)
+def test_tcr_dist_cross(tcr_dist_base, queries, references):
+    metric = tcr_dist_base()
+    queries, references = (
+        [{"cdr_1": seq, "cdr_2": seq, "cdr_2_5": seq, "cdr_3": seq} for seq in case]
+        for case in (queries, references)
+    )
+    res = metric.cross(queries, references)
+    assert res.shape == (len(queries), len(references))
+
+    n = len(queries)
+    full = spatial.distance.squareform(metric(queries + references))
+    assert np.allclose(res, full[:n, n:])
+
+
+@pytest.mark.parametrize(
+    "metric",
+    [setriq.CdrDist(), setriq.Levenshtein(), setriq.Hamming(), setriq.Jaro()],
+)
+def test_out(metric):
+    sequences = test_cases[1]
+    expected = metric(sequences)
+
+    out = np.full(len(expected), np.nan)
+    res = metric(sequences, out=out)
+    assert res is out or np.shares_memory(res, out)
+    assert np.allclose(out, expected)
+
+    # the buffer can be reused
+    out[:] = np.nan
+    metric(sequences, out=out)
+    assert np.allclose(out, expected)
+
+    with pytest.raises(ValueError):
+        metric(sequences, out=np.empty(len(expected) + 1))
+
+    with pytest.raises(TypeError):
+        metric(sequences, out=np.empty(len(expected), dtype=np.int64))
+
+
+def test_tcr_dist_out(tcr_dist_base):
+    metric = tcr_dist_base()
+    (sequences, _), *_ = convert_to_tcr_dist_format(test_cases[1:], tcr_dist_results)
+
+    out = np.empty(3)
+    res = metric(sequences, out=out)
+    assert np.shares_memory(res, out)
+    assert np.allclose(out, [48.0, 72.0, 72.0])
+
+
+@pytest.mark.parametrize("metric", [setriq.CdrDist(), setriq.Levenshtein()])
+def test_concurrent_calls(metric):
+    # the GIL is released during the computation, so several threads can drive the same metric at once
+    sequences = ["CASSLKPNTEAFF", "CASSAHIANYGYTF", "CASRGATETQYF"] * 20
+    expected = metric(sequences)
+
+    with futures.ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(metric, [sequences] * 8))
+    assert all(np.array_equal(result, expected) for result in results)
+
+
+@pytest.mark.parametrize("metric", [setriq.Levenshtein(), setriq.Jaro()])
+def test_variable_length_partition(random_sequences, metric):
+    # the triangle is split into work units by (estimated) cost, so sequences of very different lengths are used to
+    # check that every pair is written exactly once, into the right position
+    sequences = random_sequences(400, size=(1, 59), seed=42)
+
+    out = np.full(len(sequences) * (len(sequences) - 1) // 2, np.nan)
+    metric(sequences, out=out)
+    assert not np.isnan(out).any()
+
+    # `forward(a, b)` is computed for i < j in both cases, so the upper triangles have to match exactly
+    expected = metric.cross(sequences, sequences)
+    upper = np.triu_indices(len(sequences), k=1)
+    assert np.array_equal(spatial.distance.squareform(out)[upper], expected[upper])
+
+
+@pytest.mark.parametrize("tile_size", [1, 7, 64, 10_000])
+@pytest.mark.parametrize("metric", METRICS)
+def test_tile_size(random_sequences, metric, tile_size):
+    sequences = random_sequences(150)
+
+    expected = metric()(sequences)
+    assert np.array_equal(metric(tile_size=tile_size)(sequences), expected)
+
+    queries, references = sequences[:10], sequences[10:]
+    expected = metric().cross(queries, references)
+    assert np.array_equal(
+        metric(tile_size=tile_size).cross(queries, references), expected
+    )
+
+
+@pytest.mark.parametrize("tile_size", [0, -1])
+def test_tile_size_error(tile_size):
+    with pytest.raises(ValueError):
+        setriq.Levenshtein(tile_size=tile_size)
+
+
+def test_tcr_dist_cross_out(tcr_dist_base):
+    metric = tcr_dist_base()
+    queries, references = (
+        [{"cdr_1": seq, "cdr_2": seq, "cdr_2_5": seq, "cdr_3": seq} for seq in case]
+        for case in (test_cases[0], ["PAPQ", "AASA", "AASQ"])
+    )
+    out = np.empty(len(queries) * len(references))
+    res = metric.cross(queries, references, out=out)
+    assert res.shape == (len(queries), len(references))
+    assert np.shares_memory(res, out)
+    assert np.allclose(res, metric.cross(queries, references))
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2, 4, -1])
+@pytest.mark.parametrize("metric", METRICS)
+def test_n_jobs(random_sequences, metric, n_jobs):
+    sequences = random_sequences(150)
+    queries, references = sequences[:10], sequences[10:]
+
+    expected = metric()(sequences)
+    assert np.array_equal(metric(n_jobs=n_jobs)(sequences), expected)
+    assert np.array_equal(metric()(sequences, n_jobs=n_jobs), expected)
+
+    expected = metric().cross(queries, references)
+    assert np.array_equal(metric(n_jobs=n_jobs).cross(queries, references), expected)
+    assert np.array_equal(metric().cross(queries, references, n_jobs=n_jobs), expected)
+
+
+@pytest.mark.parametrize("n_jobs, error", [(0, ValueError), (1.5, TypeError)])
+def test_n_jobs_error(n_jobs, error):
+    with pytest.raises(error):
+        setriq.Levenshtein(n_jobs=n_jobs)
+    with pytest.raises(error):
+        setriq.Levenshtein()(["AASQ", "PASQ"], n_jobs=n_jobs)
+
+
+def test_effective_num_threads():
+    threadpoolctl = pytest.importorskip("threadpoolctl")
+    default = setriq._C.effective_num_threads()
+
+    assert setriq._C.effective_num_threads(3) == 3
+    assert setriq._C.effective_num_threads(-1) == default
+    with threadpoolctl.threadpool_limits(limits=3, user_api="openmp"):
+        assert setriq._C.effective_num_threads() == 3
+        assert setriq._C.effective_num_threads(-2) == 2
+    assert setriq._C.effective_num_threads() == default
+
+
+@pytest.mark.parametrize("chunk_pairs", [1, 7, 500, 10**9])
+@pytest.mark.parametrize("metric", METRICS)
+def test_iter_chunks(random_sequences, metric, chunk_pairs):
+    sequences = random_sequences(150)
+
+    expected = metric()(sequences)
+    chunks = list(metric(tile_size=16).iter_chunks(sequences, chunk_pairs=chunk_pairs))
+
+    starts = [start for start, _ in chunks]
+    assert starts[0] == 0
+    assert starts == sorted(starts)
+    for (start, distances), (stop, _) in zip(
+        chunks, chunks[1:] + [(len(expected), None)]
+    ):
+        assert len(distances) == stop - start
+        assert len(distances) <= max(chunk_pairs, len(sequences) - 1)
+    assert np.array_equal(
+        np.concatenate([distances for _, distances in chunks]), expected
+    )
+
+
+def test_tcr_dist_iter_chunks(tcr_dist_base):
+    metric = tcr_dist_base()
+    sequences = [
+        {"cdr_1": seq, "cdr_2": seq, "cdr_2_5": seq, "cdr_3": seq}
+        for seq in ["AASQ", "PASQ", "GTAA", "HLAA", "KKRA"]
+    ]
+    chunks = list(metric.iter_chunks(sequences, chunk_pairs=3))
+    assert [start for start, _ in chunks] == [0, 4, 7]
+    assert np.allclose(
+        np.concatenate([distances for _, distances in chunks]), metric(sequences)
+    )
+
+
+def test_chunks_prepare_once(tmp_path, monkeypatch, tcr_dist_base):
+    # the sequences are converted (and TcrDist records concatenated and tabulated) once, not for every chunk
+    sequences = ["AASQ", "PASQ", "GTAA", "HLAA", "KKRA"]
+    records = [
+        {part: seq for part in ("cdr_1", "cdr_2", "cdr_2_5", "cdr_3")}
+        for seq in sequences
+    ]
+    for metric, seqs in [(setriq.Levenshtein(), sequences), (tcr_dist_base(), records)]:
+        prepare = metric._prepare
+        calls = []
+
+        def recorded(*args):
+            calls.append(args)
+            return prepare(*args)
+
+        monkeypatch.setattr(metric, "_prepare", recorded)
+        chunks = list(metric.iter_chunks(seqs, chunk_pairs=3))
+        assert len(chunks) == 3 and len(calls) == 1
+
+        calls.clear()
+        res = metric.memmap(
+            seqs, tmp_path / f"{type(metric).__name__}.npy", chunk_pairs=3
+        )
+        assert len(calls) == 1
+        assert np.allclose(res, np.concatenate([distances for _, distances in chunks]))
+
+
+@pytest.mark.parametrize("n", [0, 1])
+def test_iter_chunks_empty(n):
+    assert list(setriq.Levenshtein().iter_chunks(["AASQ"] * n)) == []
+
+
+def test_iter_chunks_error():
+    with pytest.raises(ValueError):
+        list(setriq.Levenshtein().iter_chunks(["AASQ", "PASQ"], chunk_pairs=0))
+    with pytest.raises(ValueError):
+        setriq._C.levenshtein(["AASQ", "PASQ"], extra_cost=0.0, rows=(1, 3))
+
+
+@pytest.mark.parametrize("return_squareform", [False, True])
+@pytest.mark.parametrize("metric", METRICS)
+def test_memmap(tmp_path, random_sequences, metric, return_squareform):
+    sequences = random_sequences(60)
+
+    path = tmp_path / "distances.npy"
+    res = metric().memmap(
+        sequences, path, return_squareform=return_squareform, chunk_pairs=100
+    )
+    expected = metric(return_squareform=return_squareform)(sequences)
+
+    assert np.array_equal(res, expected)
+    assert np.array_equal(np.load(path), expected)
+    assert path.with_name(path.name + ".manifest.json").exists()
+
+
+@pytest.mark.parametrize("return_squareform", [False, True])
+def test_memmap_resume(tmp_path, monkeypatch, return_squareform):
+    sequences = ["".join(seq) for seq in itertools.product("ACGT", repeat=3)]
+    path = tmp_path / "distances.npy"
+    metric = setriq.Levenshtein(return_squareform=return_squareform)
+    expected, expected_reversed = metric(sequences), metric(sequences[::-1])
+
+    forward = metric.forward
+    calls = []
+    interrupt_after = [3]
+
+    def recorded(*args, **kwargs):
+        if len(calls) == interrupt_after[0]:
+            raise KeyboardInterrupt
+        calls.append(kwargs["rows"])
+        return forward(*args, **kwargs)
+
+    monkeypatch.setattr(metric, "forward", recorded)
+    with pytest.raises(KeyboardInterrupt):
+        metric.memmap(sequences, path, chunk_pairs=200)
+    completed = list(calls)
+
+    calls.clear()
+    interrupt_after[0] = -1
+    res = metric.memmap(sequences, path, chunk_pairs=200)
+    assert np.array_equal(res, expected)
+    assert calls and not set(calls).intersection(completed)
+
+    # a different computation does not resume from the manifest
+    calls.clear()
+    res = metric.memmap(sequences[::-1], path, chunk_pairs=200)
+    assert np.array_equal(res, expected_reversed)
+    assert set(completed).issubset(calls)
+
+
+def test_tcr_dist_memmap(tmp_path, tcr_dist_base):
+    metric = tcr_dist_base()
+    sequences = [
+        {"cdr_1": seq, "cdr_2": seq, "cdr_2_5": seq, "cdr_3": seq}
+        for seq in ["AASQ", "PASQ", "GTAA", "HLAA", "KKRA"]
+    ]
+    res = metric.memmap(sequences, tmp_path / "distances.npy", chunk_pairs=3)
+    assert np.allclose(res, metric(sequences))
+
+
+@pytest.mark.parametrize("n", [0, 1])
+def test_memmap_empty(tmp_path, n):
+    res = setriq.Levenshtein().memmap(["AASQ"] * n, tmp_path / "distances.npy")
+    assert res.shape == (0,)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32, np.uint16, np.uint8])
+@pytest.mark.parametrize("metric", INTEGER_METRICS)
+def test_dtype(random_sequences, metric, dtype):
+    sequences = random_sequences(50)
+    queries, references = sequences[:5], sequences[5:]
+
+    res = metric(dtype=dtype)(sequences)
+    assert res.dtype == dtype
+    assert np.array_equal(res, metric()(sequences))
+
+    res = metric(dtype=dtype).cross(queries, references)
+    assert res.dtype == dtype
+    assert res.shape == (len(queries), len(references))
+    assert np.array_equal(res, metric().cross(queries, references))
+
+    for _, distances in metric(dtype=dtype).iter_chunks(sequences, chunk_pairs=100):
+        assert distances.dtype == dtype
+
+    # an output buffer determines the dtype
+    out = np.empty(len(sequences) * (len(sequences) - 1) // 2, dtype=dtype)
+    assert np.shares_memory(metric()(sequences, out=out), out)
+    assert np.array_equal(out, metric()(sequences))
+
+
+def test_dtype_overflow():
+    sequences = ["A" * 300, "C" * 300, "A" * 300]
+    assert np.array_equal(setriq.Levenshtein(dtype=np.uint16)(sequences), [300, 0, 300])
+    with pytest.raises(OverflowError):
+        setriq.Levenshtein(dtype=np.uint8)(sequences)
+    with pytest.raises(OverflowError):
+        setriq.Levenshtein(dtype=np.uint8).cross(sequences[:1], sequences)
+
+    # non-integer distances cannot be represented either
+    with pytest.raises(OverflowError):
+        setriq.Jaro(dtype=np.uint8)(["AASQ", "PASQ"])
+
+
+def test_tcr_dist_dtype(tcr_dist_base):
+    metric = tcr_dist_base()
+    (sequences, _), *_ = convert_to_tcr_dist_format(test_cases[1:], tcr_dist_results)
+
+    for dtype in [np.float32, np.uint16, np.uint8]:
+        metric.dtype = np.dtype(dtype)
+        res = metric(sequences)
+        assert res.dtype == dtype
+        assert np.allclose(res, [48.0, 72.0, 72.0])
+
+    # the sum of the components must fit into the dtype, even if the individual components do
+    metric.dtype = np.dtype(np.uint8)
+    with pytest.raises(OverflowError):
+        metric(
+            [
+                {key: "A" * 12 for key in metric.required_input_keys},
+                {key: "W" * 12 for key in metric.required_input_keys},
+            ]
+        )
+
+
+@pytest.mark.parametrize("dtype", [np.int64, np.float16, "complex128"])
+def test_dtype_error(dtype):
+    with pytest.raises(TypeError):
+        setriq.Levenshtein(dtype=dtype)
+
+
+def test_memmap_dtype(tmp_path):
+    sequences = ["".join(seq) for seq in itertools.product("ACGT", repeat=3)]
+    metric = setriq.Levenshtein(dtype=np.uint8)
+
+    res = metric.memmap(sequences, tmp_path / "distances.npy", chunk_pairs=200)
+    assert res.dtype == np.uint8
+    assert np.array_equal(res, setriq.Levenshtein()(sequences))
+
+    res = metric.memmap(
+        sequences, tmp_path / "square.npy", return_squareform=True, chunk_pairs=200
+    )
+    assert res.dtype == np.uint8
+    assert np.array_equal(res, setriq.Levenshtein(return_squareform=True)(sequences))
+
+
+@pytest.mark.parametrize("metric", METRICS)
+def test_radius_pairs(random_sequences, metric):
+    sequences = random_sequences(80, size=10, alphabet="ACDEF")
+    sequences.append(sequences[0])  # a neighbor at a distance of 0
+    queries, references = sequences[:7], sequences[7:]
+
+    distances = metric(return_squareform=True)(sequences)
+    radius = np.quantile(spatial.distance.squareform(distances), 0.1)
+    expected = np.triu(distances <= radius, k=1)
+
+    rows, columns, res = metric(tile_size=8).radius_pairs(
+        sequences, radius, return_sparse=False
+    )
+    assert np.array_equal(rows, np.nonzero(expected)[0])
+    assert np.array_equal(columns, np.nonzero(expected)[1])
+    assert np.array_equal(res, distances[expected])
+
+    graph = metric().radius_pairs(sequences, radius)
+    assert graph.shape == (len(sequences), len(sequences))
+    assert (graph != graph.T).nnz == 0
+    assert graph.nnz == 2 * expected.sum()
+    assert graph[0, len(sequences) - 1] == 0.0
+    assert np.array_equal(graph.getnnz(axis=1), (expected | expected.T).sum(axis=1))
+
+    expected = metric().cross(queries, references) <= radius
+    graph = metric().radius_pairs(queries, radius, references=references).tocoo()
+    assert graph.shape == (len(queries), len(references))
+
+    stored = np.zeros(graph.shape, dtype=bool)
+    stored[graph.row, graph.col] = True
+    assert np.array_equal(stored, expected)
+
+
+def test_tcr_dist_radius_pairs(tcr_dist_base):
+    metric = tcr_dist_base()
+    sequences = [
+        {"cdr_1": seq, "cdr_2": seq, "cdr_2_5": seq, "cdr_3": seq}
+        for seq in ["AASQ", "PASQ", "GTAA", "HLAA", "KKRA", "AASQ"]
+    ]
+    distances = metric(sequences)
+    radius = np.median(distances)
+    expected = distances <= radius
+
+    rows, columns, res = metric.radius_pairs(sequences, radius, return_sparse=False)
+    idx = condensed_offset_index(rows, columns, len(sequences))
+    assert np.array_equal(np.sort(idx), np.flatnonzero(expected))
+    assert np.array_equal(res, distances[idx])
+
+    graph = metric.radius_pairs(sequences[:2], radius, references=sequences)
+    assert graph.shape == (2, len(sequences))
+    assert graph.nnz == (metric.cross(sequences[:2], sequences) <= radius).sum()
+
+
+def condensed_offset_index(rows, columns, n):
+    return rows * (2 * n - rows - 1) // 2 + columns - rows - 1
+
+
+def test_radius_pairs_empty():
+    rows, columns, distances = setriq.Levenshtein().radius_pairs(
+        ["AASQ"], 1, return_sparse=False
+    )
+    assert len(rows) == len(columns) == len(distances) == 0
+    assert rows.dtype == np.int64
+    assert setriq.Levenshtein().radius_pairs([], 1).shape == (0, 0)
+
+
+def test_radius_pairs_equal_length():
+    with pytest.raises(ValueError):
+        setriq.Hamming().radius_pairs(["AASQ", "AAS"], 1)
+    with pytest.raises(ValueError):
+        setriq.Hamming().radius_pairs(["AASQ"], 1, references=["AAS"])
+
+
+def expected_kneighbors(distances, k):
+    # sort each row by distance, then by index
+    columns = np.broadcast_to(np.arange(distances.shape[1]), distances.shape)
+    indices = np.lexsort((columns, distances), axis=1)[:, :k]
+    return indices, np.take_along_axis(distances, indices, axis=1)
+
+
+@pytest.mark.parametrize("metric", METRICS)
+def test_kneighbors(random_sequences, metric):
+    sequences = random_sequences(80, size=10, alphabet="ACDEF")
+    sequences.append(sequences[0])  # a neighbor at a distance of 0
+    queries, references = sequences[:7], sequences[7:]
+
+    distances = metric(return_squareform=True)(sequences)
+    np.fill_diagonal(distances, np.inf)
+    expected_indices, expected_distances = expected_kneighbors(distances, 5)
+
+    for tile_size, n_jobs in [(None, None), (4, 3)]:
+        indices, res = metric(tile_size=tile_size, n_jobs=n_jobs).kneighbors(
+            sequences, 5
+        )
+        assert indices.shape == res.shape == (len(sequences), 5)
+        assert indices.dtype == np.int64
+        assert np.array_equal(indices, expected_indices)
+        assert np.array_equal(res, expected_distances)
+
+    graph = metric().kneighbors(sequences, 5, return_sparse=True)
+    assert graph.shape == (len(sequences), len(sequences))
+    assert np.array_equal(graph.getnnz(axis=1), np.full(len(sequences), 5))
+    assert graph[0, len(sequences) - 1] == 0.0
+
+    expected_indices, expected_distances = expected_kneighbors(
+        metric().cross(queries, references), 3
+    )
+    indices, res = metric(tile_size=4).kneighbors(queries, 3, references=references)
+    assert np.array_equal(indices, expected_indices)
+    assert np.array_equal(res, expected_distances)
+    assert metric().kneighbors(
+        queries, 3, references=references, return_sparse=True
+    ).shape == (len(queries), len(references))
+
+
+def test_tcr_dist_kneighbors(tcr_dist_base):
+    metric = tcr_dist_base()
+    sequences = [
+        {"cdr_1": seq, "cdr_2": seq, "cdr_2_5": seq, "cdr_3": seq}
+        for seq in ["AASQ", "PASQ", "GTAA", "HLAA", "KKRA", "AASQ"]
+    ]
+    distances = spatial.distance.squareform(metric(sequences))
+    np.fill_diagonal(distances, np.inf)
+    expected_indices, expected_distances = expected_kneighbors(distances, 3)
+
+    indices, res = metric.kneighbors(sequences, 3)
+    assert np.array_equal(indices, expected_indices)
+    assert np.array_equal(res, expected_distances)
+
+    expected_indices, _ = expected_kneighbors(metric.cross(sequences[:2], sequences), 4)
+    indices, _ = metric.kneighbors(sequences[:2], 4, references=sequences)
+    assert np.array_equal(indices, expected_indices)
+
+
+def test_kneighbors_errors():
+    metric = setriq.Levenshtein()
+    with pytest.raises(ValueError):
+        metric.kneighbors(["AASQ", "PASQ"], 2)
+    with pytest.raises(ValueError):
+        metric.kneighbors(["AASQ"], 0, references=["PASQ"])
+    with pytest.raises(ValueError):
+        setriq.Hamming().kneighbors(["AASQ", "AAS"], 1)
+    with pytest.raises(ValueError):
+        setriq.Hamming().kneighbors(["AASQ"], 1, references=["AAS"])
+
+
+@pytest.mark.parametrize(
+    "metric, size",
+    [(metric, 8) for metric in METRICS]
+    + [
+        # unequal weights of the two sequences make the distance asymmetric, i.e. it is not deduplicated
+        (
+            functools.partial(
+                setriq.JaroWinkler, p=0.2, max_l=3, jaro_weights=[0.5, 0.25, 0.25]
+            ),
+            (2, 20),
+        ),
+    ],
+)
+def test_deduplicate(random_sequences, metric, size):
+    sequences = random_sequences(60, size=size, alphabet="ACDEF", n_unique=20)
+
+    expected = metric(deduplicate=False)(sequences)
+    assert np.array_equal(metric()(sequences), expected)
+    assert np.array_equal(metric(n_jobs=3, tile_size=4)(sequences), expected)
+
+    square = metric(return_squareform=True)(sequences)
+    assert np.array_equal(square, spatial.distance.squareform(expected))
+
+    out = np.empty_like(expected)
+    assert metric()(sequences, out=out) is out
+    assert np.array_equal(out, expected)
+
+    uniques, distances, inverse = metric(return_squareform=True).unique_distances(
+        sequences
+    )
+    assert len(uniques) == len(set(sequences))
+    assert [uniques[u] for u in inverse] == sequences
+    if metric().symmetric:
+        assert np.array_equal(distances[np.ix_(inverse, inverse)], square)
+
+
+def test_deduplicate_dtype():
+    sequences = ["CASSLKPNTEAFF", "CASSAHIANYGYTF", "CASSLKPNTEAFF"] * 5
+    expected = setriq.Levenshtein(deduplicate=False)(sequences)
+
+    res = setriq.Levenshtein(dtype=np.uint8)(sequences)
+    assert res.dtype == np.uint8
+    assert np.array_equal(res, expected)
+
+    out = np.empty(len(expected), dtype=np.float32)
+    assert setriq.Levenshtein()(sequences, out=out) is out
+    assert np.array_equal(out, expected)
+
+    with pytest.raises(TypeError):
+        setriq.Levenshtein()(sequences, out=np.empty(len(expected), dtype=np.int64))
+    with pytest.raises(ValueError):
+        setriq.Levenshtein()(sequences, out=np.empty(1))
+
+
+def test_deduplicate_self_distance():
+    # the CdrDist distance of the empty sequence to itself is undefined, which duplicates of it must keep
+    sequences = ["", "CASS", "", "CASS", "", "CATS", ""]
+    expected = setriq.CdrDist(deduplicate=False)(sequences)
+    assert np.isnan(expected[1])  # the pair of sequences 0 and 2
+
+    assert np.array_equal(setriq.CdrDist()(sequences), expected, equal_nan=True)
+    res = setriq.CdrDist(dtype=np.float32)(sequences)
+    assert np.array_equal(res, expected.astype(np.float32), equal_nan=True)
+
+    uniques, distances, _ = setriq.CdrDist(return_squareform=True).unique_distances(
+        sequences
+    )
+    assert uniques == ["", "CASS", "CATS"]
+    assert np.isnan(distances[0, 0])
+    assert np.array_equal(np.diag(distances)[1:], [0.0, 0.0])
+
+
+def test_tcr_dist_deduplicate(tcr_dist_base):
+    sequences = [
+        {"cdr_1": seq, "cdr_2": seq, "cdr_2_5": seq, "cdr_3": seq, "id": str(i)}
+        for i, seq in enumerate(["AASQ", "PASQ", "AASQ", "GTAA", "AASQ", "PASQ"])
+    ]
+    metric = tcr_dist_base()
+    expected = tcr_dist_base(deduplicate=False)(sequences)
+    assert np.array_equal(metric(sequences), expected)
+
+    uniques, _, inverse = metric.unique_distances(sequences)
+    assert len(uniques) == 3
+    assert inverse.tolist() == [0, 1, 0, 2, 0, 1]
+
+
+@pytest.mark.parametrize("metric", METRICS)
+def test_repertoire(random_sequences, metric):
+    sequences = random_sequences(60, size=8, alphabet="ACDEF", n_unique=20)
+    repertoire = setriq.Repertoire(sequences)
+
+    m = metric()
+    assert np.array_equal(m(repertoire), m(sequences))
+    assert np.array_equal(
+        m.cross(repertoire[:5], repertoire), m.cross(sequences[:5], sequences)
+    )
+    assert (m.radius_pairs(repertoire, 2) != m.radius_pairs(sequences, 2)).nnz == 0
+    for res, expected in zip(
+        m.kneighbors(repertoire[:5], 3, references=repertoire),
+        m.kneighbors(sequences[:5], 3, references=sequences),
+    ):
+        assert np.array_equal(res, expected)
+
+
+def test_repertoire_equal_length():
+    with pytest.raises(ValueError):
+        setriq.Hamming()(setriq.Repertoire(["AASQ", "PSQ"]))
+
+
+def test_invalid_character():
+    with pytest.raises(ValueError, match="not in the substitution matrix"):
+        setriq.CdrDist()(["CASS", "CA1S"])
+    with pytest.raises(ValueError, match="not in the substitution matrix"):
+        setriq.CdrDist().cross(["CASS"], ["CA.S"])
+    # a multi-byte character is reported by its bytes
+    with pytest.raises(ValueError, match=r"character '\\xc3'"):
+        setriq.CdrDist()(["CASS", "CAéS"])
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import setriq
+from setriq.modules import repertoire
+
+SEQUENCES = ["CASSLKPNTEAFF", "CASSAHIANYGYTF", "CASRGATETQYF", "CASSLKPNTEAFF"]
+
+
+def test_repertoire():
+    rep = repertoire.Repertoire(SEQUENCES)
+    assert len(rep) == 4
+    assert list(rep) == SEQUENCES
+    assert rep.tolist() == SEQUENCES
+    assert rep[1] == SEQUENCES[1]
+    assert rep[-1] == SEQUENCES[-1]
+
+    sliced = rep[1:3]
+    assert isinstance(sliced, repertoire.Repertoire)
+    assert list(sliced) == SEQUENCES[1:3]
+
+    with pytest.raises(IndexError):
+        rep[4]
+
+
+def test_repertoire_lengths():
+    rep = repertoire.Repertoire(SEQUENCES)
+    assert rep.lengths.dtype == np.int64
+    assert rep.lengths.tolist() == [len(s) for s in SEQUENCES]
+    assert repertoire.Repertoire([]).lengths.tolist() == []
+
+
+def test_repertoire_alphabet():
+    rep = repertoire.Repertoire(SEQUENCES, alphabet=setriq.BLOSUM62.index)
+    rep.check_alphabet("ACDEFGHIKLMNPQRSTVWY")
+
+    with pytest.raises(ValueError, match=r"\['1'\].*sequence 1 \('CA1S'\)"):
+        repertoire.Repertoire(["CASS", "CA1S"], alphabet="ACS")
+    with pytest.raises(ValueError, match=r"\['é'\].*sequence 2"):
+        repertoire.Repertoire(["CASS", "CASS", "CAéS"], alphabet="ACS")
+
+
+def test_repertoire_residues():
+    rep = repertoire.Repertoire(SEQUENCES)
+    assert rep.holds_only("ACEFGHIKLNPQRSTY")
+    assert not rep.holds_only("ACEFGHIKLNPQRST")
+    assert repertoire.Repertoire([]).holds_only("")
+
+    # the metrics only read the sequences of a repertoire which holds residues outside of their substitution matrix
+    rep = repertoire.Repertoire(["CASS", "CA1S"])
+    with pytest.raises(
+        ValueError, match=r"sequence 1 \('CA1S'\) holds the character '1'"
+    ):
+        setriq.CdrDist()(rep)
+    with pytest.raises(ValueError, match="not in the substitution matrix"):
+        setriq.CdrDist().cross(["CASS"], rep)
+
+
+def test_repertoire_unique():
+    rep = repertoire.Repertoire(SEQUENCES)
+    uniques, inverse = rep.unique()
+    assert list(uniques) == SEQUENCES[:3]
+    assert inverse.tolist() == [0, 1, 2, 0]
+    assert rep.unique()[0] is uniques
@@ -1,6 +1,8 @@
+from concurrent import futures
+
 import pytest
 
-from setriq import BLOSUM62, single_dispatch
+from setriq import BLOSUM62, CdrDist, single_dispatch
 
 
 class Cases:
@@ -97,3 +99,47 @@ def test_longest_common_substring(sequences, distance):
 def test_optimal_string_alignment(sequences, distance):
     result = single_dispatch.optimal_string_alignment(*sequences)
     assert result == distance
+
+
+def test_concurrent_calls():
+    a, b = zip(*Cases.SEQUENCES)
+    with futures.ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(single_dispatch.cdr_dist, a, b))
+    assert results == Results.CDR_DIST
+
+
+def test_invalid_character():
+    with pytest.raises(ValueError, match="not in the substitution matrix"):
+        single_dispatch.cdr_dist("CASS", "CA1S")
+    with pytest.raises(ValueError, match="not in the substitution matrix"):
+        single_dispatch.tcr_dist_component(
+            "CASS", "CA.S", substitution_matrix=BLOSUM62, gap_penalty=4.0
+        )
+
+
+def test_cdr_dist_settings():
+    # the prepared metric of one setting must not be reused for another
+    a, b = "CASSLKPNTEAFF", "CASSAHIANYGYTF"
+    default = single_dispatch.cdr_dist(a, b)
+    blosum62 = single_dispatch.cdr_dist(a, b, substitution_matrix=BLOSUM62)
+    gaps = single_dispatch.cdr_dist(a, b, gap_opening_penalty=4.0)
+
+    assert len({default, blosum62, gaps}) == 3
+    assert single_dispatch.cdr_dist(a, b) == default
+    assert single_dispatch.cdr_dist(a, b, substitution_matrix=BLOSUM62) == blosum62
+    assert single_dispatch.cdr_dist(a, b, gap_opening_penalty=4.0) == gaps
+
+    matrix = BLOSUM62.add_token("-", 4.0)
+    assert single_dispatch.cdr_dist(a, b, substitution_matrix=matrix) == blosum62
+    matrix.add_token("1", 4.0, inplace=True)
+    expected = CdrDist(substitution_matrix=matrix)(["CA1S", "CASS"])[0]
+    assert (
+        single_dispatch.cdr_dist("CA1S", "CASS", substitution_matrix=matrix) == expected
+    )
+
+    # a matrix whose scores are modified in place is prepared anew
+    for row in matrix.substitution_matrix:
+        row[matrix.index["S"]] -= 2.0
+    expected = CdrDist(substitution_matrix=matrix)([a, b])[0]
+    assert single_dispatch.cdr_dist(a, b, substitution_matrix=matrix) == expected
+    assert expected != blosum62
@@ -102,3 +102,16 @@ def test_check_jaro_winkler_params(arguments, exception_message):
 
     with pytest.raises(ValueError, match=exception_message):
         f(**arguments)
+
+
+def test_unique_records():
+    uniques, inverse = utils.unique_records(["AASQ", "PSQ", "AASQ", "GTA", "PSQ"])
+    assert uniques == ["AASQ", "PSQ", "GTA"]
+    assert inverse.tolist() == [0, 1, 0, 2, 1]
+
+    records = [{"a": "AASQ", "b": "PSQ"}, {"b": "PSQ", "a": "AASQ"}, {"a": "AASQ"}]
+    assert utils.unique_records(records)[1].tolist() == [0, 0, 1]
+    assert utils.unique_records(records, key=lambda r: r["a"])[1].tolist() == [0, 0, 0]
+
+    uniques, inverse = utils.unique_records([])
+    assert uniques == [] and inverse.dtype == np.int64